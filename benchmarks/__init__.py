@@ -0,0 +1 @@
+"""Benchmarks for pylade (see `benchmarks.run`)."""
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Synthetic multilingual corpora for benchmarks.
+
+Each synthetic language has its own alphabet (taken from a Latin, Cyrillic or
+Greek pool of letters), letter frequencies and vocabulary, and words are drawn
+with Zipfian frequencies, like in natural languages. Corpora only depend on
+their arguments and `seed`, so benchmarks run on the same data across commits.
+
+"""
+
+import csv
+import random
+import string
+
+# Pools of letters for the alphabets of synthetic languages
+SCRIPTS = [
+    string.ascii_lowercase + 'àèéìòù',
+    string.ascii_lowercase + 'äöüßñç',
+    'абвгдеёжзийклмнопрстуфхцчшщъыьэюя',
+    'αβγδεζηθικλμνξοπρστυφχψω',
+]
+
+
+class SyntheticLanguage(object):
+    """A random language, with its own letters and vocabulary.
+
+    Args:
+        label (str): The language label (e.g. `'l03'`).
+        rng (random.Random): The random number generator.
+        vocabulary_size (int): The number of distinct words.
+
+    """
+
+    def __init__(self, label, rng, vocabulary_size=2000):
+        self.label = label
+        letters = list(rng.choice(SCRIPTS))
+        rng.shuffle(letters)
+        letters = letters[:rng.randint(18, len(letters))]
+        letter_weights = [1 / (rank + 1) for rank in range(len(letters))]
+        self.vocabulary = [
+            ''.join(rng.choices(letters, letter_weights, k=rng.randint(1, 10)))
+            for _ in range(vocabulary_size)]
+        self._cumulative_weights = []
+        total = 0.0
+        for rank in range(vocabulary_size):
+            total += 1 / (rank + 1)
+            self._cumulative_weights.append(total)
+
+    def text(self, rng, words):
+        """Return a random text of `words` words."""
+        return ' '.join(rng.choices(
+            self.vocabulary, cum_weights=self._cumulative_weights, k=words))
+
+
+def make_languages(count, seed=0, vocabulary_size=2000):
+    """Return `count` synthetic languages, labeled `'l00'`, `'l01'`, ..."""
+    rng = random.Random(seed)
+    return [SyntheticLanguage('l{:02d}'.format(index), rng, vocabulary_size)
+            for index in range(count)]
+
+def make_corpus(languages, size, words=(5, 20), seed=0):
+    """Return a list of labeled instances (dictionaries), as read from corpora.
+
+    Args:
+        languages (list): The synthetic languages of the instances, which are
+            evenly distributed among them.
+        size (int): The number of instances.
+        words (tuple): The minimum and maximum number of words of each text.
+        seed: The seed of the random number generator.
+
+    """
+    rng = random.Random(seed)
+    instances = []
+    for index in range(size):
+        language = languages[index % len(languages)]
+        instances.append({'language': language.label,
+                          'id_str': str(index),
+                          'text': language.text(rng, rng.randint(*words))})
+    return instances
+
+def write_corpus(instances, corpus_path):
+    """Write instances in the format of `TwitterCorpusReader` corpora."""
+    with open(corpus_path, 'w', newline='') as corpus_file:
+        writer = csv.DictWriter(corpus_file, ['language', 'id_str', 'text'],
+                                delimiter='|')
+        writer.writeheader()
+        writer.writerows(instances)
@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Benchmark suite for training, detection, evaluation and model loading.
+
+Benchmarks run on synthetic multilingual corpora (see `benchmarks.corpus`)
+and report, for each benchmarked operation:
+
+- `seconds`: the time of the fastest repetition;
+- `texts_per_second`: the number of texts processed per second;
+- `latency_ms`: percentiles of the time of a single call (for operations on
+  single texts or profiles);
+- `peak_memory_bytes`: the peak of memory allocated by Python during one
+  more run, traced with `tracemalloc` (unless disabled).
+
+Results are written as JSON, with the commit they were measured on, so that
+two result files can be compared:
+
+    $ python -m benchmarks.run --size 20000 --output before.json
+    $ git checkout my-branch
+    $ python -m benchmarks.run --size 20000 --output after.json \\
+        --compare before.json
+
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pylade import utils
+from pylade.implementations import CavnarTrenkleImpl
+from pylade.implementations.compiled_model import RankedProfile
+from pylade.progress import ProgressReporter
+
+from benchmarks.corpus import make_corpus, make_languages
+
+# Percentiles of latencies in results
+PERCENTILES = (50, 90, 99)
+
+# Names of all benchmarks, in the order they run
+BENCHMARKS = (
+    'extract_text_ngram_freqs', 'compute_profile_from_frequencies',
+    'distance', 'predict_language_short', 'predict_language_long',
+    'predict_languages', 'evaluate', 'train', 'load_file',
+)
+
+
+def run_benchmarks(size=10000, languages=20, limits=(500, 1000, 5000),
+                   engine='python', repeat=3, memory=True, benchmarks=None,
+                   seed=0, workers=2):
+    """Run the benchmark suite.
+
+    Args:
+        size (int): The number of texts of the training corpus. Detection
+            benchmarks use `size // 10` texts.
+        languages (int): The number of synthetic languages.
+        limits (tuple): The profile limits used to train models.
+        engine (str): The scoring engine of the implementation.
+        repeat (int): The number of repetitions of each benchmark. The
+            fastest one is reported.
+        memory (bool): Whether to measure peak memory (in one more run).
+        benchmarks (iterable): The names of the benchmarks to run (see
+            `BENCHMARKS`). All of them by default.
+        seed: The seed of the synthetic corpora.
+        workers (int): The number of processes of the `evaluate` benchmark
+            with workers. It is also run in a single process.
+
+    Returns:
+        A dictionary with the configuration (`meta`) and the results of each
+        benchmark (`benchmarks`).
+
+    """
+    selected = set(BENCHMARKS if benchmarks is None else benchmarks)
+    unknown = selected - set(BENCHMARKS)
+    if unknown:
+        raise ValueError('Unknown benchmarks: {}'.format(', '.join(sorted(unknown))))
+
+    synthetic_languages = make_languages(languages, seed)
+    training_instances = make_corpus(synthetic_languages, size, seed=seed)
+    test_size = max(size // 10, 1)
+    test_instances = make_corpus(
+        synthetic_languages, test_size, words=(3, 15), seed=seed + 1)
+    short_texts = [instance['text'] for instance in test_instances]
+    long_texts = [instance['text'] for instance in make_corpus(
+        synthetic_languages, test_size, words=(150, 300), seed=seed + 2)]
+
+    def create_implementation():
+        # Progress is never reported, even on a terminal
+        return CavnarTrenkleImpl(
+            engine=engine, reporter=ProgressReporter(enabled=False))
+
+    implementation = create_implementation()
+    limit = limits[-1]
+    model = implementation.train(training_instances, limit=limit)
+    frequencies = implementation._languages_ngram_frequencies(training_instances)
+    ranked_profiles = [RankedProfile(profile) for profile in model.values()]
+    text_profiles = [implementation._compute_text_profile(text)
+                     for text in short_texts]
+
+    results = dict()
+    if 'extract_text_ngram_freqs' in selected:
+        results['extract_text_ngram_freqs'] = _measure_calls(
+            implementation._extract_text_ngram_freqs, short_texts, repeat, memory)
+    if 'compute_profile_from_frequencies' in selected:
+        for profile_limit in limits:
+            results['compute_profile_from_frequencies[{}]'.format(profile_limit)] = \
+                _measure_calls(
+                    lambda language_frequencies: implementation.
+                    _compute_profile_from_frequencies(language_frequencies,
+                                                      profile_limit),
+                    list(frequencies.values()), repeat, memory)
+    if 'distance' in selected:
+        pairs = [(text_profile, ranked_profiles[index % len(ranked_profiles)])
+                 for index, text_profile in enumerate(text_profiles)]
+        results['distance'] = _measure_calls(
+            lambda pair: implementation._distance(pair[0], pair[1], 8000),
+            pairs, repeat, memory)
+    implementation.compile_model(model) # Compiled once, like in applications
+    for name, texts in [('predict_language_short', short_texts),
+                        ('predict_language_long', long_texts)]:
+        if name in selected:
+            results[name] = _measure_calls(
+                lambda text: implementation.predict_language(text, model),
+                texts, repeat, memory)
+    if 'predict_languages' in selected:
+        results['predict_languages'] = _measure_run(
+            lambda: list(implementation.predict_languages(short_texts, model)),
+            len(short_texts), repeat, memory)
+    if 'evaluate' in selected:
+        for evaluate_workers in sorted({1, workers}):
+            # Worker processes are not traced by `tracemalloc`
+            results['evaluate[workers={}]'.format(evaluate_workers)] = _measure_run(
+                lambda: list(implementation.evaluate(
+                    model, test_instances, workers=evaluate_workers)),
+                len(test_instances), repeat, memory and evaluate_workers == 1)
+    if 'train' in selected:
+        for profile_limit in limits:
+            results['train[{}]'.format(profile_limit)] = _measure_run(
+                lambda: create_implementation().train(
+                    training_instances, limit=profile_limit),
+                len(training_instances), repeat, memory)
+    if 'load_file' in selected:
+        with tempfile.TemporaryDirectory() as directory:
+            for extension in ['.json', '.pickle', '.pylade']:
+                model_path = os.path.join(directory, 'model' + extension)
+                utils.save_file(model, model_path)
+                results['load_file[{}]'.format(extension)] = _measure_run(
+                    lambda: utils.load_file(model_path), 1, repeat, memory)
+
+    return {
+        'meta': {
+            'commit': _current_commit(),
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'size': size, 'languages': languages, 'limits': list(limits),
+            'engine': engine, 'repeat': repeat, 'seed': seed,
+            'workers': workers,
+        },
+        'benchmarks': results,
+    }
+
+def compare(results, baseline):
+    """Compare throughputs with a baseline.
+
+    Returns:
+        A list of `(benchmark, baseline texts/s, texts/s, speedup)` tuples,
+        for the benchmarks in both results. The speedup is `None` if either
+        throughput is unknown (e.g. too fast to be measured).
+
+    """
+    comparison = []
+    for name, result in results['benchmarks'].items():
+        if name not in baseline['benchmarks']:
+            continue
+        before = baseline['benchmarks'][name]['texts_per_second']
+        after = result['texts_per_second']
+        speedup = after / before if before and after is not None else None
+        comparison.append((name, before, after, speedup))
+    return comparison
+
+def parse_arguments(args):
+    """
+    Parse arguments provided from command-line and return them as a dictionary.
+
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark training, detection, evaluation and model loading.")
+    parser.add_argument(
+        '--size', help="Number of texts of the training corpus",
+        action="store", dest="size", type=int, default=10000)
+    parser.add_argument(
+        '--languages', help="Number of synthetic languages",
+        action="store", dest="languages", type=int, default=20)
+    parser.add_argument(
+        '--limits', help="Profile limits used to train models",
+        action="store", dest="limits", type=int, nargs='+',
+        default=[500, 1000, 5000])
+    parser.add_argument(
+        '--engine', help="Scoring engine (e.g. python, numpy, pruned)",
+        action="store", dest="engine", default='python')
+    parser.add_argument(
+        '--repeat', help="Number of repetitions of each benchmark",
+        action="store", dest="repeat", type=int, default=3)
+    parser.add_argument(
+        '--no-memory', help="Do not measure peak memory",
+        action="store_false", dest="memory")
+    parser.add_argument(
+        '--benchmark', help="Run only this benchmark (it can be repeated)",
+        action="append", dest="benchmarks", choices=BENCHMARKS)
+    parser.add_argument(
+        '--seed', help="Seed of the synthetic corpora",
+        action="store", dest="seed", type=int, default=0)
+    parser.add_argument(
+        '--workers', help="Number of processes of the evaluation with workers",
+        action="store", dest="workers", type=int, default=2)
+    parser.add_argument(
+        '-o', '--output', help="Output results file (JSON)",
+        action="store", dest="output_file", default=None)
+    parser.add_argument(
+        '--compare', help="Results file to compare with (JSON)",
+        action="store", dest="baseline_file", default=None)
+    return vars(parser.parse_args(args))
+
+def main():
+    arguments = parse_arguments(sys.argv[1:])
+    output_file = arguments.pop('output_file')
+    baseline_file = arguments.pop('baseline_file')
+    results = run_benchmarks(**arguments)
+
+    for name, result in results['benchmarks'].items():
+        latency = result.get('latency_ms')
+        print('{:45} {:>12} texts/s{}'.format(
+            name, _format_rate(result['texts_per_second']),
+            '   p50 {:.3f} ms  p99 {:.3f} ms'.format(latency['p50'], latency['p99'])
+            if latency else ''))
+    if output_file:
+        utils._save_as_json(results, output_file)
+    if baseline_file:
+        with open(baseline_file) as f:
+            baseline = json.load(f)
+        print('\nCompared with {} ({}):'.format(
+            baseline_file, baseline['meta'].get('commit')))
+        for name, before, after, speedup in compare(results, baseline):
+            print('{:45} {:>12} -> {:>12} texts/s  x{}'.format(
+                name, _format_rate(before), _format_rate(after),
+                '?' if speedup is None else '{:.2f}'.format(speedup)))
+
+
+# Private functions
+
+def _measure_calls(function, items, repeat, memory):
+    """Time `function` on each item, keeping the latency of every call."""
+    best_seconds, best_latencies = None, None
+    for _ in range(repeat):
+        latencies = []
+        append = latencies.append
+        clock = time.perf_counter
+        start = clock()
+        for item in items:
+            call_start = clock()
+            function(item)
+            append(clock() - call_start)
+        seconds = clock() - start
+        if best_seconds is None or seconds < best_seconds:
+            best_seconds, best_latencies = seconds, latencies
+    result = _result(best_seconds, len(items))
+    result['latency_ms'] = _percentiles(best_latencies)
+    if memory:
+        def call_each():
+            # Results are not kept: the peak is that of a single call
+            for item in items:
+                function(item)
+        result['peak_memory_bytes'] = _peak_memory(call_each)
+    return result
+
+def _measure_run(function, count, repeat, memory):
+    """Time a single call of `function`, which processes `count` texts."""
+    best_seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+        if best_seconds is None or seconds < best_seconds:
+            best_seconds = seconds
+    result = _result(best_seconds, count)
+    if memory:
+        result['peak_memory_bytes'] = _peak_memory(function)
+    return result
+
+def _result(seconds, count):
+    return {'count': count, 'seconds': seconds,
+            'texts_per_second': count / seconds if seconds else None}
+
+def _format_rate(texts_per_second):
+    return '?' if texts_per_second is None else '{:.1f}'.format(texts_per_second)
+
+def _percentiles(latencies):
+    """Return percentiles of latencies (in seconds) in milliseconds.
+
+    >>> _percentiles([0.001 * value for value in range(1, 101)])
+    {'p50': 50.0, 'p90': 90.0, 'p99': 99.0}
+
+    """
+    ordered = sorted(latencies)
+    return {'p{}'.format(percentile): round(1000 * ordered[
+        min(len(ordered) - 1, max(0, -(-percentile * len(ordered) // 100) - 1))], 6)
+            for percentile in PERCENTILES}
+
+def _peak_memory(function):
+    """Return the peak of memory allocated while calling `function`."""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def _current_commit():
+    """Return the current git commit, if any."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+if __name__ == '__main__':
+    main()
@@ -2,15 +2,21 @@
 
 Classes need to be whitelisted in order to sanitize command-line input and avoid
 malicious or wrong code execution.
+
+Each class is registered with the name of the module defining it. Modules are
+only imported when a class is requested, so that command-line scripts do not
+pay the import cost of every corpus reader and implementation.
 """
 
+import importlib
 import logging
 
-from pylade.corpus_readers import TwitterCorpusReader
-from pylade.implementations import CavnarTrenkleImpl
-
-CORPUS_READERS = {TwitterCorpusReader}
-IMPLEMENTATIONS = {CavnarTrenkleImpl}
+CORPUS_READERS = {
+    'TwitterCorpusReader': 'pylade.corpus_readers.twitter_corpus_reader',
+}
+IMPLEMENTATIONS = {
+    'CavnarTrenkleImpl': 'pylade.implementations.cavnar_trenkle_impl',
+}
 
 
 def find_corpus_reader(class_name):
@@ -24,7 +30,7 @@ def find_corpus_reader(class_name):
         allowed classes.
 
     """
-    return _find_class_in_set(class_name, CORPUS_READERS)
+    return _find_class_in_registry(class_name, CORPUS_READERS)
 
 def find_implementation(class_name):
     """Return implementation class if whitelisted.
@@ -37,16 +43,13 @@ def find_implementation(class_name):
         allowed classes.
 
     """
-    return _find_class_in_set(class_name, IMPLEMENTATIONS)
+    return _find_class_in_registry(class_name, IMPLEMENTATIONS)
 
 # private functions #
 
-def _find_class_in_set(class_name, class_set):
-    try:
-        return next(class_item
-                    for class_item in class_set
-                    if class_item.__name__ == class_name)
-    except StopIteration as exception:
+def _find_class_in_registry(class_name, registry):
+    if class_name not in registry:
         logging.error(
             'The provided class name was not found in the available classes.')
-        raise exception
+        raise StopIteration(class_name)
+    return getattr(importlib.import_module(registry[class_name]), class_name)
@@ -1,5 +1,6 @@
 from pylade.console_scripts.args_parsers import (
     detect_script_args_parser,
     evaluate_script_args_parser,
+    serve_script_args_parser,
     train_script_args_parser
     )
@@ -34,7 +34,42 @@ def parse_arguments(args):
     )
     parser.add_argument(
         'text',
-        help="Text to be translated",
+        help="Text to be translated. Several texts can be given: their \
+              languages are detected in batch, one prediction per line",
+        nargs='*',
+    )
+    parser.add_argument(
+        '--input',
+        help="Detect the language of each text in a file, instead of the \
+              texts given as arguments ('-' reads from standard input). \
+              Predictions are written one per line",
+        action="store", dest="input_file",
+        default=None
+    )
+    parser.add_argument(
+        '--format',
+        help="Format of the input file: one text per line, JSON lines or CSV",
+        action="store", dest="input_format",
+        choices=['lines', 'jsonl', 'csv'], default='lines'
+    )
+    parser.add_argument(
+        '--text-column',
+        help="Field (JSON lines) or column name (CSV) containing the text",
+        action="store", dest="text_column",
+        default='text'
+    )
+    parser.add_argument(
+        '--delimiter',
+        help="Character that separates the columns of a CSV input file \
+              (default: '|', like corpora)",
+        action="store", dest="delimiter",
+        default='|'
+    )
+    parser.add_argument(
+        '--workers',
+        help="Number of processes used to detect the languages of an input file",
+        action="store", dest="workers",
+        type=int, default=1
     )
     parser.add_argument(
         '-i', '--implementation',
@@ -44,10 +79,53 @@ def parse_arguments(args):
     )
     parser.add_argument(
         '-o', '--output',
-        help="Output results file in JSON (e.g. results.json)",
+        help="Output results file in JSON (e.g. results.json). With --input, \
+              predictions are written one per line",
         action="store", dest="output_file",
         default=None
     )
+    parser.add_argument(
+        '--engine',
+        help="Scoring engine of the implementation: python, numpy (which \
+              scores against the mapped rank matrix of .pylade models) or \
+              pruned. Defaults to the one of the implementation",
+        action="store", dest="engine",
+        choices=['python', 'numpy', 'pruned'], default=None
+    )
+    parser.add_argument(
+        '--cache-size',
+        help="Cache the predictions of up to this number of distinct \
+              (normalized) texts",
+        action="store", dest="cache_size",
+        type=int, default=None
+    )
+    parser.add_argument(
+        '--cache-ttl',
+        help="Number of seconds after which cached predictions expire",
+        action="store", dest="cache_ttl",
+        type=float, default=None
+    )
+    parser.add_argument(
+        '--profile',
+        help="Write the time spent in each stage (tokenization, ngram \
+              extraction, profile ranking, scoring) and counters on standard \
+              error at the end",
+        action="store_true", dest="profile"
+    )
+    parser.add_argument(
+        '--cprofile',
+        help="Run under cProfile and save its statistics to this file (read \
+              them with `python -m pstats FILE`)",
+        action="store", dest="cprofile_output",
+        default=None
+    )
+    parser.add_argument(
+        '--progress',
+        help="Report progress on standard error: only on a terminal (auto, \
+              default), always or never",
+        action="store", dest="progress",
+        choices=['auto', 'always', 'never'], default='auto'
+    )
     # This argument is a json object which will be mapped to dict
     parser.add_argument(
         '--predict-args',
@@ -56,4 +134,7 @@ def parse_arguments(args):
         type=json.loads
     )
 
-    return vars(parser.parse_args(args))
+    arguments = vars(parser.parse_args(args))
+    if not arguments['text'] and not arguments['input_file']:
+        parser.error("a text or an --input file is required")
+    return arguments
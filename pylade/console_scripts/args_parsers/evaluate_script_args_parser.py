@@ -52,12 +52,53 @@ def parse_arguments(args):
         action="store", dest="corpus_reader_class",
         default='TwitterCorpusReader'
     )
+    parser.add_argument(
+        '--use-index',
+        help="Index the languages of the test data in a sidecar file, reused \
+              by later runs (see TwitterCorpusReader)",
+        action="store_true", dest="use_index"
+    )
     parser.add_argument(
         '-o', '--output',
         help="Output results file in JSON (e.g. results.json)",
         action="store", dest="results_output_file",
         default='results.json'
     )
+    parser.add_argument(
+        '--output-format',
+        help="Format of the output results file: nested JSON (json, default) or\
+              one JSON object per result (jsonl)",
+        action="store", dest="results_output_format",
+        choices=['json', 'jsonl'], default='json'
+    )
+    parser.add_argument(
+        '--metrics',
+        help="Output file for accuracy, per-language precision, recall and F1\
+              score, and confusion matrices, for each error value (JSON)",
+        action="store", dest="metrics_output_file",
+        default=None
+    )
+    parser.add_argument(
+        '--profile',
+        help="Write the time spent in each stage (tokenization, ngram \
+              extraction, profile ranking, scoring) and counters on standard \
+              error at the end",
+        action="store_true", dest="profile"
+    )
+    parser.add_argument(
+        '--cprofile',
+        help="Run under cProfile and save its statistics to this file (read \
+              them with `python -m pstats FILE`)",
+        action="store", dest="cprofile_output",
+        default=None
+    )
+    parser.add_argument(
+        '--progress',
+        help="Report progress on standard error: only on a terminal (auto, \
+              default), always or never",
+        action="store", dest="progress",
+        choices=['auto', 'always', 'never'], default='auto'
+    )
     # This argument is a json object which will be mapped to dict
     parser.add_argument(
         '--eval-args',
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Parsing functionalities for serve.py script arguments."""
+
+import argparse
+import json
+import logging
+import os
+
+
+def parse_arguments(args):
+    """
+    Parse arguments provided from command-line and return them as a dictionary.
+
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '-d', '--debug',
+        help="Activates debug mode",
+        action="store_const", dest="loglevel", const=logging.DEBUG,
+        default=logging.WARNING,
+    )
+    parser.add_argument(
+        '-v', '--verbose',
+        help="Activates verbose mode",
+        action="store_const", dest="loglevel", const=logging.INFO,
+    )
+    parser.add_argument(
+        '-m', '--model',
+        help="Path to model input file (e.g. model.json)",
+        action="store", dest="model",
+        default='/'.join([os.path.dirname(__file__), '../../data/model.json'])
+    )
+    parser.add_argument(
+        '-i', '--implementation',
+        help="Chosen method (e.g. CavnarTrenkleImpl)",
+        action="store", dest="implementation",
+        default='CavnarTrenkleImpl'
+    )
+    parser.add_argument(
+        '--host',
+        help="Address the server listens on",
+        action="store", dest="host",
+        default='127.0.0.1'
+    )
+    parser.add_argument(
+        '--port',
+        help="TCP port the server listens on",
+        action="store", dest="port",
+        type=int, default=8000
+    )
+    parser.add_argument(
+        '--socket',
+        help="Path of a Unix socket to listen on, instead of a TCP port",
+        action="store", dest="socket_path",
+        default=None
+    )
+    parser.add_argument(
+        '--workers',
+        help="Number of processes used to detect languages",
+        action="store", dest="workers",
+        type=int, default=1
+    )
+    parser.add_argument(
+        '--engine',
+        help="Scoring engine of the implementation: python, numpy (which \
+              scores against the mapped rank matrix of .pylade models) or \
+              pruned. Defaults to the one of the implementation",
+        action="store", dest="engine",
+        choices=['python', 'numpy', 'pruned'], default=None
+    )
+    parser.add_argument(
+        '--cache-size',
+        help="Cache the predictions of up to this number of distinct \
+              (normalized) texts",
+        action="store", dest="cache_size",
+        type=int, default=None
+    )
+    parser.add_argument(
+        '--cache-ttl',
+        help="Number of seconds after which cached predictions expire",
+        action="store", dest="cache_ttl",
+        type=float, default=None
+    )
+    # This argument is a json object which will be mapped to dict
+    parser.add_argument(
+        '--predict-args',
+        help="Arguments for the prediction method (JSON format)",
+        action="store", dest="predict_args",
+        type=json.loads
+    )
+
+    return vars(parser.parse_args(args))
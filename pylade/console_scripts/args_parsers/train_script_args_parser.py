@@ -42,12 +42,54 @@ def parse_arguments(args):
         action="store", dest="corpus_reader_class",
         default='TwitterCorpusReader'
     )
+    parser.add_argument(
+        '--use-index',
+        help="Index the languages of the training data in a sidecar file, reused \
+              by later runs (see TwitterCorpusReader)",
+        action="store_true", dest="use_index"
+    )
     parser.add_argument(
         '-o', '--output',
         help="Output model",
         action="store", dest="model_output_file",
         default='model.json'
     )
+    parser.add_argument(
+        '--counts',
+        help="Save the ngram counts of the training to this file (e.g. \
+              model.counts), so that the model can be updated later",
+        action="store", dest="counts_file",
+        default=None
+    )
+    parser.add_argument(
+        '--update',
+        help="Update this model with the training data, instead of training \
+              a new one. It requires the --counts file of its training, which \
+              is updated as well",
+        action="store", dest="update_model",
+        default=None
+    )
+    parser.add_argument(
+        '--profile',
+        help="Write the time spent in each stage (tokenization, ngram \
+              extraction, profile ranking, scoring) and counters on standard \
+              error at the end",
+        action="store_true", dest="profile"
+    )
+    parser.add_argument(
+        '--cprofile',
+        help="Run under cProfile and save its statistics to this file (read \
+              them with `python -m pstats FILE`)",
+        action="store", dest="cprofile_output",
+        default=None
+    )
+    parser.add_argument(
+        '--progress',
+        help="Report progress on standard error: only on a terminal (auto, \
+              default), always or never",
+        action="store", dest="progress",
+        choices=['auto', 'always', 'never'], default='auto'
+    )
     # This argument is a json object which will be mapped to dict
     parser.add_argument(
         '--train-args',
@@ -56,4 +98,7 @@ def parse_arguments(args):
         type=json.loads
     )
 
-    return vars(parser.parse_args(args))
+    arguments = vars(parser.parse_args(args))
+    if arguments['update_model'] and not arguments['counts_file']:
+        parser.error("--update requires --counts")
+    return arguments
@@ -1,36 +1,160 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import csv
+import json
 import logging
 import sys
 
 from pylade import utils
 from pylade import allowed_classes
 from pylade.console_scripts import detect_script_args_parser
+from pylade.instrumentation import run_profiled
+from pylade.progress import create_reporter
+
+# Size of the buffers used to read and write files in streaming mode
+_BUFFER_SIZE = 1 << 20
 
 def start_detection(arguments):
+    if arguments.get('input_file'):
+        return detect_stream(arguments)
     model_file = arguments['model']
     model = utils.load_file(model_file)
-    text = arguments['text']
+    texts = arguments['text']
+    if isinstance(texts, str):
+        texts = [texts]
     output_file = arguments['output_file']
-    implementation = allowed_classes.find_implementation(arguments['implementation'])
+    implementation_class = allowed_classes.find_implementation(arguments['implementation'])
     # implementation = implementation(model=model, error_value=error_value) # TODO: implement this kind of constructor
+    implementation = implementation_class(**utils.implementation_arguments(arguments))
 
     # NOTE: `error_value` should in general be equal to the value used for testing.
     prediction_arguments = utils.convert_unknown_arguments(arguments['predict_args']) or {}
 
     logging.info("Identifying language...")
-    results = implementation().predict_language(text, model, **prediction_arguments)
+    if len(texts) == 1:
+        results = implementation.predict_language(
+            texts[0], model, **prediction_arguments)
+        print(results)
+    else:
+        results = []
+        for result in implementation.predict_languages(
+                texts, model, **prediction_arguments):
+            print(result)
+            results.append(result)
+    if getattr(implementation, 'prediction_cache', None) is not None:
+        logging.info("Prediction cache: %s", implementation.prediction_cache.stats())
     if output_file:
         utils.save_file(results, output_file)
 
-    print(results)
     return results
 
+def detect_stream(arguments):
+    """Detect the language of each text of the input file.
+
+    Texts are read, predicted and written one batch at a time, so that memory
+    usage does not depend on the size of the input.
+
+    Returns:
+        The number of texts processed.
+
+    """
+    # Imported here, since it is needed only in streaming mode
+    from pylade.detection_service import DetectionService
+
+    implementation_class = allowed_classes.find_implementation(arguments['implementation'])
+    prediction_arguments = utils.convert_unknown_arguments(arguments['predict_args']) or {}
+    input_path = arguments['input_file']
+    input_format = arguments.get('input_format', 'lines')
+    output_file = arguments['output_file']
+
+    logging.info("Identifying languages...")
+    service = DetectionService(
+        implementation_class(**utils.implementation_arguments(arguments)),
+        arguments['model'], prediction_arguments,
+        workers=arguments.get('workers', 1))
+    # '-' stands for standard input, which must not be closed
+    input_stream = open(
+        0 if input_path == '-' else input_path, encoding='utf-8',
+        buffering=_BUFFER_SIZE, newline='' if input_format == 'csv' else None,
+        closefd=input_path != '-')
+    output_stream = (open(output_file, 'w', encoding='utf-8', buffering=_BUFFER_SIZE)
+                     if output_file else sys.stdout)
+    # Texts are counted by the reporter of the implementation, if it has one
+    reporter = (getattr(service.implementation, 'reporter', None) or
+                create_reporter(arguments.get('progress', 'auto')))
+    reporter.start('detect')
+    try:
+        texts = _read_texts(
+            input_stream, input_format, arguments.get('text_column', 'text'),
+            arguments.get('delimiter', '|'))
+        for language in service.detect_stream(texts):
+            output_stream.write(language + '\n')
+            reporter.advance()
+    finally:
+        reporter.finish()
+        logging.info("Detection statistics: %s", reporter.stats())
+        if service.stats():
+            logging.info("Prediction cache: %s", service.stats()['cache'])
+        service.close()
+        input_stream.close()
+        if output_file:
+            output_stream.close()
+    return reporter.counters['detect']
+
 def main():
     arguments = detect_script_args_parser.parse_arguments(sys.argv[1:])
     utils._configure_logger(arguments['loglevel'])
-    start_detection(arguments)
+    run_profiled(start_detection, arguments)
+
+# Private functions
+
+def _read_texts(input_stream, input_format, text_column, delimiter='|'):
+    """Lazily read the texts of an input stream.
+
+    Args:
+        input_stream (file): The input file.
+        input_format (str): 'lines' (one text per line), 'jsonl' (one JSON
+            object per line) or 'csv' (a CSV file with a header).
+        text_column (str): The key (JSON lines) or the column name (CSV) of the
+            texts.
+        delimiter (str): The character that separates the CSV columns.
+
+    Yields:
+        The texts in the input stream.
+
+    Raises:
+        ValueError: If a JSON line is not an object whose `text_column` is a
+            string. The error gives the line number.
+
+    """
+    if input_format == 'csv':
+        reader = csv.reader(input_stream, delimiter=delimiter)
+        header = next(reader, [])
+        if text_column not in header:
+            raise ValueError("No {!r} column in the input file.".format(text_column))
+        column = header.index(text_column)
+        for row in reader:
+            if not row: # Skip empty lines, like `CSVCorpusReader`
+                continue
+            yield row[column] if column < len(row) else ''
+    elif input_format == 'jsonl':
+        for line_number, line in enumerate(input_stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                raise ValueError("Line {}: invalid JSON ({}).".format(
+                    line_number, error)) from None
+            text = record.get(text_column) if isinstance(record, dict) else None
+            if not isinstance(text, str):
+                raise ValueError("Line {}: no {!r} string in the record.".format(
+                    line_number, text_column))
+            yield text
+    else:
+        for line in input_stream:
+            yield line.rstrip('\r\n')
 
 if __name__ == '__main__':
     main()
@@ -7,23 +7,31 @@ import sys
 from pylade import utils
 from pylade import allowed_classes
 from pylade.console_scripts import evaluate_script_args_parser
+from pylade.instrumentation import run_profiled
+from pylade.results_writer import ResultsWriter
 
 def start_evaluation(arguments):
     model_file          = arguments['model']
     test_data_file      = arguments['test-data']
     corpus_class_name   = arguments['corpus_reader_class']
     output_file         = arguments['results_output_file']
+    output_format       = arguments.get('results_output_format', 'json')
+    metrics_file        = arguments.get('metrics_output_file')
     implementation_name = arguments['implementation']
 
     corpus_reader_class = allowed_classes.find_corpus_reader(corpus_class_name)
-    test_corpus = corpus_reader_class(test_data_file)
+    test_corpus = corpus_reader_class(
+        test_data_file, **utils.corpus_reader_arguments(arguments))
     model = utils.load_file(model_file)
-    implementation = allowed_classes.find_implementation(implementation_name)
+    implementation_class = allowed_classes.find_implementation(implementation_name)
 
     logging.info("Retrieving all documents from test data...")
-    test_instances = test_corpus.all_instances()
+    if hasattr(test_corpus, 'read_columns'):
+        test_instances = test_corpus # Only the needed columns are read
+    else:
+        test_instances = test_corpus.all_instances()
 
-    logging.info("Evaluating implementation of {}.".format(implementation.__name__))
+    logging.info("Evaluating implementation of {}.".format(implementation_class.__name__))
     # TODO: Should we only get instances of specified language in advance? Something like:
     #   test_instances = test_corpus.tweets_with_language('it')
     # This is basically what we are doing, but later (spending more memory) I think
@@ -32,14 +40,37 @@ def start_evaluation(arguments):
     # stored in a list, because they have to be regenerated
     # test_instances = list(test_instances)
     evaluation_arguments = utils.convert_unknown_arguments(arguments['eval_args']) or {}
-    results = implementation().evaluate(model, test_instances, **evaluation_arguments)
-    for result in results:
-        utils._save_result(result, output_file)
+    implementation = implementation_class(**utils.implementation_arguments(arguments))
+    if metrics_file and hasattr(implementation, 'confusion_matrices'):
+        # Results and metrics are derived from the same confusion matrices
+        evaluation_arguments = dict(evaluation_arguments)
+        split_languages = evaluation_arguments.pop('split_languages', False)
+        matrices = implementation.confusion_matrices(
+            model, test_instances, **evaluation_arguments)
+        languages = evaluation_arguments.get('languages')
+        utils._save_as_json({
+            str(error_value): {
+                'accuracy': matrix.accuracy(languages),
+                'languages': matrix.metrics(),
+                'confusion_matrix': matrix.to_dict()}
+            for error_value, matrix in matrices.items()}, metrics_file)
+        results = implementation.evaluation_results(
+            matrices, languages, split_languages)
+    else:
+        results = implementation.evaluate(
+            model, test_instances, **evaluation_arguments)
+    # Results are appended as they are computed, and written as nested JSON
+    # at the end (unless JSON Lines are requested)
+    with ResultsWriter(output_file, compact=output_format == 'json') as writer:
+        for result in results:
+            writer.write(result)
+    if getattr(implementation, 'reporter', None) is not None:
+        logging.info("Evaluation statistics: %s", implementation.reporter.stats())
 
 def main():
     arguments = evaluate_script_args_parser.parse_arguments(sys.argv[1:])
     utils._configure_logger(arguments['loglevel'])
-    start_evaluation(arguments)
+    run_profiled(start_evaluation, arguments)
 
 if __name__ == '__main__':
     main()
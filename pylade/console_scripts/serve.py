@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+import sys
+
+from pylade import utils
+from pylade import allowed_classes
+from pylade import server
+from pylade.detection_service import DetectionService, create_implementation
+from pylade.console_scripts import serve_script_args_parser
+
+def create_server(arguments):
+    implementation = allowed_classes.find_implementation(arguments['implementation'])
+    # NOTE: `error_value` should in general be equal to the value used for testing.
+    prediction_arguments = utils.convert_unknown_arguments(arguments['predict_args']) or {}
+
+    logging.info("Loading model...")
+    service = DetectionService(
+        create_implementation(implementation, arguments.get('cache_size'),
+                              arguments.get('cache_ttl'),
+                              engine=arguments.get('engine')),
+        arguments['model'], prediction_arguments,
+        workers=arguments['workers'])
+    return server.make_server(
+        service, arguments['host'], arguments['port'], arguments['socket_path'])
+
+def start_server(arguments):
+    detection_server = create_server(arguments)
+    if arguments['socket_path']:
+        logging.warning("Serving on %s", arguments['socket_path'])
+    else:
+        logging.warning("Serving on http://%s:%s",
+                        *detection_server.server_address[:2])
+    try:
+        detection_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        detection_server.server_close()
+        detection_server.service.close()
+
+def main():
+    arguments = serve_script_args_parser.parse_arguments(sys.argv[1:])
+    utils._configure_logger(arguments['loglevel'])
+    start_server(arguments)
+
+if __name__ == '__main__':
+    main()
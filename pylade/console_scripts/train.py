@@ -7,29 +7,55 @@ import sys
 from pylade import utils
 from pylade import allowed_classes
 from pylade.console_scripts import train_script_args_parser
+from pylade.instrumentation import run_profiled
 
 def start_training(arguments):
     training_data_file = arguments['training-data']
     corpus_reader_class = allowed_classes.find_corpus_reader(arguments['corpus_reader_class'])
-    training_corpus = corpus_reader_class(training_data_file)
+    training_corpus = corpus_reader_class(
+        training_data_file, **utils.corpus_reader_arguments(arguments))
+
+    training_arguments = utils.convert_unknown_arguments(arguments['train_args']) or {}
 
     # languages =  training_corpus.available_languages()
-    logging.info("Retrieving all documents from training corpus...")
-    labeled_tweets = training_corpus.all_instances()
+    if (training_arguments.get('workers', 1) > 1 or
+            hasattr(training_corpus, 'read_columns')):
+        # Only the needed columns are read (by each worker process, if any)
+        labeled_tweets = training_corpus
+    else:
+        logging.info("Retrieving all documents from training corpus...")
+        labeled_tweets = training_corpus.all_instances()
 
     output_file = arguments['model_output_file']
 
-    implementation = allowed_classes.find_implementation(arguments['implementation'])
-    logging.info("Training the model. This could take some time...")
-
-    training_arguments = utils.convert_unknown_arguments(arguments['train_args']) or {}
-    model = implementation().train(labeled_tweets, **training_arguments)
+    implementation = allowed_classes.find_implementation(
+        arguments['implementation'])(**utils.implementation_arguments(arguments))
+    counts_file = arguments.get('counts_file')
+
+    if arguments.get('update_model'):
+        # Imported here, since it is needed only to update models
+        from pylade.implementations.ngram_counts import NgramCounts
+
+        logging.info("Updating the model...")
+        model = implementation.update(
+            labeled_tweets, utils.load_file(arguments['update_model']),
+            NgramCounts.load(counts_file),
+            workers=training_arguments.get('workers', 1))
+    else:
+        logging.info("Training the model. This could take some time...")
+        if counts_file:
+            training_arguments['keep_counts'] = True
+        model = implementation.train(labeled_tweets, **training_arguments)
+    if getattr(implementation, 'reporter', None) is not None:
+        logging.info("Training statistics: %s", implementation.reporter.stats())
     utils.save_file(model, output_file)
+    if counts_file:
+        implementation.ngram_counts.save(counts_file)
 
 def main():
     arguments = train_script_args_parser.parse_arguments(sys.argv[1:])
     utils._configure_logger(arguments['loglevel'])
-    start_training(arguments)
+    run_profiled(start_training, arguments)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Sidecar index of the records of a CSV corpus, grouped by label.
+
+The index maps each label (e.g. a language) to the byte offsets of the records
+with that label. It is built with a single pass over the corpus, and saved
+next to it, so that statistics and per-label access do not need to scan the
+corpus again. The index is rebuilt whenever the size or the modification time
+of the corpus change.
+
+Index files are binary (little-endian):
+
+    magic       8 bytes, `MAGIC`
+    header      corpus size (uint64), corpus modification time in nanoseconds
+                (int64), number of labels (uint32)
+    labels      for each label: label size (uint16), UTF-8 label, number of
+                records (uint64), record offsets (uint64 array)
+
+"""
+
+from array import array
+import csv
+import locale
+import logging
+import os
+import struct
+import sys
+
+from .csv_corpus_reader import read_records
+
+MAGIC = b'PYLADEI\x02' # Indexes of older versions are rebuilt
+INDEX_SUFFIX = '.index'
+
+_HEADER = struct.Struct('<QqI')
+_LABEL_SIZE = struct.Struct('<H')
+_COUNT = struct.Struct('<Q')
+
+
+def load_or_build_index(corpus_path, delimiter, label_column,
+                        index_path=None):
+    """Load the index of a corpus, building (and saving) it if needed.
+
+    Args:
+        corpus_path (str): The path of the CSV corpus.
+        delimiter (str): The character that separates the CSV columns.
+        label_column (str): The name of the column used to group records.
+        index_path (str): The path of the index file. Defaults to the corpus
+            path followed by `INDEX_SUFFIX`.
+
+    Returns:
+        A dictionary mapping each label to an array of record offsets, in file
+        order. Labels are sorted by their first appearance in the corpus.
+
+    """
+    if index_path is None:
+        index_path = corpus_path + INDEX_SUFFIX
+    corpus_stat = os.stat(corpus_path)
+    index = _load_index(index_path, corpus_stat)
+    if index is None:
+        index = build_index(corpus_path, delimiter, label_column)
+        try:
+            _save_index(index, index_path, corpus_stat)
+        except OSError as error: # E.g. a read-only directory
+            logging.warning("Could not save corpus index: %s", error)
+    return index
+
+def build_index(corpus_path, delimiter, label_column):
+    """Read the corpus once, collecting the offset of each record by label.
+
+    Records are parsed like `CSVCorpusReader` does (see `read_records`), so
+    they can span several lines when they have quoted fields.
+
+    """
+    encoding = locale.getpreferredencoding(False)
+    index = dict()
+    with open(corpus_path, 'rb', buffering=1 << 20) as input_file:
+        header = next(csv.reader(
+            [input_file.readline().decode(encoding)], delimiter=delimiter))
+        column = header.index(label_column)
+        for start, fields in read_records(input_file, delimiter, encoding):
+            if not fields: # Blank lines are not records
+                continue
+            label = fields[column] if column < len(fields) else ''
+            if label not in index:
+                index[label] = array('Q')
+            index[label].append(start)
+    return index
+
+
+# Private functions
+
+def _load_index(index_path, corpus_stat):
+    """Load an index file, or return `None` if it is missing or stale."""
+    try:
+        with open(index_path, 'rb') as index_file:
+            if index_file.read(len(MAGIC)) != MAGIC:
+                return None
+            size, mtime, n_labels = _HEADER.unpack(index_file.read(_HEADER.size))
+            if (size, mtime) != (corpus_stat.st_size, corpus_stat.st_mtime_ns):
+                return None
+            index = dict()
+            for _ in range(n_labels):
+                label_size, = _LABEL_SIZE.unpack(index_file.read(_LABEL_SIZE.size))
+                label = index_file.read(label_size).decode('utf-8')
+                count, = _COUNT.unpack(index_file.read(_COUNT.size))
+                offsets = array('Q')
+                offsets.frombytes(index_file.read(count * offsets.itemsize))
+                if sys.byteorder == 'big':
+                    offsets.byteswap()
+                index[label] = offsets
+            return index
+    except (OSError, struct.error):
+        return None
+
+def _save_index(index, index_path, corpus_stat):
+    temporary_path = index_path + '.tmp'
+    with open(temporary_path, 'wb') as index_file:
+        index_file.write(MAGIC)
+        index_file.write(_HEADER.pack(
+            corpus_stat.st_size, corpus_stat.st_mtime_ns, len(index)))
+        for label, offsets in index.items():
+            encoded_label = label.encode('utf-8')
+            index_file.write(_LABEL_SIZE.pack(len(encoded_label)))
+            index_file.write(encoded_label)
+            index_file.write(_COUNT.pack(len(offsets)))
+            if sys.byteorder == 'big':
+                offsets = array('Q', offsets)
+                offsets.byteswap()
+            index_file.write(offsets.tobytes())
+    os.replace(temporary_path, index_path) # Readers never see partial files
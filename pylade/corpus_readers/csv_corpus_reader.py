@@ -4,10 +4,17 @@
 """Module for corpus readers for CSV datasets."""
 
 import csv
+import locale
+from operator import itemgetter
+import os
 import sys
 
+from pylade import utils
 from .corpus_reader import CorpusReader
 
+# Size of the read buffer used by `read_columns`
+BUFFER_SIZE = 1 << 20
+
 
 class CSVCorpusReader(CorpusReader):
     """Corpus Reader for CSV datasets.
@@ -47,11 +54,212 @@ class CSVCorpusReader(CorpusReader):
                     return
                 yield row
 
+    def read_columns(self, columns, limit=0, byte_range=None):
+        """Read only some columns of the corpus, as tuples.
+
+        This is faster than `all_instances`: rows are not turned into
+        dictionaries, and the file is read with a large buffer.
+
+        Args:
+            columns (tuple): The names of the columns to read (e.g.
+                `('language', 'text')`).
+            limit (int): The maximum number of rows to return.
+            byte_range (tuple): If given, only read the rows in this
+                `(start, end)` range of bytes (see `byte_ranges`).
+
+        Yields:
+            A tuple for each row, with the values of `columns` in the same
+            order.
+
+        Raises:
+            ValueError: If a column is not in the corpus.
+
+        """
+        if not limit:
+            limit = sys.maxsize
+        if byte_range is None:
+            with open(self.corpus_path, 'r', newline='',
+                      buffering=BUFFER_SIZE) as input_file:
+                reader = csv.reader(input_file, delimiter=self.delimiter)
+                yield from self._project(reader, next(reader, []), columns, limit)
+            return
+        encoding = locale.getpreferredencoding(False)
+        start, end = byte_range
+        with open(self.corpus_path, 'rb', buffering=BUFFER_SIZE) as input_file:
+            header = next(csv.reader(
+                [input_file.readline().decode(encoding)],
+                delimiter=self.delimiter))
+            yield from self._project(
+                csv.reader(self._lines_in_range(input_file, encoding, start, end),
+                           delimiter=self.delimiter),
+                header, columns, limit)
+
+    def column_chunks(self, columns, chunk_size=10000, limit=0):
+        """Read only some columns of the corpus, in chunks of rows.
+
+        Yields:
+            Lists of (at most) `chunk_size` tuples (see `read_columns`).
+
+        """
+        return utils.chunks(self.read_columns(columns, limit), chunk_size)
+
+    def byte_ranges(self, count):
+        """Split the corpus into (at most) `count` ranges of bytes.
+
+        Ranges have roughly the same size and never split a record, even when
+        a quoted field spans several lines: boundaries are found by parsing
+        the records (see `read_records`). Each range can be read separately
+        (e.g. by a different process) using `instances_in_range`.
+
+        Args:
+            count (int): The number of ranges.
+
+        Returns:
+            A list of `(start, end)` byte offsets. The header is excluded.
+
+        """
+        encoding = locale.getpreferredencoding(False)
+        with open(self.corpus_path, 'rb', buffering=BUFFER_SIZE) as input_file:
+            input_file.readline() # Skip header
+            data_start = input_file.tell()
+            size = os.fstat(input_file.fileno()).st_size
+            boundaries = [data_start]
+            targets = iter([data_start + (size - data_start) * i // count
+                            for i in range(1, count)])
+            target = next(targets, None)
+            # Records are parsed from the beginning: a quote character only
+            # starts a quoted field at the beginning of a field
+            for start, _ in read_records(input_file, self.delimiter, encoding):
+                if target is None:
+                    break
+                if start >= target and start > boundaries[-1]:
+                    boundaries.append(start)
+                    while target is not None and target <= start:
+                        target = next(targets, None)
+        boundaries.append(size)
+        return [(start, end)
+                for start, end in zip(boundaries, boundaries[1:]) if start < end]
+
+    def instances_in_range(self, start, end):
+        """Read the instances in a range of bytes of the corpus.
+
+        Args:
+            start (int): The offset of the first byte of the range. It must be
+                the beginning of a record (see `byte_ranges`).
+            end (int): The offset of the first byte after the range.
+
+        Yields:
+            A generator of corpus instances (dictionaries).
+
+        """
+        encoding = locale.getpreferredencoding(False)
+        with open(self.corpus_path, 'rb') as input_file:
+            fieldnames = next(csv.reader(
+                [input_file.readline().decode(encoding)],
+                delimiter=self.delimiter))
+            yield from csv.DictReader(
+                self._lines_in_range(input_file, encoding, start, end),
+                fieldnames=fieldnames, delimiter=self.delimiter)
+
     # Private methods #
 
+    def _project(self, reader, header, columns, limit):
+        """Yield tuples with the values of `columns` in the rows of `reader`."""
+        missing_columns = [column for column in columns if column not in header]
+        if missing_columns:
+            raise ValueError('Columns not in corpus: {}'.format(
+                ', '.join(missing_columns)))
+        getter = itemgetter(*[header.index(column) for column in columns])
+        single_column = len(columns) == 1
+        count = 0
+        for row in reader:
+            if not row: # Skip empty lines, like `DictReader`
+                continue
+            if count >= limit:
+                return
+            count += 1
+            if len(row) < len(header): # Missing values are `None`, as well
+                row += [None] * (len(header) - len(row))
+            values = getter(row)
+            yield (values,) if single_column else values
+
+    def _lines_in_range(self, input_file, encoding, start, end):
+        """Return an iterator over the decoded lines in a range of bytes."""
+        input_file.seek(start)
+        return LineReader(input_file, encoding, end)
+
     def _has_header(self, input_stream):
         """Find out if the file has a header."""
         sniffer = csv.Sniffer()
         has_header = sniffer.has_header(input_stream.readline())
         input_stream.seek(0) # Go back to beginning of file
         return has_header
+
+
+class LineReader(object):
+    """Iterate over the decoded lines of a binary file, keeping track of offsets.
+
+    A `csv.reader` reading from a `LineReader` never reads ahead, so the
+    offset of the first byte after the last record is always known (see
+    `read_records`). The underlying file can be moved with `seek` between two
+    records.
+
+    Args:
+        input_file: A file opened in binary mode, at the beginning of a line.
+        encoding (str): The encoding of the file.
+        end (int): If given, lines starting at or after this offset are not
+            read.
+
+    Attributes:
+        position (int): The offset of the first byte after the lines read.
+
+    """
+
+    def __init__(self, input_file, encoding, end=None):
+        self.input_file = input_file
+        self.encoding = encoding
+        self.end = end
+        self.position = input_file.tell()
+
+    def seek(self, offset):
+        """Move to `offset`, which must be the beginning of a line."""
+        self.input_file.seek(offset)
+        self.position = offset
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.end is not None and self.position >= self.end:
+            raise StopIteration
+        line = self.input_file.readline()
+        if not line:
+            raise StopIteration
+        self.position += len(line)
+        return line.decode(self.encoding)
+
+
+def read_records(input_file, delimiter, encoding, end=None):
+    """Read the records of a binary CSV file, with their offsets.
+
+    Records are parsed with the rules of the `csv` module (the same as
+    `CSVCorpusReader.all_instances`), so quoted fields can span several lines
+    and quote characters inside unquoted fields are kept as they are.
+
+    Args:
+        input_file: A file opened in binary mode, at the beginning of a record.
+        delimiter (str): The character that separates the CSV columns.
+        encoding (str): The encoding of the file.
+        end (int): If given, records starting at or after this offset are not
+            read.
+
+    Yields:
+        A `(offset, fields)` tuple for each record, where `offset` is the
+        offset of its first byte. Fields are empty for blank lines.
+
+    """
+    lines = LineReader(input_file, encoding, end)
+    start = lines.position
+    for fields in csv.reader(lines, delimiter=delimiter):
+        yield start, fields
+        start = lines.position
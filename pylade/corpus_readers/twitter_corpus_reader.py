@@ -21,10 +21,15 @@ Original Twitter data:
 """
 
 from collections import defaultdict
-
+import csv
+import heapq
+import locale
+from operator import itemgetter
+import random
 import sys
 
-from .csv_corpus_reader import CSVCorpusReader
+from . import corpus_index
+from .csv_corpus_reader import BUFFER_SIZE, CSVCorpusReader, LineReader
 
 # AVAILABLE_LANGUAGES = set({
 #     'ar', 'ar_LATN', 'az', 'bg', 'bn', 'bs', 'ca', 'cs', 'cy', 'da', 'de', 'dv',
@@ -39,15 +44,28 @@ from .csv_corpus_reader import CSVCorpusReader
 class TwitterCorpusReader(CSVCorpusReader):
     """Corpus Reader for custom Twitter corpus.
 
+    With `use_index`, the byte offsets of the tweets of each language are
+    indexed the first time they are needed (see `corpus_index`). The index is
+    saved next to the corpus and rebuilt only when the corpus changes, so
+    language statistics do not read the corpus, and tweets with specific
+    languages are read without scanning the other ones.
+
     Attributes:
         corpus_path (str): A path leading to a CSV corpus file.
         delimiter (str): The character that separates the CSV corpus columns.
+        use_index (bool): Whether to use a sidecar index of languages.
+        index_path (str): The path of the index file. Defaults to the corpus
+            path followed by `corpus_index.INDEX_SUFFIX`.
 
     """
 
-    def __init__(self, corpus_path, delimiter='|'):
+    def __init__(self, corpus_path, delimiter='|', use_index=False,
+                 index_path=None):
         super().__init__(corpus_path, delimiter)
+        self.use_index = use_index
+        self.index_path = index_path
         self._available_languages = None
+        self._index = None
 
     @property
     def available_languages(self):
@@ -62,6 +80,19 @@ class TwitterCorpusReader(CSVCorpusReader):
 
         return self._available_languages
 
+    def language_index(self):
+        """Return the index of the corpus, loading or building it if needed.
+
+        Returns:
+            A dictionary mapping each language to an array with the byte
+            offsets of its tweets.
+
+        """
+        if self._index is None:
+            self._index = corpus_index.load_or_build_index(
+                self.corpus_path, self.delimiter, 'language', self.index_path)
+        return self._index
+
     def tweets_with_language(self, languages, limit=0):
         """Retrieve tweets with specific languages from the corpus.
 
@@ -76,6 +107,13 @@ class TwitterCorpusReader(CSVCorpusReader):
         if not limit:
             limit = sys.maxsize
 
+        if self.use_index:
+            index = self.language_index()
+            offsets = heapq.merge(*[index[language] for language in
+                                    set(languages) if language in index])
+            yield from self._instances_at(offsets, limit)
+            return
+
         i = 0
         for tweet in self.all_instances():
             if tweet['language'] in languages:
@@ -85,6 +123,64 @@ class TwitterCorpusReader(CSVCorpusReader):
             if i >= limit:
                 return
 
+    def language_columns(self, languages, columns, limit=0):
+        """Read only some columns of the tweets with specific languages.
+
+        Args:
+            languages (list): A list of language labels used to filter tweets.
+            columns (tuple): The names of the columns to read (see
+                `read_columns`).
+            limit (int): The maximum number of tweets to return.
+
+        Yields:
+            A tuple for each tweet, with the values of `columns`.
+
+        """
+        if self.use_index:
+            getter = itemgetter(*columns)
+            for tweet in self.tweets_with_language(languages, limit):
+                values = getter(tweet)
+                yield (values,) if len(columns) == 1 else values
+            return
+        if not limit:
+            limit = sys.maxsize
+        # Read the language as well, to filter tweets
+        rows = self.read_columns(tuple(columns) + ('language',))
+        count = 0
+        for row in rows:
+            if row[-1] in languages:
+                if count >= limit:
+                    return
+                count += 1
+                yield row[:-1]
+
+    def sample_tweets(self, languages, count, seed=None):
+        """Retrieve a random sample of the tweets with specific languages.
+
+        With an index, only the sampled tweets are read.
+
+        Args:
+            languages (list): A list of language labels used to filter tweets.
+            count (int): The number of tweets in the sample. Every tweet is
+                returned if there are not enough of them.
+            seed: The seed of the random number generator.
+
+        Returns:
+            A list of tweets, in the same order as in the corpus.
+
+        """
+        generator = random.Random(seed)
+        if self.use_index:
+            index = self.language_index()
+            offsets = [offset for language in set(languages) if language in index
+                       for offset in index[language]]
+            offsets = sorted(generator.sample(offsets, min(count, len(offsets))))
+            return list(self._instances_at(offsets))
+        tweets = list(self.tweets_with_language(languages))
+        positions = sorted(generator.sample(range(len(tweets)),
+                                            min(count, len(tweets))))
+        return [tweets[position] for position in positions]
+
     def languages_tweets_stats(self):
         """
         Return a defaultdict containing the number of tweets for each
@@ -93,8 +189,47 @@ class TwitterCorpusReader(CSVCorpusReader):
             defaultdict(int, {'en': 200, 'it': 140})
 
         """
+        if self.use_index:
+            return defaultdict(int, {
+                language: len(offsets)
+                for language, offsets in self.language_index().items()})
         languages_tweets_stats = defaultdict(int)
         for tweet in self.all_instances():
             lang = tweet['language']
             languages_tweets_stats[lang] += 1
         return languages_tweets_stats
+
+    # Private methods #
+
+    def _instances_at(self, offsets, limit=0):
+        """Read the tweets starting at the given byte offsets.
+
+        Args:
+            offsets (iterable): Byte offsets in increasing order. Near offsets
+                are read from the same buffer, without new system calls.
+            limit (int): The maximum number of tweets to return.
+
+        Yields:
+            A generator of tweets (dictionaries).
+
+        """
+        if not limit:
+            limit = sys.maxsize
+        encoding = locale.getpreferredencoding(False)
+        with open(self.corpus_path, 'rb', buffering=BUFFER_SIZE) as input_file:
+            fieldnames = next(csv.reader(
+                [input_file.readline().decode(encoding)],
+                delimiter=self.delimiter))
+
+            lines = LineReader(input_file, encoding)
+            reader = csv.DictReader(
+                lines, fieldnames=fieldnames, delimiter=self.delimiter)
+            for count, offset in enumerate(offsets):
+                if count >= limit:
+                    return
+                # The reader never reads ahead, so it can start from any record
+                lines.seek(offset)
+                tweet = next(reader, None)
+                if tweet is None:
+                    return
+                yield tweet
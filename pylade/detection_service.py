@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Language detection with a model loaded once.
+
+A `DetectionService` keeps an implementation and its (compiled) model in
+memory. It is used by the detection server (see `pylade.server`) and by the
+streaming mode of the `pylade` script.
+
+"""
+
+from collections import deque
+from itertools import chain
+import os
+
+from pylade import utils
+
+
+class DetectionService(object):
+    """Detect languages using a model loaded once.
+
+    Args:
+        implementation: An implementation instance (e.g. `CavnarTrenkleImpl`).
+        model: The model used for prediction, or the path of a model file.
+        prediction_arguments (dict): Keyword arguments for the prediction
+            methods of `implementation` (e.g. `{'error_value': 8000}`).
+        workers (int): The number of processes used to detect languages. When
+            greater than 1, each process loads the model once when it starts,
+            and batches are split among processes.
+        batch_size (int): The number of texts sent to each worker process, or
+            predicted together when streaming.
+
+    """
+
+    def __init__(self, implementation, model, prediction_arguments=None,
+                 workers=1, batch_size=256):
+        if isinstance(model, str):
+            model = utils.load_file(model)
+        if hasattr(implementation, 'compile_model'):
+            model = implementation.compile_model(model)
+        self.implementation = implementation
+        self.model = model
+        self.prediction_arguments = prediction_arguments or {}
+        self.workers = workers
+        self.batch_size = batch_size
+        self._executor = None
+        # The last cache statistics of each worker process, by process id
+        self._worker_stats = dict()
+        if workers > 1:
+            # Imported here, since it loads `multiprocessing`
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker,
+                initargs=(implementation, _model_source(model),
+                          self.prediction_arguments))
+
+    def detect(self, text):
+        """Detect the language of a single text."""
+        if self._executor is not None:
+            return self._collect(
+                self._executor.submit(_detect_in_worker, [text]).result())[0]
+        return self.implementation.predict_language(
+            text, self.model, **self.prediction_arguments)
+
+    def detect_batch(self, texts):
+        """Detect the languages of many texts.
+
+        Returns:
+            A list of language labels, in the same order as `texts`.
+
+        """
+        if self._executor is not None:
+            return [language
+                    for batch in map(self._collect, self._executor.map(
+                        _detect_in_worker, utils.chunks(texts, self.batch_size)))
+                    for language in batch]
+        return _predict_batch(
+            self.implementation, self.model, texts, self.prediction_arguments)
+
+    def detect_stream(self, texts):
+        """Detect the languages of a stream of texts.
+
+        `texts` is consumed lazily, one batch at a time. Memory usage does not
+        depend on the number of texts: with worker processes, at most twice as
+        many batches as workers are pending at any time.
+
+        Args:
+            texts (iterable): The texts, e.g. the lines of a file.
+
+        Yields:
+            A language label for each text, in the same order as `texts`.
+
+        """
+        batches = utils.chunks(texts, self.batch_size)
+        if self._executor is None:
+            return chain.from_iterable(
+                _predict_batch(self.implementation, self.model, batch,
+                               self.prediction_arguments)
+                for batch in batches)
+        return chain.from_iterable(self._map_bounded(batches))
+
+    def stats(self):
+        """Return the statistics of the prediction cache, if any.
+
+        With worker processes, each process has its own cache: the statistics
+        of all caches are summed, as of the last batch of each process, and
+        `workers` is the number of processes which reported them.
+
+        """
+        prediction_cache = getattr(self.implementation, 'prediction_cache', None)
+        if prediction_cache is None:
+            return {}
+        if self._executor is None:
+            return {'cache': prediction_cache.stats()}
+        worker_stats = list(self._worker_stats.values())
+        return {'cache': {name: sum(stats[name] for stats in worker_stats)
+                          for name in prediction_cache.stats()},
+                'workers': len(worker_stats)}
+
+    def close(self):
+        """Shut down the worker processes, if any."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    # Private methods #
+
+    def _collect(self, result):
+        """Keep the cache statistics of a worker result, and return its predictions."""
+        process_id, predictions, stats = result
+        if stats is not None:
+            self._worker_stats[process_id] = stats
+        return predictions
+
+    def _map_bounded(self, batches):
+        """Like `utils.parallel_map`, but using the pool of the service."""
+        pending = deque()
+        for batch in batches:
+            pending.append(self._executor.submit(_detect_in_worker, batch))
+            if len(pending) >= 2 * self.workers:
+                yield self._collect(pending.popleft().result())
+        while pending:
+            yield self._collect(pending.popleft().result())
+
+
+def create_implementation(implementation_class, cache_size=None, cache_ttl=None,
+                          instrumentation=None, engine=None):
+    """Instantiate an implementation, with a prediction cache if requested.
+
+    Args:
+        implementation_class (type): The implementation class. It must accept
+            a `prediction_cache` argument if `cache_size` is given, and an
+            `engine` argument if `engine` is given.
+        cache_size (int): The maximum number of cached predictions. No cache is
+            used if `None`.
+        cache_ttl (float): The number of seconds after which cached
+            predictions expire.
+        instrumentation (Instrumentation): If given, passed to the
+            implementation to record timings and counters (see
+            `pylade.instrumentation`).
+        engine (str): The scoring engine (e.g. 'numpy'). The default one of
+            the implementation is used if `None`.
+
+    """
+    implementation_arguments = dict()
+    if engine is not None:
+        implementation_arguments['engine'] = engine
+    if instrumentation is not None:
+        implementation_arguments['instrumentation'] = instrumentation
+    if cache_size:
+        from pylade.implementations.prediction_cache import PredictionCache
+        implementation_arguments['prediction_cache'] = PredictionCache(
+            cache_size, cache_ttl)
+    return implementation_class(**implementation_arguments)
+
+
+# Private functions
+
+def _model_source(model):
+    """Return a picklable version of `model`, to be sent to worker processes.
+
+    Binary models are sent as the path of their file, so that worker processes
+    map the same file instead of copying the model (see
+    `CompiledModel.source`).
+
+    """
+    return model.source() if hasattr(model, 'source') else model
+
+def _predict_batch(implementation, model, texts, prediction_arguments):
+    if hasattr(implementation, 'predict_languages'):
+        return list(implementation.predict_languages(
+            texts, model, **prediction_arguments))
+    return [implementation.predict_language(text, model, **prediction_arguments)
+            for text in texts]
+
+
+# Process pool workers #
+
+# Implementation, model and prediction arguments of the current worker process
+_worker = None
+
+def _init_worker(implementation, model, prediction_arguments):
+    """Load and compile the model once, when a worker process starts."""
+    global _worker
+    if isinstance(model, str): # The path of a binary model file
+        model = utils.load_file(model)
+    if hasattr(implementation, 'compile_model'):
+        model = implementation.compile_model(model)
+    _worker = (implementation, model, prediction_arguments)
+
+def _detect_in_worker(texts):
+    """Predict a batch, returning the cache statistics of the process with it."""
+    implementation, model, prediction_arguments = _worker
+    prediction_cache = getattr(implementation, 'prediction_cache', None)
+    predictions = _predict_batch(implementation, model, texts, prediction_arguments)
+    return (os.getpid(), predictions,
+            None if prediction_cache is None else prediction_cache.stats())
@@ -1 +1,4 @@
 from pylade.implementations.cavnar_trenkle_impl import CavnarTrenkleImpl
+from pylade.implementations.compiled_model import CompiledModel, RankedProfile
+from pylade.implementations.confusion_matrix import ConfusionMatrix
+from pylade.implementations.prediction_cache import PredictionCache
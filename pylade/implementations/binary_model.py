@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Compact binary model format (`.pylade` files).
+
+A binary model stores a string table with all the ngrams of the model (the
+vocabulary), the ngrams of each language profile as arrays of vocabulary ids,
+and a `languages x vocabulary` rank matrix (see `RankMatrixModel`). The file is
+memory-mapped when loaded: arrays are used in place, without copies.
+
+Only the 'numpy' engine scores against the mapped rank matrix, so processes
+using it with the same model on one host share its memory pages (the ngram
+vocabulary is still decoded into a dictionary by each process, see
+`MappedModel.decode_vocabulary`). Worker processes receive the path of the
+file, and map it themselves (see `CompiledModel.source`). The 'python' and 'pruned' engines decode
+each profile they use into per-process dictionaries (see `RankedProfile`).
+
+Layout (little-endian):
+
+    magic           8 bytes, `MAGIC`
+    header          number of languages (uint32), vocabulary size (uint32),
+                    size of the string table (uint64)
+    languages       for each language: label size (uint16), UTF-8 label,
+                    profile size (uint32)
+    string offsets  uint64[vocabulary size + 1]
+    string table    UTF-8 ngrams, one after the other
+    profiles        int32 vocabulary ids, for each language, in rank order
+    rank matrix     int32[languages][vocabulary size + 1]
+
+Each array starts at an offset which is a multiple of 8 bytes.
+
+"""
+
+from array import array
+from collections.abc import Mapping
+import mmap
+import struct
+import sys
+
+from .compiled_model import CompiledModel, RankedProfile
+
+MAGIC = b'PYLADE\x00\x01'
+MISSING_RANK = -1
+
+_HEADER = struct.Struct('<IIQ')
+_LABEL_SIZE = struct.Struct('<H')
+_PROFILE_SIZE = struct.Struct('<I')
+
+
+def save_binary_model(training_profiles, output_file_path):
+    """Save a model in the binary format.
+
+    Args:
+        training_profiles (dict): A dictionary whose keys are language labels
+            and whose values are lists of ngrams sorted by frequency (or a
+            `CompiledModel`).
+        output_file_path (str): The path of the output file.
+
+    """
+    model = CompiledModel.compile(training_profiles)
+    languages = list(model)
+    vocabulary = dict()
+    for language in languages:
+        for ngram in model[language].ranks:
+            vocabulary.setdefault(ngram, len(vocabulary))
+
+    encoded_ngrams = [ngram.encode('utf-8') for ngram in vocabulary]
+    string_offsets = array('Q', [0])
+    for encoded_ngram in encoded_ngrams:
+        string_offsets.append(string_offsets[-1] + len(encoded_ngram))
+
+    profiles = array('i')
+    rank_matrix = array('i')
+    for language in languages:
+        profile = model[language]
+        profiles.extend(vocabulary[ngram] for ngram in profile)
+        row = array('i', [MISSING_RANK]) * (len(vocabulary) + 1)
+        for ngram, rank in profile.ranks.items():
+            row[vocabulary[ngram]] = rank
+        rank_matrix.extend(row)
+
+    with open(output_file_path, 'wb') as output_file:
+        output_file.write(MAGIC)
+        output_file.write(_HEADER.pack(
+            len(languages), len(vocabulary), string_offsets[-1]))
+        for language in languages:
+            label = language.encode('utf-8')
+            output_file.write(_LABEL_SIZE.pack(len(label)))
+            output_file.write(label)
+            output_file.write(_PROFILE_SIZE.pack(len(model[language])))
+        _write_array(output_file, string_offsets)
+        _pad(output_file)
+        output_file.write(b''.join(encoded_ngrams))
+        _write_array(output_file, profiles)
+        _write_array(output_file, rank_matrix)
+
+def load_binary_model(file_path):
+    """Memory-map a binary model.
+
+    Args:
+        file_path (str): The path of a file written by `save_binary_model`.
+
+    Returns:
+        A `MappedModel`.
+
+    Raises:
+        ValueError: If the file is not a binary model.
+
+    """
+    with open(file_path, 'rb') as input_file:
+        buffer = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+    return MappedModel(buffer, file_path)
+
+
+class MappedModel(CompiledModel):
+    """A compiled model backed by a memory-mapped binary model file.
+
+    Profiles are decoded from the file only when they are accessed. The
+    'numpy' engine uses the rank matrix in place (see `RankMatrixModel`).
+
+    Attributes:
+        languages (list): The language labels.
+        vocabulary_size (int): The number of distinct ngrams in the model.
+        rank_matrix (memoryview): The ranks of each ngram (column) in each
+            language profile (row), as a flat int32 array.
+
+    """
+
+    def __init__(self, buffer, path=None):
+        # Profiles are not compiled here: see `_LazyProfiles`
+        self.path = path
+        self._buffer = buffer
+        view = memoryview(buffer)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError('Not a pylade binary model.')
+        offset = len(MAGIC)
+        n_languages, self.vocabulary_size, strings_size = _HEADER.unpack_from(
+            view, offset)
+        offset += _HEADER.size
+
+        self.languages = []
+        profile_sizes = []
+        for _ in range(n_languages):
+            label_size, = _LABEL_SIZE.unpack_from(view, offset)
+            offset += _LABEL_SIZE.size
+            self.languages.append(
+                bytes(view[offset:offset + label_size]).decode('utf-8'))
+            offset += label_size
+            profile_size, = _PROFILE_SIZE.unpack_from(view, offset)
+            profile_sizes.append(profile_size)
+            offset += _PROFILE_SIZE.size
+
+        self._string_offsets, offset = _read_array(
+            view, _aligned(offset), 'Q', self.vocabulary_size + 1)
+        offset = _aligned(offset)
+        self._strings = view[offset:offset + strings_size]
+        offset += strings_size
+
+        self._profile_ids = dict()
+        offset = _aligned(offset)
+        for language, profile_size in zip(self.languages, profile_sizes):
+            self._profile_ids[language], offset = _read_array(
+                view, offset, 'i', profile_size)
+        self.rank_matrix, offset = _read_array(
+            view, _aligned(offset), 'i',
+            n_languages * (self.vocabulary_size + 1))
+        self._profiles = _LazyProfiles(self)
+
+    def ngram(self, ngram_id):
+        """Decode the ngram with id `ngram_id` from the string table."""
+        start, end = self._string_offsets[ngram_id:ngram_id + 2]
+        return bytes(self._strings[start:end]).decode('utf-8')
+
+    def decode_vocabulary(self):
+        """Decode the string table.
+
+        Returns:
+            A dictionary mapping each ngram to its id (i.e. its column in the
+            rank matrix).
+
+        """
+        strings = bytes(self._strings)
+        offsets = self._string_offsets.tolist()
+        return {strings[start:end].decode('utf-8'): ngram_id
+                for ngram_id, (start, end) in enumerate(zip(offsets, offsets[1:]))}
+
+    def profile_ids(self, language):
+        """Return the vocabulary ids of the profile of `language`."""
+        return self._profile_ids[language]
+
+    def subset(self, languages):
+        """Return a `CompiledModel` restricted to some languages."""
+        return CompiledModel({language: self[language] for language in self.languages
+                              if language in languages})
+
+
+class _LazyProfiles(Mapping):
+    """Decode and index the profiles of a `MappedModel` on first access."""
+
+    def __init__(self, mapped_model):
+        self._mapped_model = mapped_model
+        self._decoded = dict()
+
+    def __getitem__(self, language):
+        profile = self._decoded.get(language)
+        if profile is None:
+            ids = self._mapped_model.profile_ids(language) # KeyError if missing
+            ngram = self._mapped_model.ngram
+            profile = RankedProfile([ngram(ngram_id) for ngram_id in ids])
+            self._decoded[language] = profile
+        return profile
+
+    def __iter__(self):
+        return iter(self._mapped_model.languages)
+
+    def __len__(self):
+        return len(self._mapped_model.languages)
+
+
+# Private functions
+
+def _aligned(offset):
+    return (offset + 7) // 8 * 8
+
+def _pad(output_file):
+    output_file.write(b'\x00' * (_aligned(output_file.tell()) - output_file.tell()))
+
+def _write_array(output_file, values):
+    _pad(output_file)
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    values.tofile(output_file)
+
+def _read_array(view, offset, typecode, length):
+    """Return a (zero-copy) view of an array in the buffer, and its end."""
+    end = offset + length * array(typecode).itemsize
+    if sys.byteorder == 'big':
+        values = array(typecode, bytes(view[offset:end]))
+        values.byteswap()
+        return memoryview(values), end
+    return view[offset:end].cast(typecode), end
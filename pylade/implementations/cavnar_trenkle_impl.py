@@ -3,30 +3,163 @@
 from __future__ import division # Safety measure in case we extend to py2.7
 
 from collections import defaultdict
-import sys
-
-from nltk.tokenize import wordpunct_tokenize
-from nltk.util import ngrams
+import heapq
+import importlib
+import itertools
+import math
 
 from pylade import utils
+from pylade.progress import ProgressReporter
+from .compiled_model import RankedProfile, out_of_place_distance
+from .confusion_matrix import ConfusionMatrix
+from .frequency_sketch import SpaceSavingSketch
 from .implementation import Implementation
+from .ngram_counts import NgramCounts
+from .ngrams import DEFAULT_NGRAM_RANGE, extract_ngram_freqs
+from .scripts import ScriptFilter
+from .tokenizers import get_tokenizer
+
+# Available scoring engines: name -> (module, compiled model class)
+ENGINES = {
+    'python': ('pylade.implementations.compiled_model', 'CompiledModel'),
+    'numpy': ('pylade.implementations.rank_matrix_model', 'RankMatrixModel'),
+    'pruned': ('pylade.implementations.compiled_model', 'PrunedModel'),
+}
+
+# Columns read from corpus readers supporting `read_columns`
+LABELED_TEXT_COLUMNS = ('language', 'text')
+
+# Scoring methods of compiled models taking a single text profile
+_SINGLE_PROFILE_METHODS = ('nearest_language', 'distances')
 
 
 # TODO: Store instance variables (e.g. model)
 class CavnarTrenkleImpl(Implementation):
-    """Cavnar Trenkle implementation class."""
+    """Cavnar Trenkle implementation class.
+
+    Args:
+        engine (str): The scoring engine used to compute distances between
+            profiles. `'python'` (default) uses a hash index for each language
+            profile. `'numpy'` compiles the model into a rank matrix and scores
+            all languages at once (it requires NumPy). `'pruned'` stops scoring
+            a language once its distance exceeds the best one found so far.
+        ngram_range (tuple): The minimum and maximum length of the ngrams
+            extracted from texts (both included). Training and prediction
+            should use the same range.
+        tokenizer (str): The name of the tokenizer used to split texts (see
+            `pylade.implementations.tokenizers.TOKENIZERS`). The default
+            `'wordpunct'` tokenizer gives the same tokens as NLTK's
+            `wordpunct_tokenize` (available as `'nltk'`), without importing
+            NLTK.
+        script_prefilter (bool): If `True`, texts are scored only against the
+            languages whose training profiles use the same Unicode scripts as
+            the text (see `pylade.implementations.scripts.ScriptFilter`).
+        prediction_cache (PredictionCache): If given, predictions are cached
+            by normalized text (lowercased tokens) and error value. The cache
+            is cleared whenever a different model is compiled.
+        reporter (ProgressReporter): Reports the progress of training and
+            evaluation, and counts processed instances. Defaults to a
+            `ProgressReporter` which only writes to a terminal.
+        instrumentation (Instrumentation): If given, the time spent in each
+            stage (`compile`, `tokenize`, `extract_ngrams`, `rank_profile`,
+            `score`) and counters (`texts`, `ngrams`, `cache_hits`,
+            `cache_misses`, `languages_scored`) are recorded (see
+            `pylade.instrumentation`).
+
+    """
+
+    def __init__(self, engine='python', ngram_range=DEFAULT_NGRAM_RANGE,
+                 tokenizer='wordpunct', script_prefilter=False,
+                 prediction_cache=None, reporter=None, instrumentation=None):
+        if engine not in ENGINES:
+            raise ValueError('Unknown engine {!r}. Available engines: {}'.format(
+                engine, ', '.join(sorted(ENGINES))))
+        self.engine = engine
+        self.ngram_range = tuple(ngram_range)
+        self.tokenizer = tokenizer
+        self._tokenize = get_tokenizer(tokenizer)
+        self.script_prefilter = script_prefilter
+        self.prediction_cache = prediction_cache
+        self.reporter = ProgressReporter() if reporter is None else reporter
+        self.instrumentation = instrumentation
+        # Last compiled model, along with the profiles it was compiled from
+        self._compiled_model_cache = (None, None)
+        # Script filter of the last compiled model
+        self._script_filter_cache = (None, None)
+        # Accuracy of the last approximate training (see `train`)
+        self.approximation_report = None
+        # Ngram counts of the last training (see `train` and `update`)
+        self.ngram_counts = None
+
+    def __getstate__(self):
+        # Implementations are sent to worker processes: leave caches out
+        state = self.__dict__.copy()
+        state['_compiled_model_cache'] = (None, None)
+        state['_script_filter_cache'] = (None, None)
+        state['ngram_counts'] = None
+        state['instrumentation'] = None # Only the main process is measured
+        return state
+
+    def compile_model(self, training_profiles):
+        """Build an indexed version of a model, to be used for prediction.
+
+        Compiling is done once per model: calling this method again with the
+        same `training_profiles` object returns the cached compiled model.
 
-    def train(self, labeled_instances, limit=None, verbose=False):
+        Args:
+            training_profiles (dict): A dictionary whose keys are language
+                labels. Each value is a list of 'ngrams' sorted by frequency.
+
+        Returns:
+            A `CompiledModel` whose profiles map each ngram to its rank. Its
+            actual class depends on the chosen `engine`.
+
+        """
+        source, compiled_model = self._compiled_model_cache
+        if source is not training_profiles:
+            module_name, class_name = ENGINES[self.engine]
+            model_class = getattr(importlib.import_module(module_name), class_name)
+            if self.instrumentation is None:
+                compiled_model = model_class.compile(training_profiles)
+            else:
+                with self.instrumentation.timer('compile'):
+                    compiled_model = model_class.compile(training_profiles)
+            self._compiled_model_cache = (training_profiles, compiled_model)
+            if self.prediction_cache is not None:
+                self.prediction_cache.clear()
+        return compiled_model
+
+    def train(self, labeled_instances, limit=None, verbose=False, workers=1,
+              approximate=False, sketch_factor=4, keep_counts=False):
         """Train the model.
 
         Args:
             labeled_instances (iterable): An iterable whose elements are
                 dictionaries. These dictionaries must have `text` and `language`
-                keys with their relative values.
+                keys with their relative values. It can also be a corpus reader.
+                Readers which support `read_columns` (e.g. `CSVCorpusReader`)
+                only read the `language` and `text` columns. Readers which
+                support `byte_ranges` let each worker process read its own range
+                of the corpus file, when training with several `workers`.
             limit (int): The number of entries in the training language
                 profiles. Less entries make training faster, but it is better
                 to keep a balance between speed and accuracy.
             verbose (bool): If `True`, print information about training.
+            workers (int): The number of processes used to count ngrams. Each
+                process counts ngrams on a shard of the corpus, and partial
+                counts are summed afterwards.
+            approximate (bool): If `True`, count ngrams with a bounded amount
+                of memory for each language (see `SpaceSavingSketch`) instead
+                of keeping a counter for every distinct ngram. It requires a
+                `limit`. After training, `approximation_report` contains, for
+                each language, the maximum error of the counts and the number
+                of profile entries which are guaranteed to be exact.
+            sketch_factor (int): When training approximately, the number of
+                counters kept for each language is `sketch_factor * limit`.
+                Larger values use more memory and give more accurate profiles.
+            keep_counts (bool): If `True`, keep the ngram counts of each
+                language in `ngram_counts` (a `NgramCounts` object, which can be
+                saved to a file). They are needed to `update` the model.
 
         Returns:
             A list of language profiles.
@@ -40,25 +173,111 @@ class CavnarTrenkleImpl(Implementation):
         if verbose:
             print("Training. Limit: {}".format(limit))
 
+        sketch_size = None
+        if approximate:
+            if not limit:
+                raise ValueError('Approximate training requires a limit.')
+            sketch_size = sketch_factor * limit
+
         language_profiles = dict()
-        languages_ngram_freqs = self._languages_ngram_frequencies(labeled_instances)
-        print("Sorting language profiles in lists")
+        languages_ngram_freqs = self._count_ngrams(
+            labeled_instances, workers, sketch_size)
+        self.reporter.start('rank', total=len(languages_ngram_freqs))
         for language in languages_ngram_freqs:
             language_profiles[language] = self._compute_profile_from_frequencies(
                 languages_ngram_freqs[language], limit)
+            self.reporter.advance()
+        self.reporter.finish()
+
+        if approximate:
+            self.approximation_report = {
+                language: {
+                    'error_bound': sketch.error_bound,
+                    'guaranteed_entries': sketch.guaranteed_entries(limit),
+                    'profile_size': len(language_profiles[language])}
+                for language, sketch in languages_ngram_freqs.items()}
+            if verbose:
+                for language, report in sorted(self.approximation_report.items()):
+                    print("{}: {}".format(language, report))
+        self.ngram_counts = (
+            NgramCounts(languages_ngram_freqs, limit, self.ngram_range,
+                        self.tokenizer)
+            if keep_counts else None)
+        return language_profiles
+
+    def update(self, labeled_instances, training_profiles, ngram_counts=None,
+               workers=1):
+        """Update a model with new training instances.
+
+        The ngrams of the new instances are counted and added to the counts of
+        the previous training. Only the profiles of the languages of the new
+        instances are ranked again. With exact counts, updating a model gives
+        the same profiles as training it again on the whole corpus. With
+        approximate counts (see the `approximate` argument of `train`), the
+        merged sketches only guarantee their error bound, so profiles may
+        differ from those of a new training.
+
+        Args:
+            labeled_instances (iterable): The new training instances (see
+                `train`). They can belong to new languages.
+            training_profiles (dict): The model to be updated.
+            ngram_counts (NgramCounts): The counts of the previous training
+                (e.g. loaded with `NgramCounts.load`). Defaults to the counts
+                kept by the last call to `train` or `update`. They are updated
+                in place.
+            workers (int): The number of processes used to count ngrams.
+
+        Returns:
+            The updated model.
+
+        Raises:
+            ValueError: If no counts are available, or if they were made with
+                another `ngram_range` or `tokenizer`.
+
+        >>> implementation = CavnarTrenkleImpl()
+        >>> model = implementation.train(
+        ...     [{'language': 'en', 'text': 'ab'}], keep_counts=True)
+        >>> implementation.update([{'language': 'it', 'text': 'cc'}], model)
+        {'en': ['b', 'ab', 'a'], 'it': ['c', 'cc']}
+
+        """
+        if ngram_counts is None:
+            ngram_counts = self.ngram_counts
+        if ngram_counts is None:
+            raise ValueError(
+                'Updating a model requires the ngram counts of its training '
+                '(see the `keep_counts` argument of `train`).')
+        ngram_counts.check_compatible(self.ngram_range, self.tokenizer)
+
+        languages_ngram_freqs = self._count_ngrams(
+            labeled_instances, workers, ngram_counts.sketch_size())
+        updated_languages = ngram_counts.merge(languages_ngram_freqs)
+
+        if hasattr(training_profiles, 'to_dict'):
+            language_profiles = training_profiles.to_dict()
+        else:
+            language_profiles = {language: list(profile)
+                                 for language, profile in training_profiles.items()}
+        for language in updated_languages:
+            language_profiles[language] = self._compute_profile_from_frequencies(
+                ngram_counts[language], ngram_counts.limit)
+        self.ngram_counts = ngram_counts
         return language_profiles
 
     # TODO: model should be an instance variable. Actually, the implementation
     # IS the model
     def evaluate(self, model, test_instances, languages=None, error_values=None,
-                 split_languages=False):
+                 split_languages=False, workers=1):
         """Evaluate model on test data and gather results.
 
         Args:
-            model: A list of training profiles for languages.
+            model: A list of training profiles for languages. It can also be a
+                `CompiledModel`.
             test_instances (iterable): An iterable whose elements are
                 dictionaries. These dictionaries must have `text` and `language`
-                keys with their relative values.
+                keys with their relative values. It can also be a corpus reader:
+                if it supports `read_columns` (e.g. `CSVCorpusReader`), only the
+                `language` and `text` columns are read.
             languages (iterable): A list of language labels. When specified,
                 the model is  only evaluated on test instances with these labels
                 (e.g. 'it').
@@ -66,15 +285,20 @@ class CavnarTrenkleImpl(Implementation):
                 evaluated separately and results will be split by language. If
                 `False` (default) results are computed over all instances
                 belonging to `languages`.
+            workers (int): The number of processes used to predict languages.
+                When greater than 1, test instances are split in shards which
+                are evaluated by a pool of processes. Each process loads the
+                model once. Results do not depend on the number of workers.
 
         Yields:
             A single result in the form of `{'tested_languages': {error_value:
             accuracy}}`
 
         NOTE:
-            If you want to use `test_instances` multiple times, they need to be
-            stored in a list. Since they are a generator object, they would be
-            exhausted after the first iteration.
+            `test_instances` are iterated only once, whatever the number of
+            `error_values` and `languages`: the distance of each text from each
+            language is computed once and used for all error values (see
+            `CompiledModel.distance_terms`). They can be a generator.
 
         """
         if error_values is None:
@@ -84,21 +308,67 @@ class CavnarTrenkleImpl(Implementation):
         if isinstance(error_values, (int, float, str)):
             error_values = [int(val) for val in [error_values]]
 
-        # Make sure that test_instances is a list when we need multiple iterations
-        if len(error_values) > 1 or split_languages is True:
-            test_instances = list(test_instances)
+        self.reporter.info("Evaluating...")
+
+        matrices = self.confusion_matrices(
+            model, test_instances, languages, error_values, workers)
+        yield from self.evaluation_results(matrices, languages, split_languages)
+
+    def confusion_matrices(self, model, test_instances, languages=None,
+                           error_values=None, workers=1):
+        """Compute a confusion matrix for each error value, in a single pass.
+
+        Accuracy, and the precision, recall and F1 score of each language are
+        derived from confusion matrices (see `ConfusionMatrix.metrics`), as
+        well as the results of `evaluate` (see `evaluation_results`).
+
+        Args:
+            model: A list of training profiles for languages. It can also be a
+                `CompiledModel`.
+            test_instances (iterable): The test instances, or a corpus reader
+                (see `evaluate`).
+            languages (iterable): A list of language labels. When specified,
+                only test instances with these labels are evaluated.
+            error_values (list): The error values (see `predict_language`).
+            workers (int): The number of processes used to predict languages.
+
+        Returns:
+            A dictionary mapping each error value to a `ConfusionMatrix`. Texts
+            without any prediction (e.g. empty texts) are predicted as `''`.
+
+        """
+        if error_values is None:
+            error_values = [8000]
+        if isinstance(error_values, (int, float, str)):
+            error_values = [int(val) for val in [error_values]]
+        model = self.compile_model(model)
+        matrices = self._evaluate_for_languages(
+            test_instances, model, error_values, languages, workers)
+        return dict(zip(error_values, matrices))
+
+    def evaluation_results(self, matrices, languages=None, split_languages=False):
+        """Compute the results of `evaluate` from confusion matrices.
 
-        print("Evaluating...")
+        Args:
+            matrices (dict): A dictionary mapping error values to confusion
+                matrices (see `confusion_matrices`).
+            languages (iterable): A list of language labels. When specified,
+                accuracy is computed on the instances with these labels only.
+            split_languages (bool): if `True`, accuracy is computed for each
+                language in `languages` separately.
+
+        Yields:
+            Results in the form of `{'tested_languages': {error_value:
+            accuracy}}`.
 
+        """
         if languages and split_languages is True:
             # Evaluate performance on each language separately
             for lang in languages:
-                yield from self._eval_single_result(
-                    error_values, test_instances, model, [lang])
+                yield from self._eval_single_result(matrices, [lang])
         else:
             # Evaluate performance on all (specified) languages together
-            yield from self._eval_single_result(
-                error_values, test_instances, model, languages)
+            yield from self._eval_single_result(matrices, languages)
 
     def predict_language(self, text, training_profiles, error_value=8000):
         """Predict language for a text.
@@ -107,7 +377,8 @@ class CavnarTrenkleImpl(Implementation):
             text (str): A text whose language has to be detected.
             training_profiles (dict): A dictionary whose keys are language
                 labels. Each value is a list of 'ngrams' sorted by frequency.
-                This is the actual model used for prediction.
+                This is the actual model used for prediction. It is compiled
+                (see `compile_model`) before being used.
             error_value (int): The amount that penalizes the prediction whenever
                 an ngram is not present in the training profile. This value
                 should be decided based on tuning on the test set. See paper for
@@ -128,38 +399,244 @@ class CavnarTrenkleImpl(Implementation):
         NOTE:
             This is the same as:
 
-            >>> lang_distances = self.predict_language_scores( # doctest: +SKIP
-            ...    text, training_profiles, error_value)
-            >>> min(lang_distances, key=lang_distances.get) # doctest: +SKIP
+            >>> implementation.predict_language_scores(
+            ...     text, training_profiles, top_k=1)[0][0]
+            'en'
 
         NOTE:
-            This method could be improved by simply iterating over distances and
-            discarding them when they are smaller than the previous one. This
-            would not allow us to reuse `predict_language_scores` here.
+            With the 'pruned' engine, the distance from a language is not
+            computed completely once it exceeds the smallest distance found so
+            far (see `PrunedModel`). Predictions do not change.
+
+        """
+        compiled_model = self.compile_model(training_profiles)
+        if self.prediction_cache is None:
+            text_profile = self._compute_text_profile(text)
+        else:
+            tokens = self._text_tokens(text)
+            cache_key = (tuple(tokens), error_value)
+            cached = self.prediction_cache.get(cache_key)
+            if self.instrumentation is not None:
+                self.instrumentation.count(
+                    'cache_misses' if cached is None else 'cache_hits')
+            if cached is not None:
+                return cached[0]
+            text_profile = self._compute_profile_from_frequencies(
+                self._extract_text_ngram_freqs(text, tokens), None)
+        predicted_language, distance = self._score(
+            self._candidate_model(compiled_model, text), 'nearest_language',
+            [text_profile], error_value)
+        if predicted_language is None:
+            predicted_language = ''
+        if self.prediction_cache is not None:
+            self.prediction_cache.put(cache_key, (predicted_language, distance))
+
+        return predicted_language
+
+    def predict_language_scores(self, text, training_profiles, error_value=8000,
+                                top_k=None):
+        """Rank the languages nearest to a text, with their confidence.
+
+        The distances from all languages are computed once. Only the `top_k`
+        nearest ones are sorted.
+
+        Confidences are a softmax of the negated distances, measured in units
+        of `error_value`: each additional missing ngram makes a language about
+        `e` times less likely. Confidences sum up to 1 over all the languages
+        of the model, so the confidence of the first language is low when
+        other languages are almost as near.
+
+        Args:
+            text (str): A text whose language has to be detected.
+            training_profiles (dict): The model used for prediction (see
+                `predict_language`).
+            error_value (int): The penalty for ngrams that are not present in
+                the training profile (see `predict_language`).
+            top_k (int): The number of languages to return. All languages are
+                returned if `None`.
+
+        Returns:
+            A list of `(language, distance, confidence)` tuples, sorted by
+            distance. Ties are sorted as in the model (see `predict_language`).
+            The list is empty if the model has no languages.
+
+        Raises:
+            ValueError: If `top_k` is smaller than 1.
+
+        >>> implementation = CavnarTrenkleImpl()
+        >>> training_profiles = {'en': ['l', 'o', 'h', 'e'],
+        ...                      'it': ['o', 'c', 'i', 'a']}
+        >>> scores = implementation.predict_language_scores(
+        ...     'hello', training_profiles, error_value=10)
+        >>> [(language, distance, round(confidence, 3))
+        ...  for language, distance, confidence in scores]
+        [('en', 117, 0.802), ('it', 131, 0.198)]
 
         """
-        min_distance = sys.maxsize # Set it to a high number before iterating
-        predicted_language = ''
+        if top_k is not None and top_k < 1:
+            raise ValueError('top_k must be at least 1, not {!r}.'.format(top_k))
         text_profile = self._compute_text_profile(text)
+        compiled_model = self._candidate_model(
+            self.compile_model(training_profiles), text)
+        distances = self._score(
+            compiled_model, 'distances', [text_profile], error_value)
+        if not distances:
+            return []
+        # Sorting by model position keeps the same ties of `predict_language`
+        ranked = list(enumerate(distances.items()))
+        key = lambda item: (item[1][1], item[0])
+        if top_k is None or top_k >= len(ranked):
+            ranked.sort(key=key)
+        else:
+            ranked = heapq.nsmallest(top_k, ranked, key=key)
 
-        for language in training_profiles:
-            distance = self._distance(
-                text_profile, training_profiles[language], error_value=error_value)
-            if distance < min_distance:
-                min_distance = distance
-                predicted_language = language
+        min_distance = ranked[0][1][1]
+        scale = error_value or 1
+        normalization = sum(math.exp((min_distance - distance) / scale)
+                            for distance in distances.values())
+        return [(language, distance,
+                 math.exp((min_distance - distance) / scale) / normalization)
+                for _, (language, distance) in ranked]
 
-        return predicted_language
+    def predict_languages(self, texts, training_profiles, error_value=8000,
+                          batch_size=256, with_scores=False):
+        """Predict languages for many texts.
+
+        Texts are processed in batches. Within a batch, identical texts are
+        profiled only once and the compiled model scores all profiles together
+        (see `CompiledModel.nearest_languages`), which amortizes model lookups.
+
+        Args:
+            texts (iterable): The texts whose languages have to be detected. It
+                is consumed lazily, one batch at a time.
+            training_profiles (dict): The model used for prediction (see
+                `predict_language`).
+            error_value (int): The penalty for ngrams that are not present in
+                the training profile (see `predict_language`).
+            batch_size (int): The number of texts scored together.
+            with_scores (bool): If `True`, yield `(language, distance)` tuples
+                instead of language labels.
+
+        Yields:
+            The predicted language label for each text, in the same order as
+            `texts`.
+
+        >>> implementation = CavnarTrenkleImpl()
+        >>> training_profiles = {
+        ... 'en': ['l', 'o', 'lo', 'llo', 'll', 'hello', 'hell', 'hel', 'he',
+        ...       'h', 'ello', 'ell', 'el', 'e'],
+        ... 'it': ['o', 'iao', 'ia', 'i', 'ciao', 'cia', 'ci', 'c', 'ao', 'a']}
+        >>> list(implementation.predict_languages(
+        ...     ['hello', 'ciao', 'hello'], training_profiles))
+        ['en', 'it', 'en']
+
+        """
+        compiled_model = self.compile_model(training_profiles)
+        for batch in utils.chunks(texts, batch_size):
+            nearest, cache_keys = self._cached_predictions(batch, error_value)
+            text_profiles = self._batch_text_profiles(
+                text for text in batch if text not in nearest)
+            # Texts with the same candidate languages are scored together
+            for model, model_texts in self._group_by_candidate_model(
+                    compiled_model, text_profiles):
+                nearest.update(zip(model_texts, self._score(
+                    model, 'nearest_languages',
+                    [text_profiles[text] for text in model_texts], error_value)))
+            for text, cache_key in cache_keys.items():
+                language, distance = nearest[text]
+                self.prediction_cache.put(cache_key, (language or '', distance))
+
+            for text in batch:
+                language, distance = nearest[text]
+                if language is None:
+                    language = ''
+                yield (language, distance) if with_scores else language
 
     # Private methods #
 
+    def _count_ngrams(self, labeled_instances, workers=1, sketch_size=None):
+        """Count the ngrams of each language, with one or more processes."""
+        if workers > 1:
+            return self._parallel_languages_ngram_frequencies(
+                labeled_instances, workers, sketch_size=sketch_size)
+        label_key, text_key = 'language', 'text'
+        if hasattr(labeled_instances, 'read_columns'):
+            labeled_instances = labeled_instances.read_columns(LABELED_TEXT_COLUMNS)
+            label_key, text_key = 0, 1
+        elif hasattr(labeled_instances, 'all_instances'):
+            labeled_instances = labeled_instances.all_instances()
+        self.reporter.start('count')
+        freqs = self._languages_ngram_frequencies(
+            self._advancing(labeled_instances), sketch_size=sketch_size,
+            label_key=label_key, text_key=text_key)
+        self.reporter.finish()
+        return freqs
+
+    def _advancing(self, instances):
+        """Yield `instances`, counting them in the current reporter stage."""
+        advance = self.reporter.advance
+        for instance in instances:
+            advance()
+            yield instance
+
+    def _cached_predictions(self, texts, error_value):
+        """Look up the predictions of `texts` in the prediction cache.
+
+        Returns:
+            A `(cached, cache_keys)` tuple. `cached` maps texts to their cached
+            `(language, distance)` tuples. `cache_keys` maps the other texts to
+            the keys their predictions should be cached with.
+
+        """
+        cached, cache_keys = dict(), dict()
+        if self.prediction_cache is None:
+            return cached, cache_keys
+        for text in texts:
+            if text in cached or text in cache_keys:
+                continue
+            cache_key = (tuple(self._normalize_text(text)), error_value)
+            prediction = self.prediction_cache.get(cache_key)
+            if prediction is None:
+                cache_keys[text] = cache_key
+            else:
+                cached[text] = prediction
+        if self.instrumentation is not None:
+            self.instrumentation.count('cache_hits', len(cached))
+            self.instrumentation.count('cache_misses', len(cache_keys))
+        return cached, cache_keys
+
+    def _candidate_model(self, compiled_model, text):
+        """Restrict the model to the candidate languages of `text`, if enabled."""
+        if not self.script_prefilter:
+            return compiled_model
+        source, script_filter = self._script_filter_cache
+        if source is not compiled_model:
+            script_filter = ScriptFilter(compiled_model)
+            self._script_filter_cache = (compiled_model, script_filter)
+        return script_filter.candidate_model(text)
+
+    def _group_by_candidate_model(self, compiled_model, texts):
+        """Group texts by their candidate model (see `_candidate_model`).
+
+        Returns:
+            A list of `(model, texts)` tuples.
+
+        """
+        if not self.script_prefilter:
+            return [(compiled_model, list(texts))]
+        groups = dict()
+        for text in texts:
+            model = self._candidate_model(compiled_model, text)
+            groups.setdefault(id(model), (model, []))[1].append(text)
+        return list(groups.values())
+
     def _compute_profile_from_frequencies(self, frequencies_dict, limit):
         # Sort by value first, and then also by key (alphabetic order) if values
         # are equal.
-        return [ngram[0] for ngram in sorted(
-            frequencies_dict.items(),
-            key=lambda x: (x[1], x[0]),
-            reverse=True)[:limit]]
+        if self.instrumentation is None:
+            return utils.rank_by_frequency(frequencies_dict, limit)
+        with self.instrumentation.timer('rank_profile'):
+            return utils.rank_by_frequency(frequencies_dict, limit)
 
     def _compute_text_profile(self, text, limit=None):
         """
@@ -188,6 +665,8 @@ class CavnarTrenkleImpl(Implementation):
         Note: If a ngram is not present in the training profile, we penalize
         the text profile using an arbitrary `error_value`. This value should
         be decided based on tuning on the test set.
+        Rank lookups take constant time when `training_profile` is a
+        `RankedProfile` (see `compile_model`). A plain list is indexed first.
 
         >>> text_profile = ['h', 'e', 'l', 'o', 'he']
         >>> training_profile = ['h', 'e', 'l', 'o', 'he']
@@ -199,71 +678,162 @@ class CavnarTrenkleImpl(Implementation):
         8
 
         """
-        total_distance = 0
-        for index, text_ngram in enumerate(text_profile):
-            if text_ngram in training_profile:
-                distance = abs(index - training_profile.index(text_ngram))
-            else:
-                distance = error_value
-            total_distance += distance
-
-        return total_distance
-
-    def _evaluate_for_languages(self, test_instances, model, error_value,
-                                languages=None):
-        correct = 0
-        incorrect = 0
-        total = 0
-        for labeled_instance in test_instances:
-            # Skip instances with different languages
-            # TODO: This would not be necessary if we could use only instances
-            # with specific labels (a subset of test_instances). To be fixed.
-            if languages and labeled_instance['language'] not in languages:
-                continue
-            predicted_language = self.predict_language(
-                labeled_instance['text'], model, error_value=error_value)
-            if predicted_language == labeled_instance['language']:
-                correct += 1
-            else:
-                incorrect += 1
-            total += 1
-
-            print(
-                "Label: {}, Guess: {}, Correct: {}, Incorrect: {}, Total: {}   ".format(
-                    labeled_instance['language'],
-                    predicted_language,
-                    correct,
-                    incorrect,
-                    total),
-                end='\r', flush=True)
-        print()
-        accuracy = correct / total
-        # single_result = {languages: {str(err_val): accuracy}}
-        # TODO: this should be a dictionary: {'accuracy': accuracy}
-        return accuracy
-
-    def _eval_single_result(self, error_values, test_instances, model, languages=None):
-        """Evaluate performance on specified languages.
+        ranks = getattr(training_profile, 'ranks', None)
+        if ranks is None:
+            ranks = RankedProfile(training_profile).ranks
+        return out_of_place_distance(text_profile, ranks, error_value)
+
+    def _evaluate_for_languages(self, test_instances, model, error_values,
+                                languages=None, workers=1):
+        """Count predictions for each label and error value.
+
+        Returns:
+            A list with a `ConfusionMatrix` for each error value.
+
+        """
+        matrices = [ConfusionMatrix(model) for _ in error_values]
+        label_key, text_key = 'language', 'text'
+        if languages and hasattr(test_instances, 'language_columns'):
+            # Only read the instances with the tested languages
+            test_instances = test_instances.language_columns(
+                languages, LABELED_TEXT_COLUMNS)
+            label_key, text_key = 0, 1
+        elif hasattr(test_instances, 'read_columns'):
+            # Read `(language, text)` tuples instead of dictionaries
+            test_instances = test_instances.read_columns(LABELED_TEXT_COLUMNS)
+            label_key, text_key = 0, 1
+        elif hasattr(test_instances, 'all_instances'):
+            test_instances = test_instances.all_instances()
+        # Skip instances with different languages. Readers with
+        # `language_columns` (e.g. an indexed `TwitterCorpusReader`) only read
+        # the tested languages, so nothing is skipped.
+        if languages:
+            test_instances = (instance for instance in test_instances
+                              if instance[label_key] in languages)
+        reporter = self.reporter
+        reporter.start('evaluate')
+        for labeled_instance, predicted_languages in self._predict_instances(
+                test_instances, model, error_values, workers,
+                text_key=text_key):
+            label = labeled_instance[label_key]
+            for matrix, predicted_language in zip(matrices, predicted_languages):
+                matrix.add(label, predicted_language)
+            reporter.advance()
+        reporter.finish()
+        return matrices
+
+    def _predict_instances(self, test_instances, model, error_values,
+                           workers=1, shard_size=1000, text_key='text'):
+        """Predict the language of each test instance for each error value.
+
+        The text of each instance is `instance[text_key]`.
+
+        Yields:
+            `(labeled_instance, predicted_languages)` tuples, in the same order
+            as `test_instances`. `predicted_languages` contains a prediction
+            for each error value.
+
+        """
+        # Predictions are computed in batches, so instances are buffered
+        if workers > 1:
+            shards, shards_to_predict = itertools.tee(
+                utils.chunks(test_instances, shard_size))
+            shards_predictions = utils.parallel_map(
+                _predict_shard,
+                (([instance[text_key] for instance in shard], error_values)
+                 for shard in shards_to_predict),
+                workers,
+                initializer=_init_prediction_worker,
+                initargs=(self, model.source()))
+            for shard, shard_predictions in zip(shards, shards_predictions):
+                yield from zip(shard, shard_predictions)
+        else:
+            labeled_instances, instances_to_predict = itertools.tee(
+                test_instances)
+            yield from zip(labeled_instances, self._predict_by_error_value(
+                (instance[text_key] for instance in instances_to_predict),
+                model, error_values))
+
+    def _predict_by_error_value(self, texts, model, error_values,
+                                batch_size=256):
+        """Predict languages for many texts, using several error values.
+
+        Texts are scored against their candidate languages only, if the script
+        prefilter is enabled, so that evaluations measure the same classifier
+        as `predict_language`.
+
+        Yields:
+            A tuple for each text, with a prediction for each error value.
+
+        """
+        for batch in utils.chunks(texts, batch_size):
+            text_profiles = self._batch_text_profiles(batch)
+            nearest = dict()
+            # Texts with the same candidate languages are scored together
+            for candidate_model, model_texts in self._group_by_candidate_model(
+                    model, text_profiles):
+                nearest.update(zip(model_texts, self._score(
+                    candidate_model, 'nearest_languages_by_error_value',
+                    [text_profiles[text] for text in model_texts],
+                    error_values)))
+            for text in batch:
+                yield tuple(language if language is not None else ''
+                            for language in nearest[text])
+
+    def _score(self, model, method_name, text_profiles, *arguments):
+        """Call a scoring method of a compiled model on text profiles.
+
+        Methods in `_SINGLE_PROFILE_METHODS` are called with the only profile
+        in `text_profiles`. Scoring is timed if the implementation is
+        instrumented.
+
+        """
+        method = getattr(model, method_name)
+        if method_name in _SINGLE_PROFILE_METHODS:
+            text_profiles, = text_profiles
+            profiles_count = 1
+        else:
+            profiles_count = len(text_profiles)
+        if self.instrumentation is None:
+            return method(text_profiles, *arguments)
+        with self.instrumentation.timer('score'):
+            result = method(text_profiles, *arguments)
+        self.instrumentation.count('languages_scored', profiles_count * len(model))
+        return result
+
+    def _batch_text_profiles(self, texts):
+        """Compute the profile of each distinct text in `texts`."""
+        text_profiles = dict()
+        for text in texts:
+            if text not in text_profiles:
+                text_profiles[text] = self._compute_text_profile(text)
+        return text_profiles
+
+    def _eval_single_result(self, matrices, languages=None):
+        """Compute accuracy on specified languages.
 
         If no languages have been specified, use all available languages.
 
         """
         tested_langs = ' '.join(languages) if languages else 'ALL'
-        for err_val in error_values:
-            print("Evaluating results for LANG: {}, ERR_VAL: {}".format(
+        for err_val, matrix in matrices.items():
+            self.reporter.info("Results for LANG: {}, ERR_VAL: {}".format(
                 tested_langs,
                 err_val))
-            accuracy = self._evaluate_for_languages(
-                test_instances, model, err_val, languages)
+            accuracy = matrix.correct(languages) / matrix.total(languages)
+            # TODO: this should be a dictionary: {'accuracy': accuracy}
             single_result = {tested_langs: {str(err_val): accuracy}}
             yield single_result
 
-    def _extract_text_ngram_freqs(self, text):
+    def _extract_text_ngram_freqs(self, text, tokens=None):
         """Tokenize the text.
 
         For each token in the text, extract ngrams of different length (from 1
-        to 5). Compute how many times each of these ngrams occur in the text.
-        Then return a dictionary of { ngram: frequencies }.
+        to 5, see `ngram_range`). Compute how many times each of these ngrams
+        occur in the text. Then return a dictionary of { ngram: frequencies }.
+
+        If the tokens of the text are already known (see `_text_tokens`), they
+        can be given as `tokens`, and the text is not tokenized again.
 
         >>> implementation = CavnarTrenkleImpl()
         >>> ngrams = implementation._extract_text_ngram_freqs("HeLLo")
@@ -276,23 +846,48 @@ class CavnarTrenkleImpl(Implementation):
         True
 
         """
-        tokens = wordpunct_tokenize(text.lower()) # Force lower case
-        # TODO: Delete numbers and punctuation
-        # TODO: Should we use nltk twitter tokenizer?
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            if tokens is None:
+                tokens = self._normalize_text(text)
+            return extract_ngram_freqs(tokens, self.ngram_range)
+        if tokens is None:
+            tokens = self._text_tokens(text)
+        with instrumentation.timer('extract_ngrams'):
+            ngram_freqs = extract_ngram_freqs(tokens, self.ngram_range)
+        instrumentation.count('texts')
+        instrumentation.count('ngrams', len(ngram_freqs))
+        return ngram_freqs
 
-        ngram_freqs = defaultdict(int)
-        for token in tokens:
-            for n in range(1, 6): # Use 1-grams to 5-grams
-                for ngram in ngrams(token, n):
-                    ngram_string = ''.join(ngram)
-                    ngram_freqs[ngram_string] += 1
-                # ngram_freqs[ngrams(token, n)] += 1
+    def _text_tokens(self, text):
+        """Return the normalized tokens of a text, timing the 'tokenize' stage."""
+        if self.instrumentation is None:
+            return self._normalize_text(text)
+        with self.instrumentation.timer('tokenize'):
+            return self._normalize_text(text)
 
-        return ngram_freqs
+    def _normalize_text(self, text):
+        """Return the lowercased tokens of a text.
 
-    def _languages_ngram_frequencies(self, labeled_instances):
+        Texts with the same tokens have the same profile.
+
+        >>> CavnarTrenkleImpl()._normalize_text('Hello, World')
+        ['hello', ',', 'world']
+
+        """
+        # TODO: Delete numbers and punctuation
+        # TODO: Should we use nltk twitter tokenizer?
+        return self._tokenize(text.lower()) # Force lower case
+
+    def _languages_ngram_frequencies(self, labeled_instances, sketch_size=None,
+                                     label_key='language', text_key='text'):
         """Compute ngram frequencies for each language in the corpus.
 
+        If `sketch_size` is given, frequencies are approximated by a
+        `SpaceSavingSketch` with `sketch_size` counters for each language.
+        Labels and texts are read from the instances using `label_key` and
+        `text_key` (e.g. `0` and `1` for `(language, text)` tuples).
+
         >>> implementation = CavnarTrenkleImpl()
         >>> tweets = [{'language': 'it', 'id_str': '12', 'text': 'Ciao'}, \
                       {'language': 'en', 'id_str': '15', 'text': 'Hello'}]
@@ -306,11 +901,100 @@ class CavnarTrenkleImpl(Implementation):
         True
 
         """
+        if sketch_size:
+            sketches = dict()
+            for instance in labeled_instances:
+                lang = instance[label_key]
+                if lang not in sketches:
+                    sketches[lang] = SpaceSavingSketch(sketch_size)
+                sketches[lang].update(
+                    self._extract_text_ngram_freqs(instance[text_key]))
+            return sketches
+
         # freqs = defaultdict(lambda : defaultdict(int)) # Not working with Pickle
         freqs = defaultdict(utils.nested_defaultdict)
         for instance in labeled_instances:
-            lang = instance['language']
-            instance_ngram_freqs = self._extract_text_ngram_freqs(instance['text'])
+            lang = instance[label_key]
+            instance_ngram_freqs = self._extract_text_ngram_freqs(instance[text_key])
             utils.merge_dictionaries_summing(freqs[lang], instance_ngram_freqs)
 
         return freqs
+
+    def _parallel_languages_ngram_frequencies(self, labeled_instances, workers,
+                                              shard_size=10000,
+                                              sketch_size=None):
+        """Compute ngram frequencies for each language using many processes.
+
+        If `labeled_instances` is a corpus reader supporting `byte_ranges`,
+        each worker reads and counts a range of the corpus file. Otherwise,
+        instances are sent to the workers in shards of `shard_size`.
+
+        """
+        if hasattr(labeled_instances, 'byte_ranges'):
+            tasks = [(self, labeled_instances, byte_range, sketch_size)
+                     for byte_range in labeled_instances.byte_ranges(workers)]
+        else:
+            if hasattr(labeled_instances, 'all_instances'):
+                labeled_instances = labeled_instances.all_instances()
+            tasks = ((self, shard, None, sketch_size)
+                     for shard in utils.chunks(labeled_instances, shard_size))
+
+        freqs = dict() if sketch_size else defaultdict(utils.nested_defaultdict)
+        self.reporter.start('count_shards')
+        for partial_freqs in self._advancing(utils.parallel_map(
+                _count_shard_ngrams, tasks, workers)):
+            for lang, lang_ngram_freqs in partial_freqs.items():
+                if not sketch_size:
+                    utils.merge_dictionaries_summing(freqs[lang], lang_ngram_freqs)
+                elif lang in freqs:
+                    freqs[lang].merge(lang_ngram_freqs)
+                else:
+                    freqs[lang] = lang_ngram_freqs
+        self.reporter.finish()
+
+        return freqs
+
+
+# Process pool workers #
+
+# Implementation and compiled model of the current worker process
+_prediction_worker = None
+
+def _init_prediction_worker(implementation, training_profiles):
+    """Compile the model once, when a worker process starts.
+
+    `training_profiles` can be the path of a binary model file, which is
+    mapped by each worker (see `CompiledModel.source`).
+
+    """
+    global _prediction_worker
+    if isinstance(training_profiles, str):
+        training_profiles = utils.load_file(training_profiles)
+    _prediction_worker = (
+        implementation, implementation.compile_model(training_profiles))
+
+def _predict_shard(task):
+    """Predict the languages of a shard of texts in a worker process."""
+    texts, error_values = task
+    implementation, model = _prediction_worker
+    return list(implementation._predict_by_error_value(
+        texts, model, error_values))
+
+def _count_shard_ngrams(task):
+    """Compute ngram frequencies on a shard of the corpus in a worker process.
+
+    A task is an `(implementation, source, byte_range, sketch_size)` tuple.
+    `source` is either a corpus reader, if `byte_range` is given, or a list of
+    labeled instances.
+
+    """
+    implementation, source, byte_range, sketch_size = task
+    if byte_range is None:
+        return implementation._languages_ngram_frequencies(
+            source, sketch_size=sketch_size)
+    if hasattr(source, 'read_columns'):
+        return implementation._languages_ngram_frequencies(
+            source.read_columns(LABELED_TEXT_COLUMNS, byte_range=byte_range),
+            sketch_size=sketch_size, label_key=0, text_key=1)
+    return implementation._languages_ngram_frequencies(
+        source.instances_in_range(*byte_range), sketch_size=sketch_size)
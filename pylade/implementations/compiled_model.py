@@ -0,0 +1,392 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Compiled (indexed) version of a trained model.
+
+A trained model is a dictionary whose keys are language labels and whose values
+are lists of ngrams sorted by frequency. Looking up the rank of an ngram in
+such a list requires a linear scan. The classes in this module wrap each
+language profile with an `ngram -> rank` hash index, which is built only once
+when the model is compiled.
+
+"""
+
+from collections.abc import Mapping
+import copy
+
+
+class RankedProfile(object):
+    """A language profile indexed by ngram.
+
+    The object behaves like the list of ngrams it wraps (it supports `len`,
+    iteration, indexing, `in` and `index`), but membership tests and rank
+    lookups take constant time.
+
+    Attributes:
+        ngrams (list): The ngrams of the profile, from the most frequent to the
+            less frequent.
+        ranks (dict): A dictionary mapping each ngram to its position in
+            `ngrams`.
+
+    >>> profile = RankedProfile(['l', 'o', 'lo'])
+    >>> profile.index('lo')
+    2
+    >>> 'h' in profile
+    False
+    >>> profile.rank('h', default=-1)
+    -1
+
+    """
+
+    __slots__ = ('ngrams', 'ranks')
+
+    def __init__(self, ngrams):
+        self.ngrams = list(ngrams)
+        self.ranks = dict()
+        for rank, ngram in enumerate(self.ngrams):
+            # Keep the first occurrence, the same one `list.index` would find
+            self.ranks.setdefault(ngram, rank)
+
+    def rank(self, ngram, default=None):
+        """Return the position of `ngram` in the profile, or `default`."""
+        return self.ranks.get(ngram, default)
+
+    def index(self, ngram):
+        """Return the position of `ngram` in the profile (like `list.index`)."""
+        try:
+            return self.ranks[ngram]
+        except KeyError:
+            raise ValueError('{!r} is not in profile'.format(ngram)) from None
+
+    def __contains__(self, ngram):
+        return ngram in self.ranks
+
+    def __getitem__(self, index):
+        return self.ngrams[index]
+
+    def __iter__(self):
+        return iter(self.ngrams)
+
+    def __len__(self):
+        return len(self.ngrams)
+
+    def __eq__(self, other):
+        if isinstance(other, RankedProfile):
+            return self.ngrams == other.ngrams
+        return self.ngrams == other
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.ngrams)
+
+
+class CompiledModel(Mapping):
+    """A read-only mapping from language labels to `RankedProfile` objects.
+
+    A compiled model can be used wherever a plain model (a dictionary of lists)
+    is expected.
+
+    >>> model = CompiledModel({'en': ['l', 'o'], 'it': ['o', 'i']})
+    >>> model['it'].index('i')
+    1
+    >>> sorted(model)
+    ['en', 'it']
+    >>> CompiledModel.compile(model) is model
+    True
+
+    Attributes:
+        path (str): The path of the binary model file the model was compiled
+            from (see `binary_model`), if any.
+
+    """
+
+    path = None
+
+    def __init__(self, training_profiles):
+        self.path = getattr(training_profiles, 'path', None)
+        self._profiles = {
+            language: (profile if isinstance(profile, RankedProfile)
+                       else RankedProfile(profile))
+            for language, profile in training_profiles.items()}
+
+    @classmethod
+    def compile(cls, training_profiles):
+        """Compile `training_profiles`, unless they have already been compiled.
+
+        Args:
+            training_profiles (dict): A dictionary whose keys are language
+                labels and whose values are lists of ngrams sorted by frequency.
+
+        Returns:
+            A `CompiledModel` instance.
+
+        """
+        if isinstance(training_profiles, cls):
+            return training_profiles
+        return cls(training_profiles)
+
+    def distances(self, text_profile, error_value):
+        """Compute the distance between a text profile and each language.
+
+        Args:
+            text_profile (list): A list of ngrams sorted by frequency.
+            error_value (int): The penalty for ngrams missing from a language
+                profile.
+
+        Returns:
+            A dictionary mapping each language label to its distance.
+
+        >>> model = CompiledModel({'en': ['h', 'e', 'l'], 'it': ['c', 'i']})
+        >>> model.distances(['h', 'e', 'x'], 10)
+        {'en': 10, 'it': 30}
+
+        """
+        return {language: out_of_place_distance(
+                    text_profile, profile.ranks, error_value)
+                for language, profile in self._profiles.items()}
+
+    def nearest_language(self, text_profile, error_value):
+        """Find the language with the smallest distance from a text profile.
+
+        Ties are resolved in favour of the language that comes first in the
+        model.
+
+        Returns:
+            A `(language, distance)` tuple. Both values are `None` if the model
+            is empty.
+
+        """
+        nearest_language, min_distance = None, None
+        for language, profile in self._profiles.items():
+            distance = out_of_place_distance(
+                text_profile, profile.ranks, error_value)
+            if min_distance is None or distance < min_distance:
+                nearest_language, min_distance = language, distance
+        return nearest_language, min_distance
+
+    def nearest_languages(self, text_profiles, error_value):
+        """Find the nearest language for each profile in `text_profiles`.
+
+        Args:
+            text_profiles (list): A list of text profiles.
+            error_value (int): The penalty for ngrams missing from a language
+                profile.
+
+        Returns:
+            A list of `(language, distance)` tuples, one for each text profile.
+
+        >>> model = CompiledModel({'en': ['h', 'e', 'l'], 'it': ['c', 'i']})
+        >>> model.nearest_languages([['h', 'e'], ['i', 'c']], 10)
+        [('en', 0), ('it', 2)]
+
+        """
+        return [self.nearest_language(text_profile, error_value)
+                for text_profile in text_profiles]
+
+    def distance_terms(self, text_profile):
+        """Split the distances from a text profile into two terms.
+
+        The out-of-place distance is linear in the error value: it is the sum
+        of the displacements of matched ngrams, plus the number of missing
+        ngrams multiplied by the error value. Computing both terms once allows
+        to derive the distances for any error value.
+
+        Returns:
+            A list of `(language, matched_distance, misses)` tuples.
+
+        >>> model = CompiledModel({'en': ['h', 'e', 'l'], 'it': ['c', 'i']})
+        >>> model.distance_terms(['h', 'e', 'x'])
+        [('en', 0, 1), ('it', 0, 3)]
+
+        """
+        terms = []
+        for language, profile in self._profiles.items():
+            ranks = profile.ranks
+            matched_distance = 0
+            misses = 0
+            for index, text_ngram in enumerate(text_profile):
+                rank = ranks.get(text_ngram)
+                if rank is None:
+                    misses += 1
+                else:
+                    matched_distance += abs(index - rank)
+            terms.append((language, matched_distance, misses))
+        return terms
+
+    def nearest_languages_by_error_value(self, text_profiles, error_values):
+        """Find the nearest language for each text profile and error value.
+
+        The distance terms of each text (see `distance_terms`) are computed
+        once, and then combined with each error value.
+
+        Args:
+            text_profiles (list): A list of text profiles.
+            error_values (list): A list of penalties for missing ngrams.
+
+        Returns:
+            A list with a tuple for each text profile. Each tuple contains the
+            nearest language for each error value, in the same order as
+            `error_values`.
+
+        >>> model = CompiledModel({'en': ['a'], 'it': ['x', 'y', 'z', 'b', 'a']})
+        >>> model.nearest_languages_by_error_value([['a', 'b']], [1, 10])
+        [('en', 'it')]
+
+        """
+        results = []
+        for text_profile in text_profiles:
+            terms = self.distance_terms(text_profile)
+            nearest = []
+            for error_value in error_values:
+                nearest_language, min_distance = None, None
+                for language, matched_distance, misses in terms:
+                    distance = matched_distance + misses * error_value
+                    if min_distance is None or distance < min_distance:
+                        nearest_language, min_distance = language, distance
+                nearest.append(nearest_language)
+            results.append(tuple(nearest))
+        return results
+
+    def subset(self, languages):
+        """Return a model of the same kind restricted to some languages.
+
+        Profiles are shared with this model, and languages keep their order.
+
+        >>> model = CompiledModel({'en': ['h', 'e'], 'it': ['c', 'i'], 'de': ['e']})
+        >>> list(model.subset({'de', 'en'}))
+        ['en', 'de']
+
+        """
+        model = copy.copy(self)
+        model.path = None # Not the model of the file anymore
+        model._profiles = {language: profile
+                           for language, profile in self._profiles.items()
+                           if language in languages}
+        return model
+
+    def to_dict(self):
+        """Return the model as a plain dictionary of lists of ngrams."""
+        return {language: list(profile.ngrams)
+                for language, profile in self._profiles.items()}
+
+    def source(self):
+        """Return a picklable source of the model, to be sent to other processes.
+
+        Returns:
+            The path of the binary model file the model was compiled from, so
+            that other processes map the same file, or else the model as a
+            plain dictionary (see `to_dict`).
+
+        """
+        return self.path if self.path is not None else self.to_dict()
+
+    def __getitem__(self, language):
+        return self._profiles[language]
+
+    def __iter__(self):
+        return iter(self._profiles)
+
+    def __len__(self):
+        return len(self._profiles)
+
+
+class PrunedModel(CompiledModel):
+    """A `CompiledModel` that stops scoring hopeless languages early.
+
+    Distances only grow while ngrams are scored, so a language can be
+    discarded as soon as its running distance exceeds the best distance found
+    so far. To find a good candidate first, languages are scored in order of a
+    cheap prior: the distance computed on the first `prior_ngrams` ngrams of
+    the text profile, which is then completed only for promising languages.
+
+    Predicted languages and distances are the same as with `CompiledModel`,
+    including ties, which are resolved in favour of the language that comes
+    first in the model.
+
+    Attributes:
+        prior_ngrams (int): The number of ngrams used to order languages.
+
+    >>> model = PrunedModel({'en': ['h', 'e', 'l'], 'it': ['c', 'i']})
+    >>> model.nearest_language(['i', 'c', 'x'], 10)
+    ('it', 12)
+
+    """
+
+    prior_ngrams = 16
+
+    def nearest_language(self, text_profile, error_value):
+        head = text_profile[:self.prior_ngrams]
+        tail = text_profile[self.prior_ngrams:]
+        # `(distance, index)` pairs are unique: profiles are never compared
+        candidates = sorted(
+            (out_of_place_distance(head, profile.ranks, error_value), index,
+             language, profile.ranks)
+            for index, (language, profile) in enumerate(self._profiles.items()))
+
+        nearest_language, min_distance, nearest_index = None, None, None
+        for head_distance, index, language, ranks in candidates:
+            if min_distance is not None and head_distance > min_distance:
+                break # Candidates are sorted: no other language can win
+            distance = _bounded_distance(
+                tail, len(head), ranks, error_value, head_distance,
+                min_distance)
+            if distance is None:
+                continue
+            if (min_distance is None or distance < min_distance or
+                    (distance == min_distance and index < nearest_index)):
+                nearest_language, min_distance, nearest_index = (
+                    language, distance, index)
+        return nearest_language, min_distance
+
+
+def out_of_place_distance(text_profile, ranks, error_value):
+    """Compute the "out-of-place" distance between two profiles.
+
+    Args:
+        text_profile (list): A list of ngrams sorted by frequency.
+        ranks (dict): A dictionary mapping the ngrams of a training profile to
+            their ranks.
+        error_value (int): The penalty for ngrams missing from `ranks`.
+
+    Returns:
+        The distance between the two profiles.
+
+    >>> out_of_place_distance(['h', 'e', 'x'], {'e': 0, 'h': 1}, 10)
+    12
+
+    """
+    total_distance = 0
+    for index, text_ngram in enumerate(text_profile):
+        rank = ranks.get(text_ngram)
+        if rank is None:
+            total_distance += error_value
+        else:
+            total_distance += abs(index - rank)
+    return total_distance
+
+
+# Private functions
+
+def _bounded_distance(text_profile, start, ranks, error_value, distance, bound):
+    """Add the distance terms of `text_profile` to `distance`.
+
+    Args:
+        start (int): The position of the first ngram of `text_profile` in the
+            whole text profile.
+        bound (int): Stop as soon as the distance exceeds this value. `None`
+            means no bound.
+
+    Returns:
+        The total distance, or `None` if it exceeds `bound`.
+
+    """
+    if bound is None:
+        bound = float('inf')
+    for index, text_ngram in enumerate(text_profile, start):
+        rank = ranks.get(text_ngram)
+        if rank is None:
+            distance += error_value
+        else:
+            distance += abs(index - rank)
+        if distance > bound:
+            return None
+    return distance
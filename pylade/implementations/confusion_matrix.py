@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Confusion matrix of language predictions.
+
+A confusion matrix counts, for each pair of labels, how many test instances
+with the first label have been predicted as the second one. Accuracy and the
+precision, recall and F1 score of each language are derived from it, so a
+single pass over the test instances gives all of them.
+
+"""
+
+from array import array
+
+
+class ConfusionMatrix(object):
+    """A square matrix of prediction counts, indexed by labels.
+
+    Counts are stored in a flat array of unsigned integers (row-major): rows
+    are the true labels, columns are the predicted ones. Labels are added as
+    they are found.
+
+    Args:
+        labels (iterable): The labels known in advance (e.g. the languages of
+            a model). Their order is kept.
+
+    >>> matrix = ConfusionMatrix(['en', 'it'])
+    >>> for true, predicted in [('en', 'en'), ('en', 'it'), ('it', 'it')]:
+    ...     matrix.add(true, predicted)
+    >>> matrix.count('en', 'it'), matrix.accuracy()
+    (1, 0.6666666666666666)
+    >>> matrix.precision('it'), matrix.recall('it'), matrix.f1('it')
+    (0.5, 1.0, 0.6666666666666666)
+
+    """
+
+    def __init__(self, labels=()):
+        self.labels = []
+        self._indices = dict()
+        self._counts = array('Q')
+        for label in labels:
+            self._index(label)
+
+    def add(self, true_label, predicted_label, count=1):
+        """Count `count` instances with `true_label` predicted as `predicted_label`."""
+        row = self._index(true_label)
+        column = self._index(predicted_label)
+        self._counts[row * len(self.labels) + column] += count
+
+    def count(self, true_label, predicted_label):
+        """Return the number of instances with `true_label` predicted as `predicted_label`."""
+        if true_label not in self._indices or predicted_label not in self._indices:
+            return 0
+        return self._counts[self._indices[true_label] * len(self.labels) +
+                            self._indices[predicted_label]]
+
+    def support(self, label):
+        """Return the number of instances with `label` (the sum of its row)."""
+        if label not in self._indices:
+            return 0
+        size = len(self.labels)
+        start = self._indices[label] * size
+        return sum(self._counts[start:start + size])
+
+    def predicted(self, label):
+        """Return the number of instances predicted as `label` (the sum of its column)."""
+        if label not in self._indices:
+            return 0
+        return sum(self._counts[self._indices[label]::len(self.labels)])
+
+    def correct(self, labels=None):
+        """Return the number of correct predictions for `labels` (all by default)."""
+        if labels is None:
+            labels = self.labels
+        return sum(self.count(label, label) for label in labels)
+
+    def total(self, labels=None):
+        """Return the number of instances with `labels` (all by default)."""
+        if labels is None:
+            return sum(self._counts)
+        return sum(self.support(label) for label in labels)
+
+    def accuracy(self, labels=None):
+        """Return the accuracy on the instances with `labels` (all by default).
+
+        Returns:
+            The ratio of correct predictions, or `0.0` if there are no
+            instances.
+
+        """
+        total = self.total(labels)
+        return self.correct(labels) / total if total else 0.0
+
+    def precision(self, label):
+        """Return the ratio of predictions of `label` that are correct."""
+        predicted = self.predicted(label)
+        return self.count(label, label) / predicted if predicted else 0.0
+
+    def recall(self, label):
+        """Return the ratio of instances with `label` predicted correctly."""
+        support = self.support(label)
+        return self.count(label, label) / support if support else 0.0
+
+    def f1(self, label):
+        """Return the harmonic mean of the precision and recall of `label`."""
+        precision, recall = self.precision(label), self.recall(label)
+        if not precision + recall:
+            return 0.0
+        return 2 * precision * recall / (precision + recall)
+
+    def metrics(self):
+        """Return the precision, recall, F1 score and support of each label.
+
+        Labels that were neither true nor predicted labels are skipped.
+
+        Returns:
+            A dictionary like `{'en': {'precision': 0.9, 'recall': 0.8, 'f1':
+            0.85, 'support': 120}}`.
+
+        """
+        return {label: {'precision': self.precision(label),
+                        'recall': self.recall(label),
+                        'f1': self.f1(label),
+                        'support': self.support(label)}
+                for label in self.labels
+                if self.support(label) or self.predicted(label)}
+
+    def to_dict(self):
+        """Return the non-zero counts as nested dictionaries (`{true: {predicted: count}}`)."""
+        size = len(self.labels)
+        result = dict()
+        for row, true_label in enumerate(self.labels):
+            for column, predicted_label in enumerate(self.labels):
+                count = self._counts[row * size + column]
+                if count:
+                    result.setdefault(true_label, dict())[predicted_label] = count
+        return result
+
+    # Private methods #
+
+    def _index(self, label):
+        """Return the index of `label`, adding a row and a column if needed."""
+        index = self._indices.get(label)
+        if index is None:
+            size = len(self.labels)
+            counts = array('Q', bytes(8 * (size + 1) ** 2))
+            for row in range(size):
+                counts[row * (size + 1):row * (size + 1) + size] = \
+                    self._counts[row * size:(row + 1) * size]
+            self._counts = counts
+            index = self._indices[label] = size
+            self.labels.append(label)
+        return index
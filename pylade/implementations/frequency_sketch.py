@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Bounded-memory approximate ngram counting.
+
+Exact training keeps a counter for every distinct ngram of a language, even
+though only the `limit` most frequent ones end up in the profile. The
+`SpaceSavingSketch` keeps a bounded number of counters instead, following the
+Space-Saving algorithm (Metwally et al., 2005): counts are overestimated by at
+most `error_bound`, and every ngram more frequent than `error_bound` is kept.
+
+"""
+
+from pylade import utils
+from .compiled_model import RankedProfile, out_of_place_distance
+
+
+class SpaceSavingSketch(object):
+    """Approximate counter of the most frequent ngrams.
+
+    The sketch holds up to `2 * capacity` counters. When they exceed that
+    number, only the `capacity` largest ones are kept. Ngrams which are not in
+    the sketch are assumed to have been seen `error_bound` times, the largest
+    count ever evicted.
+
+    Attributes:
+        capacity (int): The number of counters kept after each eviction.
+        counts (dict): A dictionary mapping ngrams to their estimated counts.
+        error_bound (int): The maximum overestimation of each count.
+
+    >>> sketch = SpaceSavingSketch(capacity=2)
+    >>> for freqs in [{'a': 5, 'b': 1}, {'c': 1, 'd': 1}, {'a': 1, 'e': 3}]:
+    ...     sketch.update(freqs)
+    >>> sketch.most_common(2)
+    [('a', 6), ('e', 3)]
+    >>> sketch.error_bound
+    1
+
+    """
+
+    __slots__ = ('capacity', 'counts', 'error_bound')
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError('Sketch capacity must be a positive integer.')
+        self.capacity = capacity
+        self.counts = dict()
+        self.error_bound = 0
+
+    def update(self, frequencies_dict):
+        """Add the ngram counts in `frequencies_dict` to the sketch."""
+        counts = self.counts
+        error_bound = self.error_bound
+        for ngram, count in frequencies_dict.items():
+            if ngram in counts:
+                counts[ngram] += count
+            else:
+                counts[ngram] = error_bound + count
+        if len(counts) > 2 * self.capacity:
+            self._evict()
+
+    def merge(self, other):
+        """Merge another sketch (e.g. computed on another shard) into this one.
+
+        Returns:
+            This sketch, updated in place.
+
+        """
+        counts = self.counts
+        for ngram in counts.keys() - other.counts.keys():
+            counts[ngram] += other.error_bound
+        for ngram, count in other.counts.items():
+            counts[ngram] = counts.get(ngram, self.error_bound) + count
+        self.error_bound += other.error_bound
+        if len(counts) > 2 * self.capacity:
+            self._evict()
+        return self
+
+    def most_common(self, limit=None):
+        """Return the `limit` largest `(ngram, count)` pairs.
+
+        Pairs are sorted by count and then by ngram, in reverse order.
+
+        """
+        counts = self.counts
+        return [(ngram, counts[ngram])
+                for ngram in utils.rank_by_frequency(counts, limit)]
+
+    def guaranteed_entries(self, limit):
+        """Count the ngrams which certainly belong to the exact top `limit`.
+
+        The true count of an ngram is at least its estimate minus
+        `error_bound`. An ngram certainly belongs to the exact top `limit` if
+        this lower bound is not smaller than the estimate of the first ngram
+        left out of it.
+
+        """
+        top = self.most_common(limit + 1)
+        if len(top) <= limit:
+            threshold = self.error_bound
+            top_limit = top
+        else:
+            threshold = max(top[limit][1], self.error_bound)
+            top_limit = top[:limit]
+        return sum(1 for _, count in top_limit
+                   if count - self.error_bound >= threshold)
+
+    def items(self):
+        """Return the `(ngram, estimated count)` pairs in the sketch."""
+        return self.counts.items()
+
+    def values(self):
+        """Return the estimated counts in the sketch."""
+        return self.counts.values()
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __getstate__(self):
+        return (self.capacity, self.counts, self.error_bound)
+
+    def __setstate__(self, state):
+        self.capacity, self.counts, self.error_bound = state
+
+    # Private methods #
+
+    def _evict(self):
+        ranked = self.most_common(self.capacity + 1)
+        if len(ranked) > self.capacity:
+            self.error_bound = max(self.error_bound, ranked[-1][1])
+        self.counts = dict(ranked[:self.capacity])
+
+
+def profile_divergence(profile, reference_profile):
+    """Measure how far an (approximate) profile is from a reference one.
+
+    Args:
+        profile (list): A list of ngrams sorted by frequency.
+        reference_profile (list): The reference (e.g. exact) list of ngrams.
+
+    Returns:
+        A dictionary with the fraction of `reference_profile` ngrams found in
+        `profile` (`overlap`), and the average out-of-place displacement of
+        the ngrams of `profile` with respect to `reference_profile`, where
+        missing ngrams count as `len(reference_profile)` (`mean_displacement`).
+
+    >>> profile_divergence(['a', 'b', 'c'], ['a', 'c', 'd'])
+    {'overlap': 0.6666666666666666, 'mean_displacement': 1.3333333333333333}
+
+    """
+    if not profile or not reference_profile:
+        return {'overlap': float(profile == reference_profile),
+                'mean_displacement': 0.0}
+    reference_ranks = RankedProfile(reference_profile).ranks
+    shared = sum(1 for ngram in set(profile) if ngram in reference_ranks)
+    distance = out_of_place_distance(
+        profile, reference_ranks, len(reference_profile))
+    return {'overlap': shared / len(reference_ranks),
+            'mean_displacement': distance / len(profile)}
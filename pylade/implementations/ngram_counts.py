@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Ngram counts of a training corpus, kept to update a model later.
+
+A trained model only contains the `limit` most frequent ngrams of each
+language. Keeping the counts of all ngrams allows to add new training data (or
+new languages) without reading the whole corpus again: new counts are merged,
+and only the profiles of the affected languages are ranked again.
+
+Counts are saved in a compact gzip-compressed binary file (little-endian):
+
+    magic           8 bytes, `MAGIC`
+    header          number of languages (uint32), profile limit (int64, `-1`
+                    if there is no limit), minimum and maximum ngram length
+                    (uint16, `0` if unknown), tokenizer name size (uint16),
+                    UTF-8 tokenizer name (empty if unknown)
+    languages       for each language: label size (uint16), UTF-8 label,
+                    sketch capacity (uint64, `0` for exact counts), error
+                    bound (uint64), number of ngrams (uint64), size of the
+                    string table (uint64), UTF-8 size of each ngram (uint32
+                    array), string table, count of each ngram (uint64 array)
+
+"""
+
+from array import array
+from collections import defaultdict
+import gzip
+import struct
+import sys
+
+from pylade import utils
+from .frequency_sketch import SpaceSavingSketch
+
+MAGIC = b'PYLADEC\x02'
+
+_HEADER = struct.Struct('<IqHHH')
+_LABEL_SIZE = struct.Struct('<H')
+_LANGUAGE_HEADER = struct.Struct('<QQQQ')
+
+
+class NgramCounts(object):
+    """The ngram counts of each language of a training corpus.
+
+    Args:
+        counts (dict): A dictionary mapping each language to its ngram counts,
+            either a dictionary or a `SpaceSavingSketch` (see
+            `CavnarTrenkleImpl.train`).
+        limit (int): The number of entries in each language profile.
+        ngram_range (tuple): The minimum and maximum length of the counted
+            ngrams, or `None` if unknown.
+        tokenizer (str): The name of the tokenizer used to split texts, or
+            `None` if unknown.
+
+    Attributes:
+        counts (dict): A dictionary mapping each language to its ngram counts.
+        limit (int): The number of entries in each language profile.
+        ngram_range (tuple): The minimum and maximum length of the ngrams.
+        tokenizer (str): The name of the tokenizer.
+
+    >>> counts = NgramCounts({'en': {'a': 2, 'b': 1}}, limit=1)
+    >>> sorted(counts.merge({'en': {'b': 2}, 'it': {'c': 1}}))
+    ['en', 'it']
+    >>> dict(counts['en'])
+    {'a': 2, 'b': 3}
+
+    """
+
+    def __init__(self, counts, limit=None, ngram_range=None, tokenizer=None):
+        self.counts = dict()
+        for language, language_counts in counts.items():
+            if not isinstance(language_counts, SpaceSavingSketch):
+                language_counts = defaultdict(int, language_counts)
+            self.counts[language] = language_counts
+        self.limit = limit
+        self.ngram_range = None if ngram_range is None else tuple(ngram_range)
+        self.tokenizer = tokenizer
+
+    def check_compatible(self, ngram_range, tokenizer):
+        """Check that new counts can be merged with these ones.
+
+        Raises:
+            ValueError: If the counts were made with another ngram range or
+                tokenizer. Unknown ones are not checked.
+
+        >>> NgramCounts({}, ngram_range=(1, 5)).check_compatible((1, 3), 'nltk')
+        Traceback (most recent call last):
+        ...
+        ValueError: The counts were made with ngram_range (1, 5), not (1, 3).
+
+        """
+        if self.ngram_range is not None and self.ngram_range != tuple(ngram_range):
+            raise ValueError(
+                'The counts were made with ngram_range {}, not {}.'.format(
+                    self.ngram_range, tuple(ngram_range)))
+        if self.tokenizer is not None and self.tokenizer != tokenizer:
+            raise ValueError(
+                'The counts were made with the {!r} tokenizer, not {!r}.'.format(
+                    self.tokenizer, tokenizer))
+
+    def merge(self, counts):
+        """Add new ngram counts.
+
+        Args:
+            counts (dict): A dictionary mapping languages to their new ngram
+                counts, of the same kind as the existing ones.
+
+        Returns:
+            The set of languages whose counts have changed.
+
+        """
+        for language, language_counts in counts.items():
+            if language not in self.counts:
+                self.counts[language] = (
+                    language_counts if isinstance(language_counts, SpaceSavingSketch)
+                    else defaultdict(int, language_counts))
+            elif isinstance(self.counts[language], SpaceSavingSketch):
+                self.counts[language].merge(language_counts)
+            else:
+                utils.merge_dictionaries_summing(
+                    self.counts[language], language_counts)
+        return set(counts)
+
+    def sketch_size(self):
+        """Return the capacity of the sketches, or `None` for exact counts."""
+        for language_counts in self.counts.values():
+            if isinstance(language_counts, SpaceSavingSketch):
+                return language_counts.capacity
+        return None
+
+    def save(self, output_file_path):
+        """Save the counts to a compressed binary file."""
+        limit = -1 if self.limit is None else self.limit
+        min_length, max_length = self.ngram_range or (0, 0)
+        tokenizer = (self.tokenizer or '').encode('utf-8')
+        with gzip.open(output_file_path, 'wb', compresslevel=6) as output_file:
+            output_file.write(MAGIC)
+            output_file.write(_HEADER.pack(
+                len(self.counts), limit, min_length, max_length, len(tokenizer)))
+            output_file.write(tokenizer)
+            for language, language_counts in self.counts.items():
+                capacity, error_bound = 0, 0
+                if isinstance(language_counts, SpaceSavingSketch):
+                    capacity = language_counts.capacity
+                    error_bound = language_counts.error_bound
+                items = list(language_counts.items())
+                encoded_ngrams = [ngram.encode('utf-8') for ngram, _ in items]
+                strings = b''.join(encoded_ngrams)
+                label = language.encode('utf-8')
+                output_file.write(_LABEL_SIZE.pack(len(label)))
+                output_file.write(label)
+                output_file.write(_LANGUAGE_HEADER.pack(
+                    capacity, error_bound, len(encoded_ngrams), len(strings)))
+                _write_array(output_file, array(
+                    'I', [len(encoded_ngram) for encoded_ngram in encoded_ngrams]))
+                output_file.write(strings)
+                _write_array(output_file, array('Q', [count for _, count in items]))
+
+    @classmethod
+    def load(cls, input_file_path):
+        """Load counts saved by `save`.
+
+        Raises:
+            ValueError: If the file does not contain ngram counts.
+
+        """
+        with gzip.open(input_file_path, 'rb') as input_file:
+            if input_file.read(len(MAGIC)) != MAGIC:
+                raise ValueError('Not a pylade ngram counts file.')
+            n_languages, limit, min_length, max_length, tokenizer_size = \
+                _HEADER.unpack(input_file.read(_HEADER.size))
+            tokenizer = input_file.read(tokenizer_size).decode('utf-8') or None
+            counts = dict()
+            for _ in range(n_languages):
+                label_size, = _LABEL_SIZE.unpack(input_file.read(_LABEL_SIZE.size))
+                language = input_file.read(label_size).decode('utf-8')
+                capacity, error_bound, n_ngrams, strings_size = \
+                    _LANGUAGE_HEADER.unpack(input_file.read(_LANGUAGE_HEADER.size))
+                sizes = _read_array(input_file, 'I', n_ngrams)
+                strings = input_file.read(strings_size)
+                values = _read_array(input_file, 'Q', n_ngrams)
+                language_counts = dict()
+                offset = 0
+                for size, value in zip(sizes, values):
+                    language_counts[strings[offset:offset + size].decode('utf-8')] = value
+                    offset += size
+                if capacity:
+                    sketch = SpaceSavingSketch(capacity)
+                    sketch.counts = language_counts
+                    sketch.error_bound = error_bound
+                    language_counts = sketch
+                counts[language] = language_counts
+        return cls(counts, None if limit == -1 else limit,
+                   (min_length, max_length) if max_length else None, tokenizer)
+
+    def __getitem__(self, language):
+        return self.counts[language]
+
+    def __contains__(self, language):
+        return language in self.counts
+
+    def __iter__(self):
+        return iter(self.counts)
+
+    def __len__(self):
+        return len(self.counts)
+
+
+# Private functions
+
+def _write_array(output_file, values):
+    if sys.byteorder == 'big': # Swap a copy: `values` may still be in use
+        values = array(values.typecode, values)
+        values.byteswap()
+    output_file.write(values.tobytes())
+
+def _read_array(input_file, typecode, length):
+    values = array(typecode)
+    values.frombytes(input_file.read(length * values.itemsize))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
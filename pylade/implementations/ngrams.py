@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Character ngram extraction."""
+
+from collections import Counter
+
+DEFAULT_NGRAM_RANGE = (1, 5)
+
+
+def extract_ngram_freqs(tokens, ngram_range=DEFAULT_NGRAM_RANGE):
+    """Count the character ngrams of each token.
+
+    Ngrams are built by slicing each token directly: ngrams never span more
+    than one token, and tokens shorter than `n` have no `n`-grams.
+
+    Args:
+        tokens (iterable): The tokens (strings) ngrams are extracted from.
+        ngram_range (tuple): The minimum and maximum length of the extracted
+            ngrams (both included).
+
+    Returns:
+        A `Counter` of `{ ngram: frequency }`.
+
+    >>> ngram_freqs = extract_ngram_freqs(['hello'], ngram_range=(2, 3))
+    >>> ngram_freqs == {'he': 1, 'el': 1, 'll': 1, 'lo': 1, 'hel': 1, \
+        'ell': 1, 'llo': 1}
+    True
+    >>> extract_ngram_freqs(['a', 'a', 'b']) == {'a': 2, 'b': 1}
+    True
+
+    """
+    min_n, max_n = ngram_range
+    all_ngrams = []
+    for token in tokens:
+        length = len(token)
+        for n in range(min_n, min(max_n, length) + 1):
+            all_ngrams.extend([token[i:i + n] for i in range(length - n + 1)])
+    return Counter(all_ngrams)
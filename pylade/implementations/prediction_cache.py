@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Bounded cache of predictions.
+
+Social media streams contain many duplicated texts (retweets, boilerplate,
+greetings). Caching predictions by normalized text (e.g. lowercased tokens)
+avoids computing the same profile and distances again.
+
+"""
+
+from collections import OrderedDict
+import threading
+import time
+
+
+class PredictionCache(object):
+    """A thread-safe LRU cache with an optional time-to-live.
+
+    When the cache is full, the least recently used entry is discarded.
+    Caches are sent empty to worker processes: each process fills its own.
+
+    Args:
+        maxsize (int): The maximum number of entries.
+        ttl (float): The number of seconds after which an entry expires. `None`
+            means that entries never expire.
+
+    Attributes:
+        hits (int): The number of lookups which found an entry.
+        misses (int): The number of lookups which found no (valid) entry.
+
+    >>> cache = PredictionCache(maxsize=2)
+    >>> cache.put('a', 'en'); cache.put('b', 'it'); cache.get('a')
+    'en'
+    >>> cache.put('c', 'de'); cache.get('b') is None # Least recently used
+    True
+    >>> cache.stats()
+    {'hits': 1, 'misses': 1, 'size': 2, 'maxsize': 2}
+
+    """
+
+    def __init__(self, maxsize=10000, ttl=None):
+        if maxsize < 1:
+            raise ValueError('Cache size must be a positive integer.')
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict() # key -> (value, expiration time)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the value cached for `key`, or `default`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None: # Expired
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """Cache `value` for `key`."""
+        expiration = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expiration)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return the hits, misses, size and maximum size of the cache."""
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._entries), 'maxsize': self.maxsize}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        return (self.maxsize, self.ttl)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
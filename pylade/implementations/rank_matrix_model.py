@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Compiled model backed by a NumPy rank matrix.
+
+All language profiles share a global ngram vocabulary. The ranks of the ngrams
+are stored in a dense `languages x vocabulary` matrix, where `-1` marks ngrams
+missing from a language profile. A text profile is turned into a vector of
+vocabulary indices, and the distances from all languages are computed with a
+single vectorized operation.
+
+NumPy is an optional dependency, needed only by this module. It can be
+installed with `pip install "pylade[numpy]"`.
+
+"""
+
+try:
+    import numpy as np
+except ImportError: # pragma: no cover
+    np = None
+
+from .binary_model import MappedModel
+from .compiled_model import CompiledModel
+
+
+MISSING_RANK = -1
+
+
+class RankMatrixModel(CompiledModel):
+    """A `CompiledModel` that computes distances using a rank matrix.
+
+    Attributes:
+        languages (list): The language labels, in the same order as the rows
+            of `rank_matrix`.
+        vocabulary (dict): A dictionary mapping each ngram in the model to a
+            column of `rank_matrix`.
+        rank_matrix (numpy.ndarray): The rank of each ngram (column) in each
+            language profile (row), or `MISSING_RANK`. The last column is
+            reserved for ngrams that are not in `vocabulary`.
+
+    """
+
+    def __init__(self, training_profiles):
+        if np is None:
+            raise ImportError(
+                "The 'numpy' engine requires NumPy. Install it with "
+                "`pip install \"pylade[numpy]\"`.")
+        if isinstance(training_profiles, MappedModel):
+            self._init_from_mapped_model(training_profiles)
+            return
+        super().__init__(training_profiles)
+        self.languages = list(self)
+        self.vocabulary = dict()
+        for language in self.languages:
+            for ngram in self[language].ranks:
+                self.vocabulary.setdefault(ngram, len(self.vocabulary))
+
+        # The last column is never filled: it is used for unknown ngrams
+        self.rank_matrix = np.full(
+            (len(self.languages), len(self.vocabulary) + 1), MISSING_RANK,
+            dtype=np.int32)
+        for row, language in enumerate(self.languages):
+            ranks = self[language].ranks
+            columns = [self.vocabulary[ngram] for ngram in ranks]
+            self.rank_matrix[row, columns] = list(ranks.values())
+
+    def distances(self, text_profile, error_value):
+        """Compute the distance between a text profile and each language.
+
+        >>> model = RankMatrixModel({'en': ['h', 'e', 'l'], 'it': ['c', 'i']})
+        >>> model.distances(['h', 'e', 'x'], 10)
+        {'en': 10, 'it': 30}
+
+        """
+        return dict(zip(self.languages,
+                        self._distance_vector(text_profile, error_value).tolist()))
+
+    def nearest_language(self, text_profile, error_value):
+        distances = self._distance_vector(text_profile, error_value)
+        if not len(distances):
+            return None, None
+        row = int(distances.argmin()) # First minimum, as in `CompiledModel`
+        return self.languages[row], int(distances[row])
+
+    def nearest_languages(self, text_profiles, error_value):
+        """Find the nearest language for each profile in `text_profiles`.
+
+        Profiles are scored together: each distinct ngram in the batch is looked
+        up in the vocabulary only once, and the distances of all texts from all
+        languages are computed with a single vectorized operation.
+
+        >>> model = RankMatrixModel({'en': ['h', 'e', 'l'], 'it': ['c', 'i']})
+        >>> model.nearest_languages([['h', 'e'], [], ['i', 'c']], 10)
+        [('en', 0), ('en', 0), ('it', 2)]
+
+        """
+        if not self.languages:
+            return [(None, None)] * len(text_profiles)
+        matched_distances, misses = self._distance_terms(text_profiles)
+        distances = matched_distances + misses * error_value
+
+        rows = distances.argmin(axis=0)
+        return [(self.languages[row], int(distances[row, column]))
+                for column, row in enumerate(rows.tolist())]
+
+    def nearest_languages_by_error_value(self, text_profiles, error_values):
+        """Find the nearest language for each text profile and error value.
+
+        The distance terms of each text are computed once, and then combined
+        with each error value.
+
+        >>> model = RankMatrixModel({'en': ['a'], 'it': ['x', 'y', 'z', 'b', 'a']})
+        >>> model.nearest_languages_by_error_value([['a', 'b']], [1, 10])
+        [('en', 'it')]
+
+        """
+        if not self.languages:
+            return [(None,) * len(error_values)] * len(text_profiles)
+        matched_distances, misses = self._distance_terms(text_profiles)
+        rows_by_error_value = [
+            (matched_distances + misses * error_value).argmin(axis=0).tolist()
+            for error_value in error_values]
+        return [tuple(self.languages[row] for row in rows)
+                for rows in zip(*rows_by_error_value)]
+
+    def subset(self, languages):
+        """Return a model restricted to some languages.
+
+        The vocabulary is shared with this model.
+
+        >>> model = RankMatrixModel({'en': ['h', 'e'], 'it': ['c', 'i']})
+        >>> model.subset({'it'}).rank_matrix.tolist()
+        [[-1, -1, 0, 1, -1]]
+
+        """
+        model = super().subset(languages)
+        rows = [row for row, language in enumerate(self.languages)
+                if language in languages]
+        model.languages = [self.languages[row] for row in rows]
+        model.rank_matrix = self.rank_matrix[rows]
+        return model
+
+    # Private methods #
+
+    def _init_from_mapped_model(self, mapped_model):
+        """Use the rank matrix of a binary model file in place."""
+        self.path = mapped_model.path
+        self._profiles = mapped_model # Profiles are decoded lazily
+        self.languages = list(mapped_model.languages)
+        self.vocabulary = mapped_model.decode_vocabulary()
+        self.rank_matrix = np.frombuffer(
+            mapped_model.rank_matrix, dtype=np.int32).reshape(
+                len(self.languages), len(self.vocabulary) + 1)
+
+    def _distance_terms(self, text_profiles):
+        """Compute the distance terms between text profiles and languages.
+
+        Each profile in the batch is a segment of a single array of vocabulary
+        columns. Each distinct ngram is looked up in the vocabulary only once.
+
+        Returns:
+            Two `languages x texts` matrices: the sum of the displacements of
+            matched ngrams and the number of missing ngrams.
+
+        """
+        lengths = np.fromiter(
+            (len(text_profile) for text_profile in text_profiles),
+            dtype=np.int64, count=len(text_profiles))
+        vocabulary, unknown = self.vocabulary, len(self.vocabulary)
+        columns_lookup = {
+            ngram: vocabulary.get(ngram, unknown)
+            for text_profile in text_profiles for ngram in text_profile}
+        columns = np.fromiter(
+            (columns_lookup[ngram]
+             for text_profile in text_profiles for ngram in text_profile),
+            dtype=np.int64, count=int(lengths.sum()))
+        # Position of each ngram inside its own text profile
+        segment_ends = np.cumsum(lengths)
+        offsets = segment_ends - lengths
+        positions = np.arange(len(columns)) - np.repeat(offsets, lengths)
+
+        ranks = self.rank_matrix[:, columns].astype(np.int64)
+        matched = ranks != MISSING_RANK
+        displacements = np.where(matched, np.abs(ranks - positions), 0)
+        return (_segment_sums(displacements, offsets, segment_ends),
+                _segment_sums(~matched, offsets, segment_ends))
+
+    def _distance_vector(self, text_profile, error_value):
+        vocabulary, unknown = self.vocabulary, len(self.vocabulary)
+        columns = np.fromiter(
+            (vocabulary.get(ngram, unknown) for ngram in text_profile),
+            dtype=np.int64, count=len(text_profile))
+
+        ranks = self.rank_matrix[:, columns].astype(np.int64)
+        matched = ranks != MISSING_RANK
+        return np.where(
+            matched, np.abs(ranks - np.arange(len(columns))), error_value
+            ).sum(axis=1)
+
+
+def _segment_sums(matrix, starts, ends):
+    """Sum each row of `matrix` over the column segments `[start, end)`."""
+    sums = np.zeros((matrix.shape[0], matrix.shape[1] + 1), dtype=np.int64)
+    np.cumsum(matrix, axis=1, out=sums[:, 1:])
+    return sums[:, ends] - sums[:, starts]
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Unicode scripts of texts and language profiles.
+
+A text written in Cyrillic is not going to be Thai, whatever its ngrams. The
+`ScriptFilter` learns which scripts are used by each language profile of a
+model, and restricts scoring to the languages using the scripts of a text.
+
+Python does not expose the Unicode script property of characters: the script
+of a letter is approximated by the first word of its Unicode name (e.g.
+'LATIN', 'CYRILLIC', 'HANGUL', 'CJK').
+
+"""
+
+from collections import Counter, defaultdict
+import unicodedata
+
+# Words of Unicode names which are not script names
+_WIDTH_PREFIXES = ('FULLWIDTH', 'HALFWIDTH')
+_SCRIPT_ALIASES = {'KATAKANA-HIRAGANA': 'KATAKANA'}
+
+# Cache: character -> script
+_char_scripts = dict()
+
+
+def char_script(char):
+    """Return the script of a letter, or `None` for other characters.
+
+    >>> char_script('ж'), char_script('Ａ'), char_script('4')
+    ('CYRILLIC', 'LATIN', None)
+
+    """
+    try:
+        return _char_scripts[char]
+    except KeyError:
+        pass
+    script = None
+    if char.isalpha():
+        words = unicodedata.name(char, '').split()
+        if words and words[0] in _WIDTH_PREFIXES:
+            words = words[1:]
+        if words:
+            script = _SCRIPT_ALIASES.get(words[0], words[0])
+    _char_scripts[char] = script
+    return script
+
+def text_scripts(text, min_share=0.0):
+    """Find the scripts used by the letters of a text.
+
+    Args:
+        text (str): A text.
+        min_share (float): The minimum fraction of the letters of the text
+            that a script must account for.
+
+    Returns:
+        A set of script names.
+
+    >>> sorted(text_scripts('Привет, hello!'))
+    ['CYRILLIC', 'LATIN']
+    >>> text_scripts('Привет, hello!', min_share=0.5)
+    {'CYRILLIC'}
+
+    """
+    counts = Counter(char_script(char) for char in text)
+    counts.pop(None, None)
+    total = sum(counts.values())
+    return {script for script, count in counts.items()
+            if count >= min_share * total}
+
+
+class ScriptFilter(object):
+    """Restrict the languages of a model to those using the scripts of a text.
+
+    The scripts of each language are learned from the ngrams of its training
+    profile. Texts whose scripts are not used by any language (or which have no
+    letters at all) are scored against the whole model.
+
+    Args:
+        compiled_model (CompiledModel): The model to be filtered.
+        min_profile_share (float): The minimum fraction of the letters of a
+            training profile that a script must account for, to be considered
+            a script of the language. It makes the filter robust to stray
+            ngrams (e.g. foreign names in the training texts).
+        min_text_share (float): The minimum fraction of the letters of a text
+            that a script must account for.
+
+    Attributes:
+        languages_by_script (dict): A dictionary mapping each script to the
+            languages using it, in the same order as the model.
+
+    >>> from pylade.implementations import CompiledModel
+    >>> model = CompiledModel({'en': ['th', 'he'], 'ru': ['пр', 'ри'],
+    ...                        'it': ['ch', 'he']})
+    >>> script_filter = ScriptFilter(model)
+    >>> list(script_filter.candidate_model('Привет'))
+    ['ru']
+    >>> script_filter.candidate_model('42') is model
+    True
+
+    """
+
+    def __init__(self, compiled_model, min_profile_share=0.05,
+                 min_text_share=0.1):
+        self.model = compiled_model
+        self.min_text_share = min_text_share
+        self.languages_by_script = defaultdict(list)
+        for language, profile in compiled_model.items():
+            for script in text_scripts(''.join(profile), min_profile_share):
+                self.languages_by_script[script].append(language)
+        # Cache: candidate languages -> restricted model
+        self._models = dict()
+
+    def candidate_languages(self, text):
+        """Return the set of languages which use the scripts of `text`.
+
+        The set is empty if no language uses them.
+
+        """
+        return {language
+                for script in text_scripts(text, self.min_text_share)
+                for language in self.languages_by_script.get(script, ())}
+
+    def candidate_model(self, text):
+        """Return the model restricted to the candidate languages of `text`.
+
+        Restricted models are built once for each set of candidate languages.
+
+        """
+        languages = frozenset(self.candidate_languages(text))
+        if not languages or len(languages) == len(self.model):
+            return self.model
+        model = self._models.get(languages)
+        if model is None:
+            model = self.model.subset(languages)
+            self._models[languages] = model
+        return model
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tokenizers used to split texts before extracting ngrams.
+
+The default tokenizer is a regular expression equivalent to NLTK's
+`wordpunct_tokenize`, so that NLTK (which is slow to import) is only needed
+when explicitly requested.
+
+"""
+
+import re
+
+# Same pattern (and flags) used by `nltk.tokenize.WordPunctTokenizer`
+_WORDPUNCT_PATTERN = re.compile(
+    r'\w+|[^\w\s]+', re.UNICODE | re.MULTILINE | re.DOTALL)
+
+
+def wordpunct_tokenize(text):
+    """Split a text into sequences of alphanumeric and of other characters.
+
+    >>> wordpunct_tokenize("Good muffins cost $3.88 in New York.")
+    ['Good', 'muffins', 'cost', '$', '3', '.', '88', 'in', 'New', 'York', '.']
+
+    """
+    return _WORDPUNCT_PATTERN.findall(text)
+
+def nltk_wordpunct_tokenize(text):
+    """Tokenize `text` using NLTK's `wordpunct_tokenize`.
+
+    NLTK is imported the first time this function is called. It is an optional
+    dependency, installed with `pip install "pylade[nltk]"`.
+
+    """
+    from nltk.tokenize import wordpunct_tokenize as nltk_tokenize
+    return nltk_tokenize(text)
+
+TOKENIZERS = {
+    'wordpunct': wordpunct_tokenize,
+    'nltk': nltk_wordpunct_tokenize,
+}
+
+
+def get_tokenizer(name):
+    """Return the tokenizer function registered as `name`.
+
+    Args:
+        name (str): One of the keys of `TOKENIZERS`.
+
+    Raises:
+        ValueError: If no tokenizer is registered as `name`.
+
+    """
+    try:
+        return TOKENIZERS[name]
+    except KeyError:
+        raise ValueError('Unknown tokenizer {!r}. Available tokenizers: {}'.format(
+            name, ', '.join(sorted(TOKENIZERS)))) from None
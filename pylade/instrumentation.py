@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Opt-in timings and counters of the stages of language detection.
+
+An `Instrumentation` object records how much time is spent in each stage
+(e.g. tokenization, ngram extraction, profile ranking, scoring) and counts
+events (e.g. texts, ngrams, cache hits, languages scored). Implementations
+only record them if they are given one (see the `instrumentation` argument of
+`CavnarTrenkleImpl`): otherwise, the cost is a single check per stage.
+
+The `--profile` option of the `pylade`, `pylade_train` and `pylade_eval`
+scripts writes a report on standard error, and `--cprofile FILE` saves
+`cProfile` statistics, to be read with `pstats` (`python -m pstats FILE`).
+
+"""
+
+from collections import defaultdict
+import sys
+import time
+
+
+class Instrumentation(object):
+    """Record the time spent in each stage, and count events.
+
+    Worker processes do not record anything: with several workers, only the
+    work done in the main process is measured.
+
+    Attributes:
+        seconds (dict): A dictionary mapping each stage to its total time.
+        calls (dict): A dictionary mapping each stage to its number of calls.
+        counters (dict): A dictionary mapping each counter to its count.
+
+    >>> instrumentation = Instrumentation()
+    >>> with instrumentation.timer('tokenize'):
+    ...     tokens = 'Hello world'.split()
+    >>> instrumentation.count('texts')
+    >>> instrumentation.report()['counters']
+    {'texts': 1}
+    >>> instrumentation.report()['stages']['tokenize']['calls']
+    1
+
+    """
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+
+    def timer(self, stage):
+        """Return a context manager recording the time spent in `stage`."""
+        return _StageTimer(self, stage)
+
+    def add_time(self, stage, seconds, calls=1):
+        """Record `seconds` spent in `stage`."""
+        self.seconds[stage] += seconds
+        self.calls[stage] += calls
+
+    def count(self, name, count=1):
+        """Add `count` to the counter `name`."""
+        self.counters[name] += count
+
+    def report(self):
+        """Return the timings of each stage and the counters.
+
+        Returns:
+            A dictionary like `{'stages': {'score': {'calls': 10, 'seconds':
+            0.02, 'mean_ms': 2.0}}, 'counters': {'texts': 10}}`.
+
+        """
+        return {
+            'stages': {stage: {'calls': self.calls[stage],
+                               'seconds': seconds,
+                               'mean_ms': 1000 * seconds / self.calls[stage]
+                                          if self.calls[stage] else None}
+                       for stage, seconds in self.seconds.items()},
+            'counters': dict(self.counters),
+        }
+
+    def format_report(self):
+        """Return the report as a text table, slowest stages first."""
+        lines = ['{:<20} {:>10} {:>12} {:>12}'.format(
+            'stage', 'calls', 'seconds', 'mean ms')]
+        for stage, seconds in sorted(self.seconds.items(),
+                                     key=lambda item: -item[1]):
+            calls = self.calls[stage]
+            lines.append('{:<20} {:>10} {:>12.4f} {:>12.4f}'.format(
+                stage, calls, seconds, 1000 * seconds / calls if calls else 0))
+        for name, count in sorted(self.counters.items()):
+            lines.append('{:<20} {:>10}'.format(name, count))
+        return '\n'.join(lines) + '\n'
+
+
+def run_profiled(function, arguments):
+    """Run the main function of a script, profiling it as requested.
+
+    If `arguments['profile']` is true, an `Instrumentation` object is added to
+    `arguments` (as `'instrumentation'`) and its report is written on standard
+    error at the end. If `arguments['cprofile_output']` is given, the whole
+    function runs under `cProfile`, and its statistics are saved to that file.
+
+    Args:
+        function (callable): The function to be run with `arguments`.
+        arguments (dict): The arguments of the script.
+
+    Returns:
+        The value returned by `function`.
+
+    """
+    instrumentation = Instrumentation() if arguments.get('profile') else None
+    arguments['instrumentation'] = instrumentation
+    profiler = None
+    if arguments.get('cprofile_output'):
+        # Imported here, since profiling is rarely needed
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        return function(arguments)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(arguments['cprofile_output'])
+        if instrumentation is not None:
+            sys.stderr.write(instrumentation.format_report())
+
+
+class _StageTimer(object):
+    """Context manager used by `Instrumentation.timer`."""
+
+    __slots__ = ('instrumentation', 'stage', 'start')
+
+    def __init__(self, instrumentation, stage):
+        self.instrumentation = instrumentation
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.add_time(self.stage, time.perf_counter() - self.start)
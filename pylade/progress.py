@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Progress reporting for long operations (training, evaluation, detection).
+
+A `ProgressReporter` counts the items processed in each stage of an
+operation, and the events of interest (e.g. correct predictions). Counters are
+always available (see `counters` and `stats`), while progress lines are only
+written to a terminal, at most once per `interval` seconds: reporting costs a
+few attribute lookups per item, not a write per item.
+
+Implementations accept any object with the same methods (e.g. to send metrics
+elsewhere).
+
+"""
+
+from collections import defaultdict
+import sys
+import time
+
+
+# Values of the `--progress` option of the scripts: mode -> `enabled` argument
+PROGRESS_MODES = {'auto': None, 'always': True, 'never': False}
+
+
+class ProgressReporter(object):
+    """Count processed items and report progress, rate-limited.
+
+    Args:
+        stream: The stream progress is written to. Defaults to `sys.stderr`.
+        interval (float): The minimum number of seconds between two progress
+            lines.
+        enabled (bool): Whether to write progress lines. By default, they are
+            written only if `stream` is a terminal.
+
+    Attributes:
+        counters (dict): A dictionary mapping each stage and counter name to
+            its count.
+        elapsed (dict): A dictionary mapping each finished stage to its
+            duration in seconds (of its last run, if it ran many times).
+
+    >>> reporter = ProgressReporter(enabled=False)
+    >>> reporter.start('evaluate')
+    >>> for correct in [True, False, True]:
+    ...     reporter.advance()
+    ...     reporter.increment('correct', int(correct))
+    >>> reporter.finish()
+    >>> dict(reporter.counters)
+    {'evaluate': 3, 'correct': 2}
+
+    """
+
+    def __init__(self, stream=None, interval=0.5, enabled=None):
+        self.stream = sys.stderr if stream is None else stream
+        self.interval = interval
+        if enabled is None:
+            isatty = getattr(self.stream, 'isatty', None)
+            enabled = bool(isatty and isatty())
+        self.enabled = enabled
+        self.counters = defaultdict(int)
+        self.elapsed = dict()
+        self.stage = None
+        self.total = None
+        self._start_time = None
+        self._start_count = 0
+        self._next_report = 0.0
+        self._rates = dict()
+
+    def start(self, stage, total=None):
+        """Start counting the items of a new stage.
+
+        Args:
+            stage (str): The name of the stage (e.g. `'evaluate'`).
+            total (int): The number of items of the stage, if known.
+
+        """
+        self.stage = stage
+        self.total = total
+        self._start_count = self.counters[stage]
+        self._start_time = time.monotonic()
+        self._next_report = self._start_time + self.interval
+
+    def advance(self, count=1):
+        """Count `count` more processed items in the current stage."""
+        self.counters[self.stage] += count
+        if self.enabled:
+            now = time.monotonic()
+            if now >= self._next_report:
+                self._next_report = now + self.interval
+                self._write_progress(now, end='\r')
+
+    def increment(self, name, count=1):
+        """Add `count` to the counter `name`."""
+        self.counters[name] += count
+
+    def finish(self):
+        """End the current stage, writing its final progress line."""
+        if self.stage is None:
+            return
+        now = time.monotonic()
+        elapsed = now - self._start_time
+        self.elapsed[self.stage] = elapsed
+        self._rates[self.stage] = (
+            (self.counters[self.stage] - self._start_count) / elapsed
+            if elapsed else None)
+        if self.enabled:
+            self._write_progress(now, end='\n')
+        self.stage = None
+
+    def info(self, message):
+        """Write a message, if progress is reported."""
+        if self.enabled:
+            self.stream.write(message + '\n')
+            self.stream.flush()
+
+    def stats(self):
+        """Return the counters, and the duration and rate of each finished stage."""
+        stats = {'counters': dict(self.counters), 'stages': dict()}
+        for stage, elapsed in self.elapsed.items():
+            stats['stages'][stage] = {
+                'seconds': elapsed, 'per_second': self._rates[stage]}
+        return stats
+
+    def __getstate__(self):
+        # Worker processes do not report progress
+        return {'interval': self.interval}
+
+    def __setstate__(self, state):
+        self.__init__(interval=state['interval'], enabled=False)
+
+    # Private methods #
+
+    def _write_progress(self, now, end):
+        count = self.counters[self.stage] - self._start_count
+        elapsed = now - self._start_time
+        line = '{}: {}'.format(self.stage, count)
+        if self.total:
+            line += '/{} ({:.0%})'.format(self.total, count / self.total)
+        if elapsed > 0:
+            line += ' [{:.0f}/s]'.format(count / elapsed)
+        self.stream.write(line + '   ' + end)
+        self.stream.flush()
+
+
+def create_reporter(mode='auto'):
+    """Create a reporter for a `--progress` mode (see `PROGRESS_MODES`)."""
+    return ProgressReporter(enabled=PROGRESS_MODES[mode])
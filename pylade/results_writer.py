@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Incremental writer for evaluation results.
+
+Evaluations yield one result per tested language and error value, e.g.
+`{'it': {'8000': 0.97}}`. Results are merged into a single nested dictionary,
+e.g. `{'it': {'100': 0.91, '8000': 0.97}, 'de': {'8000': 0.95}}`.
+
+Rewriting the whole results file after each result takes quadratic time. A
+`ResultsWriter` appends each result to a JSON Lines file instead, and keeps
+the merged results in memory. The nested JSON file is written once, when the
+writer is closed.
+
+"""
+
+import json
+import logging
+import os
+
+JOURNAL_SUFFIX = '.jsonl'
+
+
+class ResultsWriter(object):
+    """Append evaluation results to a file as they are computed.
+
+    Results already in the output file are kept: new results are merged into
+    them, like in previous evaluations. If an evaluation is interrupted, the
+    results written so far are recovered by the next writer using the same
+    output file.
+
+    Args:
+        output_file (str): The path of the results file.
+        compact (bool): If true, the output file contains the merged results
+            as nested JSON, and results are appended to a temporary journal
+            (`output_file` followed by `JOURNAL_SUFFIX`) until the writer is
+            closed. Otherwise, results are appended to the output file itself,
+            one JSON object per line (a nested JSON output file is rewritten
+            first, with a line per label).
+
+    Attributes:
+        results (dict): The merged results.
+
+    """
+
+    def __init__(self, output_file, compact=True):
+        self.output_file = output_file
+        self.compact = compact
+        self.journal_file = output_file + JOURNAL_SUFFIX if compact else output_file
+        self.results = dict()
+        if compact:
+            _merge_results(self.results, _read_results(output_file))
+        else:
+            # Lines appended to nested JSON could not be read back
+            _rewrite_as_json_lines(output_file)
+        _merge_results(self.results, _read_results(self.journal_file))
+        self._journal = open(self.journal_file, mode='a')
+        if self._journal.tell() and not _ends_with_newline(self.journal_file):
+            self._journal.write('\n') # After a line truncated by an interruption
+
+    def write(self, result):
+        """Merge a result and append it to the journal.
+
+        Args:
+            result (dict): A dictionary mapping labels to dictionaries of
+                results (e.g. `{'it': {'8000': 0.97}}`).
+
+        """
+        _merge_results(self.results, [result])
+        self._journal.write(json.dumps(result) + '\n')
+        self._journal.flush()
+
+    def close(self):
+        """Close the journal, and write the nested JSON file if `compact`."""
+        if self._journal is None:
+            return
+        self._journal.close()
+        self._journal = None
+        if self.compact:
+            compact_results(self.journal_file, self.output_file, self.results)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def compact_results(journal_file, output_file, results=None):
+    """Write the results of a JSON Lines file as a nested JSON file.
+
+    The output file is replaced atomically, and the journal is removed.
+
+    Args:
+        journal_file (str): The path of the JSON Lines file.
+        output_file (str): The path of the nested JSON file.
+        results (dict): The merged results, if already known. Otherwise, they
+            are read from `journal_file` and merged into those in
+            `output_file`.
+
+    """
+    if results is None:
+        results = dict()
+        _merge_results(results, _read_results(output_file))
+        _merge_results(results, _read_results(journal_file))
+    logging.info("Writing results file: %s", output_file)
+    temporary_file = output_file + '.tmp'
+    with open(temporary_file, mode='w') as f:
+        f.write(json.dumps(results, indent=2))
+    os.replace(temporary_file, output_file)
+    if os.path.isfile(journal_file):
+        os.remove(journal_file)
+
+def load_results(results_file):
+    """Load the merged results of a nested JSON or JSON Lines file.
+
+    >>> import tempfile
+    >>> with tempfile.NamedTemporaryFile('w', suffix='.jsonl') as f:
+    ...     _ = f.write('{"it": {"100": 0.5}}\\n{"it": {"8000": 0.75}}\\n')
+    ...     f.flush()
+    ...     load_results(f.name)
+    {'it': {'100': 0.5, '8000': 0.75}}
+
+    """
+    results = dict()
+    _merge_results(results, _read_results(results_file))
+    return results
+
+
+# Private functions
+
+def _merge_results(results, new_results):
+    for result in new_results:
+        for label, label_results in result.items():
+            results.setdefault(label, dict()).update(label_results)
+
+def _ends_with_newline(path):
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+def _rewrite_as_json_lines(results_file):
+    """Rewrite a nested JSON results file as JSON Lines, with a line per label.
+
+    Missing files and JSON Lines files are left as they are.
+
+    """
+    if not os.path.isfile(results_file):
+        return
+    with open(results_file) as f:
+        content = f.read()
+    if '\n' not in content.strip(): # Empty, or a single line of JSON Lines
+        return
+    try:
+        results = json.loads(content)
+    except ValueError: # Several JSON objects: JSON Lines
+        return
+    temporary_file = results_file + '.tmp'
+    with open(temporary_file, mode='w') as f:
+        for label, label_results in results.items():
+            f.write(json.dumps({label: label_results}) + '\n')
+    os.replace(temporary_file, results_file)
+
+def _read_results(results_file):
+    """Return the results in a file, as a list of dictionaries.
+
+    Both nested JSON files and JSON Lines files are read. Missing or empty
+    files have no results, and so has a last line truncated by an
+    interrupted evaluation.
+
+    """
+    if not os.path.isfile(results_file) or os.path.getsize(results_file) == 0:
+        return []
+    with open(results_file) as f:
+        content = f.read()
+    try:
+        return [json.loads(content)]
+    except ValueError: # Several JSON objects: JSON Lines
+        pass
+    results = []
+    for line in content.splitlines():
+        if line.strip():
+            try:
+                results.append(json.loads(line))
+            except ValueError:
+                logging.warning("Skipping invalid results line: %s", line)
+    return results
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Long-running language detection server.
+
+A `DetectionService` (see `pylade.detection_service`) keeps a model in memory,
+so that detection requests do not pay the cost of loading it. `make_server`
+exposes a service over HTTP, either on a TCP port or on a Unix
+socket. Requests are JSON objects sent with `POST /detect`:
+
+    {"text": "Put text here"}             -> {"language": "en"}
+    {"texts": ["Put text", "Metti testo"]} -> {"languages": ["en", "it"]}
+
+Texts must be strings: other requests are answered with status 400, and
+requests whose body is larger than `MAX_REQUEST_SIZE` bytes with status 413.
+
+`GET /health` can be used to check that the service is running, and
+`GET /stats` returns the statistics of the prediction cache, if any (see
+`DetectionService.stats`).
+
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import os
+import socketserver
+
+MAX_REQUEST_SIZE = 16 * 1024 * 1024
+
+
+class DetectionRequestHandler(BaseHTTPRequestHandler):
+    """Handle HTTP requests for the `DetectionService` of the server."""
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif self.path == '/stats':
+            self._send_json(200, self.server.service.stats())
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        if self.path != '/detect':
+            self._send_json(404, {'error': 'Not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {'error': 'Invalid Content-Length.'})
+            return
+        if length > self.server.max_request_size:
+            self.close_connection = True # The body is not read
+            self._send_json(413, {'error': 'Requests are limited to {} bytes.'.format(
+                self.server.max_request_size)})
+            return
+        try:
+            request = json.loads(self.rfile.read(length).decode('utf-8'))
+            if not isinstance(request, dict):
+                raise ValueError('Requests must be JSON objects.')
+            if 'texts' in request:
+                texts = request['texts']
+                if not (isinstance(texts, list)
+                        and all(isinstance(text, str) for text in texts)):
+                    raise ValueError("'texts' must be a list of strings.")
+                response = {'languages': self.server.service.detect_batch(texts)}
+            elif 'text' in request:
+                if not isinstance(request['text'], str):
+                    raise ValueError("'text' must be a string.")
+                response = {'language': self.server.service.detect(request['text'])}
+            else:
+                raise ValueError("Requests need a 'text' or 'texts' field.")
+        except (UnicodeDecodeError, ValueError) as exception:
+            self._send_json(400, {'error': str(exception)})
+            return
+        except Exception: # pylint: disable=broad-except
+            logging.exception("Detection failed")
+            self._send_json(500, {'error': 'Internal server error'})
+            return
+        self._send_json(200, response)
+
+    def address_string(self):
+        # Unix sockets have no client address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+    # Private methods #
+
+    def _send_json(self, status, content):
+        body = json.dumps(content).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """A threading HTTP server listening on a Unix socket."""
+
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address) # Remove stale socket file
+        super().server_bind()
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+
+def make_server(service, host='127.0.0.1', port=8000, socket_path=None,
+                max_request_size=MAX_REQUEST_SIZE):
+    """Create an HTTP server answering detection requests.
+
+    Each connection is handled by a separate thread.
+
+    Args:
+        service (DetectionService): The service answering requests.
+        host (str): The address the server listens on.
+        port (int): The TCP port the server listens on. `0` picks a free port.
+        socket_path (str): If given, listen on this Unix socket instead of a
+            TCP port.
+        max_request_size (int): The maximum size of request bodies, in bytes.
+
+    Returns:
+        A server object. Call its `serve_forever` method to start serving.
+
+    """
+    if socket_path:
+        server = UnixHTTPServer(socket_path, DetectionRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), DetectionRequestHandler)
+    server.service = service
+    server.max_request_size = max_request_size
+    return server
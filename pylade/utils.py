@@ -3,9 +3,12 @@
 
 """Utility functions shared across the project."""
 
-from collections import defaultdict
+from collections import defaultdict, deque
+import heapq
+from itertools import islice
 import json
 import logging
+from operator import itemgetter
 import os
 import pickle
 
@@ -50,6 +53,121 @@ def merge_dictionaries_summing(first_dict, second_dict):
         first_dict[k] += v
     return first_dict
 
+def rank_by_frequency(frequencies_dict, limit=None):
+    """Return the keys of a dictionary sorted by their values.
+
+    Keys are sorted by value first, and then by key if values are equal, in
+    reverse order. This is the same as (but faster than):
+
+        sorted(frequencies_dict, key=lambda k: (frequencies_dict[k], k),
+               reverse=True)[:limit]
+
+    The sorting strategy depends on the data. When many keys share the same
+    value (e.g. ngram counts of a short text), keys are grouped by value and
+    only values are sorted. When `limit` is much smaller than the number of
+    keys, the `limit`-th largest value is selected first, and only the keys
+    with larger or equal values are sorted.
+
+    Args:
+        frequencies_dict (dict): A dictionary whose values are comparable
+            (e.g. integer frequencies).
+        limit (int): The maximum number of keys to return.
+
+    Returns:
+        A list of keys.
+
+    >>> rank_by_frequency({'a': 1, 'b': 3, 'c': 1, 'd': 2})
+    ['b', 'd', 'c', 'a']
+    >>> rank_by_frequency({'a': 1, 'b': 3, 'c': 1, 'd': 2}, limit=3)
+    ['b', 'd', 'c']
+
+    """
+    size = len(frequencies_dict)
+    if limit is None or limit > size:
+        limit = size
+    if limit <= 0:
+        return []
+
+    values = set(frequencies_dict.values())
+    if len(values) * 4 <= size:
+        # Many ties: group keys by value
+        buckets = defaultdict(list)
+        for key, value in frequencies_dict.items():
+            buckets[value].append(key)
+        ranked = []
+        for value in sorted(values, reverse=True):
+            ranked.extend(sorted(buckets[value], reverse=True))
+            if len(ranked) >= limit:
+                break
+        return ranked[:limit]
+
+    items = frequencies_dict.items()
+    if limit * 8 <= size:
+        # Partial selection: only sort items which can be in the result
+        threshold = heapq.nlargest(limit, frequencies_dict.values())[-1]
+        items = [item for item in items if item[1] >= threshold]
+    return [key for key, _ in sorted(
+        items, key=itemgetter(1, 0), reverse=True)[:limit]]
+
+def chunks(iterable, size):
+    """Split an iterable into lists of (at most) `size` elements.
+
+    Args:
+        iterable (iterable): The iterable to be split. It is consumed lazily.
+        size (int): The maximum number of elements in each chunk.
+
+    Yields:
+        Lists of consecutive elements of `iterable`.
+
+    >>> list(chunks(range(5), 2))
+    [[0, 1], [2, 3], [4]]
+
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def parallel_map(function, iterable, workers, initializer=None, initargs=(),
+                 max_pending=None):
+    """Apply `function` to each element of `iterable` using a process pool.
+
+    Unlike `ProcessPoolExecutor.map`, the iterable is consumed lazily: at most
+    `max_pending` tasks are submitted to the pool at any time, so memory usage
+    stays bounded. Results are yielded in the same order as the input.
+
+    Args:
+        function (callable): A picklable function taking a single argument.
+        iterable (iterable): The arguments `function` is applied to.
+        workers (int): The number of worker processes.
+        initializer (callable): A function called once by each worker process
+            when it starts (e.g. to load a model).
+        initargs (tuple): The arguments passed to `initializer`.
+        max_pending (int): The maximum number of tasks submitted to the pool
+            and not yet consumed. Defaults to twice the number of workers.
+
+    Yields:
+        The result of `function` for each element of `iterable`.
+
+    """
+    # Imported here, since it loads `multiprocessing`
+    from concurrent.futures import ProcessPoolExecutor
+
+    if max_pending is None:
+        max_pending = 2 * workers
+    with ProcessPoolExecutor(
+            max_workers=workers, initializer=initializer,
+            initargs=initargs) as executor:
+        pending = deque()
+        for item in iterable:
+            pending.append(executor.submit(function, item))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
 def save_file(content, output_file_path):
     """Save content to output file.
 
@@ -110,27 +228,51 @@ def convert_unknown_arguments(dictionary):
             dictionary[k] = False
     return dictionary
 
-# Private functions
+def implementation_arguments(arguments):
+    """Return the implementation arguments set by the options of a script.
+
+    A `reporter` is only given for `--progress always` or `--progress never`,
+    an `instrumentation` for `--profile`, an `engine` for `--engine` and a
+    `prediction_cache` for `--cache-size`: implementations which support none
+    of them can still be used.
+
+    Args:
+        arguments (dict): The arguments of the script.
 
-def _save_result(result, output_file):
-    res_list = []
-    # If file does not exist or it is empty
-    if not os.path.isfile(output_file) or os.path.getsize(output_file) == 0:
-        res_list.append(result)
-        with open(output_file, mode='w') as f:
-            f.write(json.dumps(result, indent=2))
-    else:
-        with open(output_file, 'r') as feeds_json:
-            previous_results = json.load(feeds_json)
-
-        for k, v in result.items():
-            if k in previous_results:
-                previous_results[k].update(v)
-            else:
-                previous_results[k] = v
-
-        with open(output_file, mode='w') as f:
-            f.write(json.dumps(previous_results, indent=2))
+    >>> implementation_arguments({'progress': 'auto', 'instrumentation': None})
+    {}
+
+    """
+    implementation_arguments = dict()
+    progress = arguments.get('progress', 'auto')
+    if progress != 'auto': # Implementations report progress on terminals by default
+        # Imported here, since progress is not always configured
+        from pylade.progress import create_reporter
+        implementation_arguments['reporter'] = create_reporter(progress)
+    if arguments.get('instrumentation') is not None:
+        implementation_arguments['instrumentation'] = arguments['instrumentation']
+    if arguments.get('engine') is not None:
+        implementation_arguments['engine'] = arguments['engine']
+    if arguments.get('cache_size'):
+        # Imported here, since the cache is optional
+        from pylade.implementations.prediction_cache import PredictionCache
+        implementation_arguments['prediction_cache'] = PredictionCache(
+            arguments['cache_size'], arguments.get('cache_ttl'))
+    return implementation_arguments
+
+def corpus_reader_arguments(arguments):
+    """Return the corpus reader arguments set by the options of a script.
+
+    `use_index` is only given for `--use-index`, so that corpus readers without
+    an index can still be used.
+
+    >>> corpus_reader_arguments({'use_index': True})
+    {'use_index': True}
+
+    """
+    return {'use_index': True} if arguments.get('use_index') else {}
+
+# Private functions
 
 def _save_as_pickle(content, output_file_path):
     logging.info("Writing pickle file: %s", output_file_path)
@@ -141,6 +283,11 @@ def _save_as_json(content, output_file_path, indent=2):
     with open(output_file_path, mode='w') as f:
         f.write(json.dumps(content, indent=indent))
 
+def _save_as_binary_model(content, output_file_path):
+    logging.info("Writing binary model file: %s", output_file_path)
+    from pylade.implementations.binary_model import save_binary_model
+    save_binary_model(content, output_file_path)
+
 def _save_generic_file(content, output_file_path):
     with open(output_file_path, 'w') as f:
         f.write(content)
@@ -162,6 +309,10 @@ def _load_json_file(input_file):
 def _load_pickle_file(input_file):
     return pickle.load(open(input_file, "rb"))
 
+def _load_binary_model(input_file):
+    from pylade.implementations.binary_model import load_binary_model
+    return load_binary_model(input_file)
+
 def _configure_logger(loglevel):
     """Configure logging levels."""
     logging.basicConfig(
@@ -185,10 +336,12 @@ def _supported_formats_functions():
     return {
         'save': {
             '.json'  : _save_as_json,
-            '.pickle': _save_as_pickle
+            '.pickle': _save_as_pickle,
+            '.pylade': _save_as_binary_model
         },
         'load': {
             '.json'  : _load_json_file,
-            '.pickle': _load_pickle_file
+            '.pickle': _load_pickle_file,
+            '.pylade': _load_binary_model
         }
     }
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- codec: utf-8 -*-
+
+"""Tests for the binary model format."""
+
+import pytest
+
+from pylade.implementations import CavnarTrenkleImpl
+from pylade.implementations.binary_model import MappedModel
+from pylade import utils
+
+
+@pytest.fixture()
+def model():
+    return utils.load_file('pylade/data/model.json')
+
+@pytest.fixture()
+def binary_model_path(model, tmpdir):
+    path = str(tmpdir.join('model.pylade'))
+    utils.save_file(model, path)
+    return path
+
+
+class TestBinaryModel(object):
+    """Tests for `.pylade` model files."""
+
+    def test_round_trip(self, model, binary_model_path):
+        mapped_model = utils.load_file(binary_model_path)
+
+        assert isinstance(mapped_model, MappedModel)
+        assert list(mapped_model) == list(model)
+        assert mapped_model.to_dict() == model
+        assert mapped_model['en'].index(model['en'][42]) == 42
+
+    def test_unicode_and_empty_profiles(self, tmpdir):
+        model = {'ru': ['и', 'пр', 'ив'], 'ja': ['日本', 'の'], 'empty': []}
+        path = str(tmpdir.join('model.pylade'))
+        utils.save_file(model, path)
+        assert utils.load_file(path).to_dict() == model
+
+    def test_predictions(self, model, binary_model_path):
+        texts = ['This is an english text', 'Questo è un testo italiano',
+                 'Dies ist ein deutscher Text']
+        engines = ['python']
+        try:
+            import numpy
+            engines.append('numpy')
+        except ImportError:
+            pass
+
+        for engine in engines:
+            impl = CavnarTrenkleImpl(engine=engine)
+            mapped_model = utils.load_file(binary_model_path)
+            assert (list(impl.predict_languages(texts, mapped_model)) ==
+                    list(impl.predict_languages(texts, model)))
+
+    def test_source_and_workers(self, model, binary_model_path):
+        """Worker processes map the binary model file instead of a copy."""
+        engines = ['python', 'pruned']
+        try:
+            import numpy
+            engines.append('numpy')
+        except ImportError:
+            pass
+        instances = [{'language': 'en', 'text': 'This is an english text'},
+                     {'language': 'it', 'text': 'Questo è un testo italiano'}]
+
+        for engine in engines:
+            impl = CavnarTrenkleImpl(engine=engine)
+            compiled_model = impl.compile_model(utils.load_file(binary_model_path))
+            assert compiled_model.source() == binary_model_path
+            assert compiled_model.subset({'en'}).source() == \
+                {'en': list(model['en'])}
+            assert list(impl.evaluate(compiled_model, instances, workers=2)) == \
+                list(impl.evaluate(model, instances))
+        assert CavnarTrenkleImpl().compile_model(model).source() == model
+
+    def test_invalid_file(self, tmpdir):
+        path = str(tmpdir.join('model.pylade'))
+        with open(path, 'wb') as model_file:
+            model_file.write(b'{"en": ["a"]}')
+        with pytest.raises(ValueError):
+            utils.load_file(path)
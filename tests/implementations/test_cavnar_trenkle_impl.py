@@ -3,7 +3,12 @@
 
 """Tests for CavnarTrenkleImpl."""
 
+import pytest
+
 from pylade.implementations import CavnarTrenkleImpl
+from pylade import utils
+from pylade.progress import ProgressReporter
+from pylade.corpus_readers import TwitterCorpusReader
 
 
 class TestCavnarTrenkleImpl(object):
@@ -44,3 +49,190 @@ class TestCavnarTrenkleImpl(object):
         }
 
         assert result == expected
+
+    def test_predict_languages(self):
+        """Batch predictions must match single predictions."""
+        impl = CavnarTrenkleImpl()
+        model = utils.load_file('pylade/data/model.json')
+        texts = ['This is an english text', 'Questo è un testo italiano',
+                 'This is an english text', 'Dies ist ein deutscher Text', '']
+
+        expected = [impl.predict_language(text, model) for text in texts]
+        assert list(impl.predict_languages(texts, model, batch_size=2)) == expected
+
+        scored = list(impl.predict_languages(iter(texts), model, with_scores=True))
+        assert [language for language, _ in scored] == expected
+        assert scored[0] == scored[2]
+
+    def test_predict_language_scores(self):
+        """Test that the top-k languages agree with `predict_language`."""
+        model = utils.load_file('pylade/data/model.json')
+        impl = CavnarTrenkleImpl()
+        for text in ['This is an english text', 'Questo è un testo italiano',
+                     'Dies ist ein deutscher Text']:
+            scores = impl.predict_language_scores(text, model)
+            top_scores = impl.predict_language_scores(text, model, top_k=3)
+
+            assert len(scores) == len(model)
+            assert scores[0][0] == impl.predict_language(text, model)
+            assert top_scores == scores[:3]
+            assert [distance for _, distance, _ in scores] == sorted(
+                distance for _, distance, _ in scores)
+            assert abs(sum(confidence for _, _, confidence in scores) - 1) < 1e-9
+
+        for top_k in [0, -1]:
+            with pytest.raises(ValueError):
+                impl.predict_language_scores('Some text', model, top_k=top_k)
+        for engine in ['python', 'pruned']:
+            assert CavnarTrenkleImpl(engine=engine).predict_language_scores(
+                'Some text', {}, top_k=1) == []
+            assert CavnarTrenkleImpl(engine=engine).predict_language_scores(
+                '', {}) == []
+
+    def test_corpus_reader_columns(self):
+        """Training and evaluating on a corpus reader must read only columns."""
+        corpus = TwitterCorpusReader('tests/test_files/training_set_example.csv')
+        impl = CavnarTrenkleImpl()
+        model = impl.train(corpus.all_instances(), limit=20)
+
+        assert impl.train(corpus, limit=20) == model
+        assert (list(impl.evaluate(model, corpus, languages=['en'])) ==
+                list(impl.evaluate(model, corpus.all_instances(), languages=['en'])))
+
+    def test_update(self):
+        """Updating a model must give the same model as training it again."""
+        instances = list(TwitterCorpusReader(
+            'tests/test_files/training_set_example.csv').all_instances())
+        old_instances, new_instances = instances[::2], instances[1::2]
+        for approximate in [False, True]:
+            impl = CavnarTrenkleImpl()
+            model = impl.train(old_instances, limit=20, keep_counts=True,
+                               approximate=approximate, sketch_factor=1000)
+            updated_model = impl.update(new_instances, model)
+            retrained_model = CavnarTrenkleImpl().train(
+                instances, limit=20, approximate=approximate, sketch_factor=1000)
+
+            assert updated_model == retrained_model
+
+    def test_update_with_other_settings(self):
+        """Counts cannot be updated with another ngram range or tokenizer."""
+        instances = [{'language': 'en', 'text': 'Some text'}]
+        trained = CavnarTrenkleImpl(ngram_range=(1, 3))
+        model = trained.train(instances, keep_counts=True)
+        for impl in [CavnarTrenkleImpl(), CavnarTrenkleImpl(ngram_range=(1, 3),
+                                                            tokenizer='nltk')]:
+            with pytest.raises(ValueError):
+                impl.update(instances, model, trained.ngram_counts)
+
+    def test_evaluate_with_workers(self):
+        """Results must not depend on the number of worker processes."""
+        impl = CavnarTrenkleImpl()
+        model = utils.load_file('pylade/data/model.json')
+        corpus = TwitterCorpusReader('tests/test_files/training_set_example.csv')
+        eval_args = {'languages': ['en', 'it'], 'error_values': [100, 8000],
+                     'split_languages': True}
+
+        expected = list(impl.evaluate(model, corpus.all_instances(), **eval_args))
+        result = list(impl.evaluate(
+            model, corpus.all_instances(), workers=2, **eval_args))
+        assert result == expected
+
+        instances = list(corpus.all_instances())
+        predictions = impl._predict_instances(
+            instances, impl.compile_model(model), [100, 8000], workers=2,
+            shard_size=2)
+        assert ([predicted for _, predicted in predictions] ==
+                list(zip(*[impl.predict_languages(
+                    [instance['text'] for instance in instances], model,
+                    error_value=error_value) for error_value in [100, 8000]])))
+
+    def test_evaluate_single_pass(self):
+        """Test instances can be a generator, even with many error values."""
+        impl = CavnarTrenkleImpl()
+        model = utils.load_file('pylade/data/model.json')
+        corpus = TwitterCorpusReader('tests/test_files/training_set_example.csv')
+        instances = list(corpus.all_instances())
+
+        result = list(impl.evaluate(
+            model, iter(instances), languages=['en', 'it'],
+            error_values=[100, 8000], split_languages=True))
+        expected = []
+        for language in ['en', 'it']:
+            for error_value in [100, 8000]:
+                language_instances = [instance for instance in instances
+                                      if instance['language'] == language]
+                correct = sum(
+                    impl.predict_language(
+                        instance['text'], model, error_value) == language
+                    for instance in language_instances)
+                expected.append({language: {
+                    str(error_value): correct / len(language_instances)}})
+        assert result == expected
+
+        result = list(impl.evaluate(model, iter(instances), error_values=8000))
+        correct = sum(
+            impl.predict_language(instance['text'], model) == instance['language']
+            for instance in instances)
+        assert result == [{'ALL': {'8000': correct / len(instances)}}]
+
+    def test_confusion_matrices(self):
+        """Per-language metrics agree with the results of `evaluate`."""
+        impl = CavnarTrenkleImpl()
+        model = utils.load_file('pylade/data/model.json')
+        instances = list(TwitterCorpusReader(
+            'tests/test_files/training_set_example.csv').all_instances())
+
+        matrices = impl.confusion_matrices(model, instances,
+                                           error_values=[100, 8000])
+        assert list(matrices) == [100, 8000]
+        for error_value, matrix in matrices.items():
+            assert matrix.total() == len(instances)
+            for language, metrics in matrix.metrics().items():
+                if metrics['support']:
+                    assert list(impl.evaluate(
+                        model, instances, languages=[language],
+                        error_values=error_value)) == [
+                            {language: {str(error_value): metrics['recall']}}]
+        assert list(impl.evaluation_results(matrices)) == list(
+            impl.evaluate(model, instances, error_values=[100, 8000]))
+
+    def test_reporter(self):
+        """Processed instances are counted by the reporter."""
+        reporter = ProgressReporter(enabled=False)
+        impl = CavnarTrenkleImpl(reporter=reporter)
+        corpus = TwitterCorpusReader('tests/test_files/training_set_example.csv')
+        n_instances = len(list(corpus.all_instances()))
+        model = impl.train(corpus, limit=20)
+        list(impl.evaluate(model, corpus))
+
+        assert reporter.counters['count'] == n_instances
+        assert reporter.counters['rank'] == len(model)
+        assert reporter.counters['evaluate'] == n_instances
+
+    def test_train_with_workers(self):
+        """Parallel training must give the same model as serial training."""
+        impl = CavnarTrenkleImpl()
+        corpus = TwitterCorpusReader('tests/test_files/training_set_example.csv')
+
+        expected = impl.train(corpus.all_instances(), limit=20)
+        assert impl.train(corpus, limit=20, workers=3) == expected
+        assert impl.train(
+            list(corpus.all_instances()), limit=20, workers=2) == expected
+
+    def test_train_with_workers_and_quotes(self, tmpdir):
+        """Quotes in unquoted fields must not move the shards of the corpus."""
+        impl = CavnarTrenkleImpl()
+        corpus_path = str(tmpdir.join('quotes.csv'))
+        with open(corpus_path, 'w') as corpus_file:
+            corpus_file.write('language|id_str|text\n')
+            for index in range(20):
+                corpus_file.write('en|{0}|a 5" screen\n'
+                                  'en|{0}|"multi\nline"\n'
+                                  'it|{0}|"un ""bel"" giorno"\n'
+                                  'it|{0}|ciao|extra\n'.format(index))
+        corpus = TwitterCorpusReader(corpus_path)
+
+        expected = impl.train(corpus.all_instances(), limit=20)
+        for workers in range(2, 6):
+            assert len(corpus.byte_ranges(workers)) == workers
+            assert impl.train(corpus, limit=20, workers=workers) == expected
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- codec: utf-8 -*-
+
+"""Tests for CompiledModel."""
+
+import random
+
+from pylade.implementations import CavnarTrenkleImpl, CompiledModel
+from pylade.implementations.compiled_model import PrunedModel
+from pylade import utils
+
+
+class TestCompiledModel(object):
+    """Tests for CompiledModel class."""
+
+    def test_ranks_match_list_index(self):
+        """Ranks must be the same as the positions in the original lists."""
+        training_profiles = {
+            'en': ['l', 'o', 'lo', 'llo', 'll', 'hello'],
+            'it': ['o', 'iao', 'ia', 'i', 'ciao']
+        }
+        model = CompiledModel(training_profiles)
+
+        for language, profile in training_profiles.items():
+            for ngram in profile:
+                assert model[language].index(ngram) == profile.index(ngram)
+        assert model.to_dict() == training_profiles
+
+    def test_predictions_match_plain_model(self):
+        """Predictions must not change when using a compiled model."""
+        impl = CavnarTrenkleImpl()
+        model = utils.load_file('pylade/data/model.json')
+        compiled_model = impl.compile_model(model)
+
+        assert impl.compile_model(model) is compiled_model
+        for text in ['This is an english text', 'Questo è un testo italiano',
+                     'Dies ist ein deutscher Text']:
+            assert (impl.predict_language(text, compiled_model) ==
+                    CavnarTrenkleImpl().predict_language(text, model))
+
+
+class TestPrunedModel(object):
+    """Tests for PrunedModel class."""
+
+    def test_same_results_as_exhaustive_search(self):
+        """Pruning must not change predictions, distances or tie-breaking."""
+        rng = random.Random(0)
+        alphabet = 'abcdef'
+        training_profiles = {
+            language: rng.sample(alphabet, rng.randint(0, len(alphabet)))
+            for language in ['l{}'.format(i) for i in range(20)]}
+        # Identical profiles produce ties
+        training_profiles['l20'] = training_profiles['l5']
+        model = CompiledModel(training_profiles)
+        pruned_model = PrunedModel(training_profiles)
+        pruned_model.prior_ngrams = 2
+
+        for _ in range(200):
+            text_profile = rng.sample(alphabet, rng.randint(0, len(alphabet)))
+            for error_value in [0, 1, 3, 8000]:
+                assert (pruned_model.nearest_language(text_profile, error_value) ==
+                        model.nearest_language(text_profile, error_value))
+
+    def test_pruned_engine(self):
+        """The 'pruned' engine must predict the same languages."""
+        model = utils.load_file('pylade/data/model.json')
+        for text in ['This is an english text', 'Questo è un testo italiano',
+                     'Dies ist ein deutscher Text', '']:
+            assert (CavnarTrenkleImpl(engine='pruned').predict_language(text, model) ==
+                    CavnarTrenkleImpl().predict_language(text, model))
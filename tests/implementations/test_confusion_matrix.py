@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for ConfusionMatrix."""
+
+from pylade.implementations.confusion_matrix import ConfusionMatrix
+
+
+class TestConfusionMatrix(object):
+    """Tests for ConfusionMatrix class."""
+
+    def test_counts(self):
+        """Labels found while counting are added to the matrix."""
+        matrix = ConfusionMatrix(['en'])
+        pairs = [('en', 'en'), ('en', 'it'), ('it', 'it'), ('de', ''),
+                 ('en', 'en'), ('de', 'en')]
+        for true_label, predicted_label in pairs:
+            matrix.add(true_label, predicted_label)
+
+        assert matrix.labels == ['en', 'it', 'de', '']
+        assert matrix.to_dict() == {'en': {'en': 2, 'it': 1}, 'it': {'it': 1},
+                                    'de': {'': 1, 'en': 1}}
+        assert matrix.total() == len(pairs)
+        assert matrix.correct(['en', 'de']) == 2
+        assert matrix.accuracy(['en', 'de']) == 2 / 5
+        assert matrix.accuracy(['fr']) == 0.0
+
+    def test_metrics(self):
+        matrix = ConfusionMatrix(['en', 'it', 'de'])
+        for true_label, predicted_label in [('en', 'en'), ('en', 'it'),
+                                            ('it', 'it'), ('it', 'en')]:
+            matrix.add(true_label, predicted_label)
+
+        assert matrix.metrics() == {
+            'en': {'precision': 0.5, 'recall': 0.5, 'f1': 0.5, 'support': 2},
+            'it': {'precision': 0.5, 'recall': 0.5, 'f1': 0.5, 'support': 2}}
+        assert matrix.f1('de') == 0.0
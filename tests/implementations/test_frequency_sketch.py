@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- codec: utf-8 -*-
+
+"""Tests for SpaceSavingSketch."""
+
+from collections import Counter
+import random
+
+from pylade.implementations import CavnarTrenkleImpl
+from pylade.implementations.frequency_sketch import (
+    SpaceSavingSketch,
+    profile_divergence
+    )
+
+
+def _random_frequencies(seed, size=300):
+    rng = random.Random(seed)
+    # Skewed distribution: a few frequent items and a long tail
+    items = [str(int(rng.paretovariate(1.2))) for _ in range(size)]
+    return [Counter(items[i:i + 10]) for i in range(0, size, 10)]
+
+
+class TestSpaceSavingSketch(object):
+    """Tests for SpaceSavingSketch class."""
+
+    def _check_guarantees(self, sketch, exact):
+        for item, true_count in exact.items():
+            estimate = sketch.counts.get(item)
+            if estimate is None:
+                assert true_count <= sketch.error_bound
+            else:
+                assert true_count <= estimate <= true_count + sketch.error_bound
+        assert len(sketch) <= 2 * sketch.capacity
+
+    def test_update_guarantees(self):
+        sketch = SpaceSavingSketch(capacity=5)
+        exact = Counter()
+        for freqs in _random_frequencies(seed=1):
+            sketch.update(freqs)
+            exact.update(freqs)
+        self._check_guarantees(sketch, exact)
+
+    def test_merge_guarantees(self):
+        first, second = SpaceSavingSketch(5), SpaceSavingSketch(5)
+        exact = Counter()
+        for freqs in _random_frequencies(seed=2):
+            first.update(freqs)
+            exact.update(freqs)
+        for freqs in _random_frequencies(seed=3):
+            second.update(freqs)
+            exact.update(freqs)
+        self._check_guarantees(first.merge(second), exact)
+
+    def test_approximate_training(self):
+        impl = CavnarTrenkleImpl()
+        labeled_instances = [
+            {'language': 'en', 'text': 'hello world, this is an english text'},
+            {'language': 'it', 'text': 'ciao mondo, questo è un testo italiano'},
+            {'language': 'en', 'text': 'another english sentence'}]
+        exact = impl.train(labeled_instances, limit=20)
+
+        # A large sketch keeps every ngram: the result is exact
+        assert impl.train(labeled_instances, limit=20, approximate=True,
+                          sketch_factor=100) == exact
+        assert all(report['error_bound'] == 0 and
+                   report['guaranteed_entries'] == 20
+                   for report in impl.approximation_report.values())
+
+        approximate = impl.train(labeled_instances, limit=20, approximate=True,
+                                 sketch_factor=1)
+        for language in exact:
+            assert len(approximate[language]) == 20
+            divergence = profile_divergence(approximate[language], exact[language])
+            assert 0 < divergence['overlap'] <= 1
+        assert profile_divergence(exact['en'], exact['en']) == {
+            'overlap': 1.0, 'mean_displacement': 0.0}
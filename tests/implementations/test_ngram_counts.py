@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for NgramCounts."""
+
+from array import array
+import io
+import sys
+
+import pytest
+
+from pylade.implementations import ngram_counts
+from pylade.implementations.frequency_sketch import SpaceSavingSketch
+from pylade.implementations.ngram_counts import NgramCounts
+
+
+class TestNgramCounts(object):
+    """Tests for NgramCounts class."""
+
+    def test_save_and_load(self, tmpdir):
+        """Saved counts must be loaded unchanged."""
+        sketch = SpaceSavingSketch(capacity=2)
+        sketch.update({'ж': 3, 'b': 2, 'c': 1, 'd': 1, 'e': 1})
+        counts = NgramCounts(
+            {'en': {'a': 2, 'ab': 1, 'é': 2 ** 40}, 'ru': sketch, 'xx': {}},
+            limit=10, ngram_range=(1, 3), tokenizer='wordpunct')
+        counts_file = str(tmpdir.join('model.counts'))
+        counts.save(counts_file)
+        loaded = NgramCounts.load(counts_file)
+
+        assert loaded.limit == 10
+        assert loaded.ngram_range == (1, 3)
+        assert loaded.tokenizer == 'wordpunct'
+        assert list(loaded) == ['en', 'ru', 'xx']
+        assert loaded['en'] == counts['en']
+        assert loaded['ru'].counts == sketch.counts
+        assert loaded['ru'].error_bound == sketch.error_bound
+        assert loaded.sketch_size() == 2
+
+    def test_unknown_settings(self, tmpdir):
+        """Counts without ngram range and tokenizer are loaded without them."""
+        counts_file = str(tmpdir.join('model.counts'))
+        NgramCounts({'en': {'a': 1}}).save(counts_file)
+        loaded = NgramCounts.load(counts_file)
+
+        assert (loaded.ngram_range, loaded.tokenizer) == (None, None)
+        loaded.check_compatible((1, 2), 'nltk')
+
+    def test_check_compatible(self):
+        counts = NgramCounts({}, ngram_range=(1, 5), tokenizer='wordpunct')
+        counts.check_compatible((1, 5), 'wordpunct')
+        with pytest.raises(ValueError):
+            counts.check_compatible((2, 5), 'wordpunct')
+        with pytest.raises(ValueError):
+            counts.check_compatible((1, 5), 'nltk')
+
+    def test_load_wrong_file(self, tmpdir):
+        """Other files must be rejected."""
+        counts_file = tmpdir.join('model.json')
+        counts_file.write('{}')
+        with pytest.raises((OSError, ValueError)):
+            NgramCounts.load(str(counts_file))
+
+    def test_write_array_on_big_endian_hosts(self, monkeypatch):
+        """Arrays are written little-endian, without being modified."""
+        monkeypatch.setattr(sys, 'byteorder', 'big')
+        values = array('I', [1, 2 ** 20])
+        output_file = io.BytesIO()
+        ngram_counts._write_array(output_file, values)
+
+        assert values == array('I', [1, 2 ** 20])
+        swapped = array('I', [1, 2 ** 20])
+        swapped.byteswap()
+        assert output_file.getvalue() == swapped.tobytes()
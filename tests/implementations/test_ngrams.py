@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- codec: utf-8 -*-
+
+"""Tests for ngram extraction."""
+
+from collections import defaultdict
+
+from nltk.tokenize import wordpunct_tokenize
+from nltk.util import ngrams
+
+from pylade.implementations import CavnarTrenkleImpl
+from pylade.implementations import tokenizers
+from pylade.implementations.ngrams import extract_ngram_freqs
+
+
+def _nltk_ngram_freqs(tokens, ngram_range):
+    """Reference implementation, based on `nltk.util.ngrams`."""
+    ngram_freqs = defaultdict(int)
+    for token in tokens:
+        for n in range(ngram_range[0], ngram_range[1] + 1):
+            for ngram in ngrams(token, n):
+                ngram_freqs[''.join(ngram)] += 1
+    return ngram_freqs
+
+
+class TestExtractNgramFreqs(object):
+    """Tests for `extract_ngram_freqs`."""
+
+    texts = [
+        'HeLLo', 'CIAO', '', 'a', 'This is an english example',
+        '#INCREDIBLE what this can do!!! http://t.co/xyz',
+        'Questo è un testo italiano, più o meno', 'Привет, как дела?',
+        '日本語のテキスト', 'aaaaaaa aaaaaaa']
+
+    def test_parity_with_nltk(self):
+        for text in self.texts:
+            tokens = wordpunct_tokenize(text.lower())
+            for ngram_range in [(1, 5), (1, 3), (2, 4), (3, 3)]:
+                assert (extract_ngram_freqs(tokens, ngram_range) ==
+                        _nltk_ngram_freqs(tokens, ngram_range))
+
+    def test_implementation_ngram_range(self):
+        impl = CavnarTrenkleImpl(ngram_range=(1, 2))
+        assert impl._extract_text_ngram_freqs('Ciao') == {
+            'c': 1, 'i': 1, 'a': 1, 'o': 1, 'ci': 1, 'ia': 1, 'ao': 1}
+
+    def test_tokenizers_parity_with_nltk(self):
+        regex_impl = CavnarTrenkleImpl()
+        nltk_impl = CavnarTrenkleImpl(tokenizer='nltk')
+        for text in self.texts:
+            assert (regex_impl._extract_text_ngram_freqs(text) ==
+                    nltk_impl._extract_text_ngram_freqs(text))
+            assert (tokenizers.wordpunct_tokenize(text) ==
+                    wordpunct_tokenize(text))
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for PredictionCache."""
+
+import pickle
+
+from pylade.implementations import CavnarTrenkleImpl, PredictionCache
+from pylade.implementations import prediction_cache
+from pylade import utils
+
+
+class TestPredictionCache(object):
+    """Tests for PredictionCache class."""
+
+    def test_ttl(self, monkeypatch):
+        """Expired entries must not be returned."""
+        now = [100.0]
+        monkeypatch.setattr(prediction_cache.time, 'monotonic', lambda: now[0])
+        cache = PredictionCache(maxsize=10, ttl=5)
+        cache.put('key', 'en')
+        now[0] += 4
+        assert cache.get('key') == 'en'
+        now[0] += 2
+        assert cache.get('key') is None
+        assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 0, 'maxsize': 10}
+
+    def test_pickle(self):
+        """Pickled caches must keep their settings, but not their entries."""
+        cache = PredictionCache(maxsize=10, ttl=5)
+        cache.put('key', 'en')
+        unpickled = pickle.loads(pickle.dumps(cache))
+        assert (unpickled.maxsize, unpickled.ttl, len(unpickled)) == (10, 5, 0)
+
+    def test_cached_predictions(self):
+        """Texts with the same normalized form must share a cache entry."""
+        model = utils.load_file('pylade/data/model.json')
+        cache = PredictionCache(maxsize=10)
+        implementation = CavnarTrenkleImpl(prediction_cache=cache)
+        texts = ['Good morning!', 'good MORNING !', 'Buongiorno a tutti']
+        expected = [CavnarTrenkleImpl().predict_language(text, model)
+                    for text in texts]
+
+        assert [implementation.predict_language(text, model)
+                for text in texts] == expected
+        assert (cache.hits, cache.misses) == (1, 2)
+        assert list(implementation.predict_languages(texts, model)) == expected
+        assert (cache.hits, cache.misses) == (4, 2)
+        assert list(implementation.predict_languages(
+            texts, model, error_value=10, with_scores=True)) == list(
+                CavnarTrenkleImpl().predict_languages(
+                    texts, model, error_value=10, with_scores=True))
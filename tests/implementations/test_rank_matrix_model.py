@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- codec: utf-8 -*-
+
+"""Tests for RankMatrixModel."""
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from pylade.implementations import CavnarTrenkleImpl, CompiledModel
+from pylade.implementations.rank_matrix_model import RankMatrixModel
+from pylade import utils
+
+
+class TestRankMatrixModel(object):
+    """Tests for RankMatrixModel class."""
+
+    def test_distances_match_python_engine(self):
+        """Distances must be the same computed by `_distance`."""
+        impl = CavnarTrenkleImpl()
+        text_profile = ['h', 'e', 'l', 'o', 'he']
+        training_profiles = {
+            'same': ['h', 'e', 'l', 'o', 'he'],
+            'shuffled': ['l', 'o', 'h', 'e', 'he'],
+            'partial': ['o', 'x', 'h'],
+            'empty': []
+        }
+        model = RankMatrixModel(training_profiles)
+
+        for error_value in [1000, 8000]:
+            expected = {
+                language: impl._distance(text_profile, profile, error_value)
+                for language, profile in training_profiles.items()}
+            assert model.distances(text_profile, error_value) == expected
+            assert (model.distances(text_profile, error_value) ==
+                    CompiledModel(training_profiles).distances(
+                        text_profile, error_value))
+
+        assert model.distances(text_profile, 1000)['same'] == 0
+        assert model.distances(text_profile, 1000)['shuffled'] == 8
+
+    def test_predictions_match_python_engine(self):
+        """Both engines must predict the same languages."""
+        model = utils.load_file('pylade/data/model.json')
+        python_impl = CavnarTrenkleImpl(engine='python')
+        numpy_impl = CavnarTrenkleImpl(engine='numpy')
+
+        assert isinstance(numpy_impl.compile_model(model), RankMatrixModel)
+        for text in ['This is an english text', 'Questo è un testo italiano',
+                     'Dies ist ein deutscher Text', '', '!!!']:
+            assert (numpy_impl.predict_language(text, model) ==
+                    python_impl.predict_language(text, model))
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            CavnarTrenkleImpl(engine='fortran')
+
+    def test_prefilter_with_numpy_engine(self):
+        """Restricted rank matrices must give the same predictions."""
+        model = utils.load_file('pylade/data/model.json')
+        texts = ['Привет как дела у тебя сегодня', 'This is an english text']
+        implementation = CavnarTrenkleImpl(engine='numpy', script_prefilter=True)
+
+        assert list(implementation.predict_languages(texts, model)) == ['ru', 'en']
+        assert implementation.predict_language(texts[0], model) == 'ru'
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for the script prefilter."""
+
+from pylade.implementations import CavnarTrenkleImpl
+from pylade.implementations.scripts import ScriptFilter
+from pylade import utils
+
+TEXTS = [
+    'Привет как дела у тебя сегодня',
+    'مرحبا كيف حالك اليوم يا صديقي',
+    'สวัสดีครับ วันนี้เป็นอย่างไรบ้าง',
+    '안녕하세요 오늘 어떻게 지내세요',
+    'This is an english text',
+    '123 :)',
+]
+
+
+class TestScriptFilter(object):
+    """Tests for ScriptFilter class."""
+
+    def test_candidate_languages(self):
+        """Languages using other scripts must be left out."""
+        model = utils.load_file('pylade/data/model.json')
+        script_filter = ScriptFilter(CavnarTrenkleImpl().compile_model(model))
+
+        assert script_filter.candidate_languages(TEXTS[0]) == {'ru'}
+        assert script_filter.candidate_languages(TEXTS[3]) == {'ko'}
+        assert script_filter.candidate_languages(TEXTS[5]) == set()
+        assert list(script_filter.candidate_model(TEXTS[5])) == list(model)
+
+    def test_prefilter_predictions(self):
+        """The prefilter must not change predictions for these texts."""
+        model = utils.load_file('pylade/data/model.json')
+        expected = [CavnarTrenkleImpl().predict_language(text, model)
+                    for text in TEXTS]
+        implementation = CavnarTrenkleImpl(script_prefilter=True)
+
+        assert [implementation.predict_language(text, model)
+                for text in TEXTS] == expected
+        assert list(implementation.predict_languages(TEXTS, model)) == expected
+
+    def test_prefilter_evaluation(self):
+        """Evaluations must use the prefilter, like predictions."""
+        model = {'ru': ['п', 'р', 'и', 'в', 'е', 'т'], 'en': ['h', 'e', 'l', 'o']}
+        instances = [{'language': 'en', 'text': 'zzz'},
+                     {'language': 'ru', 'text': 'привет'}]
+        implementation = CavnarTrenkleImpl(script_prefilter=True)
+        # Without candidate languages, 'zzz' would be as far from 'ru' as from 'en'
+        assert CavnarTrenkleImpl().predict_language('zzz', model) == 'ru'
+        assert implementation.predict_language('zzz', model) == 'en'
+
+        for workers in [1, 2]:
+            matrix, = implementation.confusion_matrices(
+                model, instances, error_values=[8000], workers=workers).values()
+            assert matrix.accuracy() == 1.0
@@ -0,0 +1,23 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for the registry of allowed classes."""
+
+import pytest
+
+from pylade import allowed_classes
+from pylade.corpus_readers import TwitterCorpusReader
+from pylade.implementations import CavnarTrenkleImpl
+
+class TestAllowedClasses(object):
+    def test_find_classes(self):
+        assert (allowed_classes.find_implementation('CavnarTrenkleImpl') is
+                CavnarTrenkleImpl)
+        assert (allowed_classes.find_corpus_reader('TwitterCorpusReader') is
+                TwitterCorpusReader)
+
+    def test_class_not_allowed(self):
+        with pytest.raises(StopIteration):
+            allowed_classes.find_implementation('os.system')
+        with pytest.raises(StopIteration):
+            allowed_classes.find_corpus_reader('CSVCorpusReader')
@@ -6,6 +6,7 @@
 from pylade.console_scripts.args_parsers import (
     detect_script_args_parser,
     evaluate_script_args_parser,
+    serve_script_args_parser,
     train_script_args_parser
     )
 
@@ -24,13 +25,62 @@ class TestScriptArgumentParsers(object):
             'output_file': None,
             'model': 'pylade/data/model.json',
             'predict_args': None,
-            'text': 'This is an english text',
+            'text': ['This is an english text'],
+            'input_file': None,
+            'input_format': 'lines',
+            'text_column': 'text',
+            'delimiter': '|',
+            'workers': 1,
+            'cache_size': None,
+            'cache_ttl': None,
+            'engine': None,
             'implementation': 'CavnarTrenkleImpl',
+            'progress': 'auto',
+            'profile': False,
+            'cprofile_output': None,
             'loglevel': 30
         }
 
         assert detect_script_args_parser.parse_arguments(args) == expected
 
+    def test_detect_arguments_parser_input_file(self):
+        """Test argument parser for detect.py script with an input file."""
+
+        args = ['--input', '-', '--format', 'jsonl', '--workers', '4']
+        arguments = detect_script_args_parser.parse_arguments(args)
+
+        assert arguments['text'] == []
+        assert arguments['input_file'] == '-'
+        assert arguments['input_format'] == 'jsonl'
+        assert arguments['workers'] == 4
+
+    def test_serve_arguments_parser(self):
+        """Test argument parser for serve.py script."""
+
+        args = [
+            '-m', 'pylade/data/model.json',
+            '--port', '9000',
+            '--workers', '2',
+            '--cache-size', '1000',
+            '--predict-args', '{"error_value": 8000}'
+            ]
+
+        expected = {
+            'model': 'pylade/data/model.json',
+            'implementation': 'CavnarTrenkleImpl',
+            'host': '127.0.0.1',
+            'port': 9000,
+            'socket_path': None,
+            'workers': 2,
+            'cache_size': 1000,
+            'cache_ttl': None,
+            'engine': None,
+            'predict_args': {'error_value': 8000},
+            'loglevel': 30
+        }
+
+        assert serve_script_args_parser.parse_arguments(args) == expected
+
     def test_evaluate_arguments_parser(self):
         """Test argument parser for evaluate.py script."""
 
@@ -39,6 +89,7 @@ class TestScriptArgumentParsers(object):
             '-m', 'path/to/pylade/data/model.json',
             '--corpus-reader', 'SomeCorpusReader',
             '--output', 'my_results.json',
+            '--use-index',
             '--eval-args', '{"languages": ["it", "de"], "error_values": 8000}'
             ]
 
@@ -47,8 +98,14 @@ class TestScriptArgumentParsers(object):
             'test-data': '/path/to/test_set.csv',
             'corpus_reader_class': 'SomeCorpusReader',
             'results_output_file': 'my_results.json',
+            'results_output_format': 'json',
+            'metrics_output_file': None,
             'implementation': 'CavnarTrenkleImpl',
+            'use_index': True,
             'eval_args': {"languages": ["it", "de"], "error_values": 8000},
+            'progress': 'auto',
+            'profile': False,
+            'cprofile_output': None,
             'loglevel': 30
         }
 
@@ -75,6 +132,12 @@ class TestScriptArgumentParsers(object):
             'corpus_reader_class': 'SomeCorpusReader',
             'model_output_file': 'path/to/pylade/data/model.json',
             'train_args': {'limit': 5000, 'verbose': 'True'},
+            'counts_file': None,
+            'update_model': None,
+            'use_index': False,
+            'progress': 'auto',
+            'profile': False,
+            'cprofile_output': None,
             'loglevel': 30
         }
 
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for the benchmark suite, on tiny corpora."""
+
+import json
+
+import pytest
+
+from benchmarks import run
+from benchmarks.corpus import make_corpus, make_languages
+
+
+class TestBenchmarks(object):
+    def test_synthetic_corpus(self):
+        """Corpora are reproducible and balanced among languages."""
+        languages = make_languages(3, seed=1)
+        corpus = make_corpus(languages, 9, seed=2)
+
+        assert corpus == make_corpus(make_languages(3, seed=1), 9, seed=2)
+        assert [instance['language'] for instance in corpus] == \
+            ['l00', 'l01', 'l02'] * 3
+
+    def test_run_benchmarks(self):
+        results = run.run_benchmarks(size=30, languages=3, limits=(20, 50),
+                                     repeat=1)
+        json.dumps(results) # Results can be saved as JSON
+
+        assert set(results['benchmarks']) == {
+            'extract_text_ngram_freqs', 'compute_profile_from_frequencies[20]',
+            'compute_profile_from_frequencies[50]', 'distance',
+            'predict_language_short', 'predict_language_long',
+            'predict_languages', 'evaluate[workers=1]', 'evaluate[workers=2]',
+            'train[20]', 'train[50]', 'load_file[.json]', 'load_file[.pickle]',
+            'load_file[.pylade]'}
+        assert results['benchmarks']['predict_languages']['count'] == 3
+        assert 'peak_memory_bytes' not in results['benchmarks']['evaluate[workers=2]']
+        distance = results['benchmarks']['distance']
+        assert distance['count'] == 3
+        assert distance['latency_ms']['p50'] <= distance['latency_ms']['p99']
+        assert distance['peak_memory_bytes'] >= 0
+        assert all(speedup == 1 for _, _, _, speedup in
+                   run.compare(results, results))
+
+        with pytest.raises(ValueError):
+            run.run_benchmarks(size=30, benchmarks=['missing'])
+
+    def test_peak_memory_of_one_call(self):
+        """Results of previous calls are not counted in the peak memory."""
+        allocate = lambda size: bytearray(size)
+        one_call = run._measure_calls(allocate, [10 ** 6], 1, True)
+        many_calls = run._measure_calls(allocate, [10 ** 6] * 20, 1, True)
+
+        assert one_call['peak_memory_bytes'] >= 10 ** 6
+        assert many_calls['peak_memory_bytes'] < 2 * 10 ** 6
+
+    def test_compare_unknown_throughput(self):
+        results = {'benchmarks': {'distance': {'texts_per_second': None},
+                                  'train': {'texts_per_second': 10.0}}}
+        baseline = {'benchmarks': {'distance': {'texts_per_second': 5.0},
+                                   'train': {'texts_per_second': 5.0}}}
+
+        assert run.compare(results, baseline) == [
+            ('distance', 5.0, None, None), ('train', 5.0, 10.0, 2.0)]
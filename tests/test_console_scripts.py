@@ -3,7 +3,32 @@
 
 """Tests for command-line scripts."""
 
-from pylade.console_scripts import detect
+import io
+import json
+import logging
+
+import pytest
+
+from pylade import allowed_classes
+from pylade.console_scripts import detect, evaluate, train
+from pylade.implementations.implementation import Implementation
+
+CORPUS_FILE = 'tests/test_files/training_set_example.csv'
+
+
+class MinimalImpl(Implementation):
+    """An implementation without progress reporting nor instrumentation."""
+
+    def train(self, labeled_instances, **arguments):
+        # Corpus readers with `read_columns` are given as they are
+        return {language: [] for language, in
+                labeled_instances.read_columns(('language',))}
+
+    def evaluate(self, model, test_instances, **arguments):
+        return [{language: {'8000': 1.0}} for language in sorted(model)]
+
+    def predict_language(self, text, model, **arguments):
+        return sorted(model)[0]
 
 class TestDetectScript(object):
     """Tests for detect.py script."""
@@ -21,3 +46,175 @@ class TestDetectScript(object):
         }
 
         assert detect.start_detection(args) == 'en'
+
+    def test_detect_script_batch(self):
+        """Test detect script with several texts."""
+
+        args = {
+            'output_file': None,
+            'model': 'pylade/data/model.json',
+            'predict_args': None,
+            'text': ['This is an english text', 'Questo è un testo italiano'],
+            'implementation': 'CavnarTrenkleImpl',
+            'loglevel': 30
+        }
+
+        assert detect.start_detection(args) == ['en', 'it']
+
+    def test_detect_script_cache(self, caplog):
+        """Texts given as arguments use the prediction cache too."""
+
+        args = {
+            'output_file': None,
+            'model': 'pylade/data/model.json',
+            'predict_args': None,
+            'text': ['This is an english text'] * 3,
+            'implementation': 'CavnarTrenkleImpl',
+            'cache_size': 10,
+            'cache_ttl': None,
+            'loglevel': 30
+        }
+
+        with caplog.at_level(logging.INFO):
+            assert detect.start_detection(args) == ['en'] * 3
+        assert "'misses': 1, 'size': 1, 'maxsize': 10" in caplog.text
+
+    def test_detect_script_input_file(self, tmpdir):
+        """Test detect script reading texts from a JSON lines file."""
+
+        input_file = tmpdir.join('texts.jsonl')
+        input_file.write_text('\n'.join(json.dumps({'body': text}) for text in [
+            'This is an english text', 'Questo è un testo italiano']), 'utf-8')
+        output_file = tmpdir.join('languages.txt')
+        args = {
+            'output_file': str(output_file),
+            'model': 'pylade/data/model.json',
+            'predict_args': None,
+            'text': [],
+            'input_file': str(input_file),
+            'input_format': 'jsonl',
+            'text_column': 'body',
+            'workers': 1,
+            'implementation': 'CavnarTrenkleImpl',
+            'loglevel': 30
+        }
+
+        assert detect.start_detection(args) == 2
+        assert output_file.read_text('utf-8') == 'en\nit\n'
+
+    @pytest.mark.parametrize('record', [
+        '{"text": "Some text"}', '["body"]', '{"body": null}', '{"body": 42}',
+        '{"body": '])
+    def test_read_invalid_json_lines(self, record):
+        """Invalid JSON lines are reported with their line number."""
+        input_stream = io.StringIO('{"body": "Some text"}\n\n' + record + '\n')
+        texts = detect._read_texts(input_stream, 'jsonl', 'body')
+
+        assert next(texts) == 'Some text'
+        with pytest.raises(ValueError, match='^Line 3: '):
+            next(texts)
+
+    def test_detect_script_implementation_arguments(self, tmpdir, monkeypatch,
+                                                    capsys):
+        """Both modes pass `--engine` and `--progress`, and use one reporter."""
+        input_file = tmpdir.join('texts.txt')
+        input_file.write_text('This is an english text\n', 'utf-8')
+        created = []
+        monkeypatch.setattr(detect, 'create_reporter', created.append)
+        args = {
+            'output_file': None,
+            'model': 'pylade/data/model.json',
+            'predict_args': None,
+            'text': 'This is an english text',
+            'implementation': 'CavnarTrenkleImpl',
+            'engine': 'pruned',
+            'progress': 'always',
+            'loglevel': 30
+        }
+
+        assert detect.start_detection(args) == 'en'
+        assert detect.start_detection(dict(args, input_file=str(input_file),
+                                           output_file=str(tmpdir.join('out')))) == 1
+        assert created == [] # The reporter of the implementation is used
+        assert 'detect' in capsys.readouterr().err
+
+    def test_detect_script_csv_input_file(self, tmpdir):
+        """Test detect script reading texts from a CSV file."""
+
+        input_file = tmpdir.join('texts.csv')
+        input_file.write_text('id|text\n1|This is an english text\n\n'
+                              '2|"Questo è un\ntesto italiano"\n', 'utf-8')
+        output_file = tmpdir.join('languages.txt')
+        args = {
+            'output_file': str(output_file),
+            'model': 'pylade/data/model.json',
+            'predict_args': None,
+            'text': [],
+            'input_file': str(input_file),
+            'input_format': 'csv',
+            'text_column': 'text',
+            'delimiter': '|',
+            'workers': 1,
+            'implementation': 'CavnarTrenkleImpl',
+            'loglevel': 30
+        }
+
+        assert detect.start_detection(args) == 2
+        assert output_file.read_text('utf-8') == 'en\nit\n'
+
+
+class TestTrainAndEvaluateScripts(object):
+    """Tests for train.py and evaluate.py scripts."""
+
+    def test_implementation_without_reporter(self, tmpdir, monkeypatch):
+        """Implementations do not need to accept `reporter` and `instrumentation`."""
+        monkeypatch.setitem(allowed_classes.IMPLEMENTATIONS, 'MinimalImpl',
+                            'tests.test_console_scripts')
+        model_file = str(tmpdir.join('model.json'))
+        results_file = str(tmpdir.join('results.json'))
+
+        train.start_training({
+            'training-data': CORPUS_FILE,
+            'implementation': 'MinimalImpl',
+            'corpus_reader_class': 'TwitterCorpusReader',
+            'model_output_file': model_file,
+            'train_args': None,
+            'progress': 'auto',
+            'instrumentation': None,
+        })
+        evaluate.start_evaluation({
+            'model': model_file,
+            'test-data': CORPUS_FILE,
+            'corpus_reader_class': 'TwitterCorpusReader',
+            'results_output_file': results_file,
+            'implementation': 'MinimalImpl',
+            'eval_args': None,
+            'progress': 'auto',
+            'instrumentation': None,
+        })
+
+        with open(results_file) as f:
+            assert json.load(f) == {'en': {'8000': 1.0}, 'it': {'8000': 1.0}}
+
+    def test_use_index(self, tmpdir):
+        """`--use-index` indexes the languages of the corpus."""
+        corpus_file = tmpdir.join('test_set.csv')
+        with open(CORPUS_FILE, encoding='utf-8') as f:
+            corpus_file.write_text(f.read(), 'utf-8')
+        results_file = str(tmpdir.join('results.json'))
+
+        evaluate.start_evaluation({
+            'model': 'pylade/data/model.json',
+            'test-data': str(corpus_file),
+            'corpus_reader_class': 'TwitterCorpusReader',
+            'results_output_file': results_file,
+            'implementation': 'CavnarTrenkleImpl',
+            'eval_args': {'languages': ['en']},
+            'use_index': True,
+            'progress': 'never',
+            'instrumentation': None,
+        })
+
+        assert tmpdir.join('test_set.csv.index').check()
+        with open(results_file) as f:
+            assert list(json.load(f)) == ['en']
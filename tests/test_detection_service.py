@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `DetectionService`."""
+
+from pylade import utils
+from pylade.detection_service import DetectionService
+from pylade.implementations import CavnarTrenkleImpl, PredictionCache
+
+MODEL_FILE = 'pylade/data/model.json'
+TEXTS = ['This is an english text', 'Questo è un testo italiano'] * 3
+
+
+class TestDetectionService(object):
+    """Tests for `DetectionService`."""
+
+    def test_detect_stream(self):
+        """Test that texts are consumed lazily and predicted in order."""
+        service = DetectionService(CavnarTrenkleImpl(), MODEL_FILE, batch_size=4)
+        predictions = service.detect_stream(iter(TEXTS))
+        assert next(predictions) == 'en'
+        assert list(predictions) == ['it'] + ['en', 'it'] * 2
+
+    def test_detect_with_workers(self):
+        """Test that worker processes give the same results."""
+        service = DetectionService(
+            CavnarTrenkleImpl(), MODEL_FILE, workers=2, batch_size=2)
+        try:
+            assert service.detect_batch(TEXTS) == ['en', 'it'] * 3
+            assert list(service.detect_stream(iter(TEXTS))) == ['en', 'it'] * 3
+            assert service.detect(TEXTS[1]) == 'it'
+        finally:
+            service.close()
+
+    def test_stats_with_workers(self):
+        """The cache statistics of worker processes are summed."""
+        service = DetectionService(
+            CavnarTrenkleImpl(prediction_cache=PredictionCache(100)), MODEL_FILE,
+            workers=2, batch_size=2)
+        try:
+            assert service.stats() == {
+                'cache': {'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 0},
+                'workers': 0}
+            service.detect_batch(TEXTS)
+            stats = service.stats()
+            assert stats['cache']['hits'] + stats['cache']['misses'] == len(TEXTS)
+            assert 1 <= stats['workers'] <= 2
+            assert stats['cache']['maxsize'] == 100 * stats['workers']
+        finally:
+            service.close()
+
+    def test_detect_with_workers_and_binary_model(self, tmpdir):
+        """Worker processes map binary models from their file."""
+        model_path = str(tmpdir.join('model.pylade'))
+        utils.save_file(utils.load_file(MODEL_FILE), model_path)
+        service = DetectionService(
+            CavnarTrenkleImpl(), model_path, workers=2, batch_size=2)
+        try:
+            assert service.model.source() == model_path
+            assert service.detect_batch(TEXTS) == ['en', 'it'] * 3
+        finally:
+            service.close()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `Instrumentation`."""
+
+import pstats
+
+from pylade import utils
+from pylade.implementations import CavnarTrenkleImpl, PredictionCache
+from pylade.instrumentation import Instrumentation, run_profiled
+
+MODEL_FILE = 'pylade/data/model.json'
+TEXTS = ['This is an english text', 'Questo è un testo italiano'] * 2
+
+
+class TestInstrumentation(object):
+    """Tests for Instrumentation class."""
+
+    def test_instrumented_implementation(self):
+        """Predictions do not change, and each stage is recorded."""
+        model = utils.load_file(MODEL_FILE)
+        instrumentation = Instrumentation()
+        impl = CavnarTrenkleImpl(instrumentation=instrumentation)
+
+        expected = list(CavnarTrenkleImpl().predict_languages(TEXTS, model))
+        assert list(impl.predict_languages(TEXTS, model)) == expected
+        assert [impl.predict_language(text, model) for text in TEXTS] == expected
+
+        report = instrumentation.report()
+        assert set(report['stages']) == {
+            'compile', 'tokenize', 'extract_ngrams', 'rank_profile', 'score'}
+        assert report['stages']['score']['calls'] == 1 + len(TEXTS)
+        # Identical texts are profiled and scored once per batch
+        assert report['counters']['texts'] == 2 + len(TEXTS)
+        assert report['counters']['languages_scored'] == \
+            (2 + len(TEXTS)) * len(model)
+
+    def test_cache_counters(self):
+        model = utils.load_file(MODEL_FILE)
+        instrumentation = Instrumentation()
+        impl = CavnarTrenkleImpl(prediction_cache=PredictionCache(10),
+                                 instrumentation=instrumentation)
+        for text in TEXTS:
+            impl.predict_language(text, model)
+
+        assert instrumentation.counters['cache_hits'] == 2
+        assert instrumentation.counters['cache_misses'] == 2
+        # Texts which are not cached go through every stage
+        assert set(instrumentation.report()['stages']) == {
+            'compile', 'tokenize', 'extract_ngrams', 'rank_profile', 'score'}
+        assert instrumentation.counters['texts'] == 2
+        assert instrumentation.counters['ngrams'] > 0
+
+    def test_run_profiled(self, tmpdir, capsys):
+        cprofile_output = str(tmpdir.join('detect.prof'))
+        arguments = {'profile': True, 'cprofile_output': cprofile_output}
+
+        def start(arguments):
+            impl = CavnarTrenkleImpl(instrumentation=arguments['instrumentation'])
+            return impl.predict_language(TEXTS[0], utils.load_file(MODEL_FILE))
+
+        assert run_profiled(start, arguments) == 'en'
+        assert 'score' in capsys.readouterr().err
+        assert pstats.Stats(cprofile_output).total_calls > 0
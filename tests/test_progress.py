@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ProgressReporter`."""
+
+import io
+import pickle
+
+from pylade.progress import ProgressReporter
+
+
+class TestProgressReporter(object):
+    """Tests for ProgressReporter class."""
+
+    def test_silent_without_terminal(self):
+        stream = io.StringIO()
+        reporter = ProgressReporter(stream)
+        reporter.start('evaluate', total=10)
+        reporter.advance(10)
+        reporter.finish()
+        reporter.info('Done')
+
+        assert stream.getvalue() == ''
+        assert reporter.counters['evaluate'] == 10
+        assert reporter.stats()['stages']['evaluate']['seconds'] >= 0
+
+    def test_rate_limited(self):
+        stream = io.StringIO()
+        reporter = ProgressReporter(stream, interval=3600, enabled=True)
+        reporter.start('evaluate', total=1000)
+        for _ in range(1000):
+            reporter.advance()
+        reporter.finish()
+
+        # Only the final line is written
+        assert stream.getvalue().count('evaluate: 1000/1000 (100%)') == 1
+        assert '\r' not in stream.getvalue()
+
+    def test_pickle(self):
+        """Copies sent to worker processes are silent and empty."""
+        reporter = ProgressReporter(enabled=True, interval=2)
+        reporter.increment('correct')
+        copy = pickle.loads(pickle.dumps(reporter))
+
+        assert not copy.enabled and copy.interval == 2
+        assert not copy.counters
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for the evaluation results writer."""
+
+import json
+import os
+
+from pylade.results_writer import ResultsWriter, compact_results, load_results
+
+
+class TestResultsWriter(object):
+    """Tests for ResultsWriter class."""
+
+    def test_nested_json(self, tmpdir):
+        """Results are merged with those already in the output file."""
+        output_file = str(tmpdir.join('results.json'))
+        with open(output_file, 'w') as f:
+            json.dump({'it': {'100': 0.5}, 'de': {'100': 0.25}}, f)
+
+        with ResultsWriter(output_file) as writer:
+            writer.write({'it': {'8000': 0.75}})
+            writer.write({'en': {'8000': 1.0}})
+            # Nothing is rewritten until the writer is closed
+            assert load_results(output_file + '.jsonl') == {
+                'it': {'8000': 0.75}, 'en': {'8000': 1.0}}
+
+        with open(output_file) as f:
+            assert json.load(f) == {'it': {'100': 0.5, '8000': 0.75},
+                                    'de': {'100': 0.25}, 'en': {'8000': 1.0}}
+        assert not os.path.exists(output_file + '.jsonl')
+
+    def test_json_lines(self, tmpdir):
+        output_file = str(tmpdir.join('results.jsonl'))
+        for result in [{'it': {'100': 0.5}}, {'it': {'8000': 0.75}}]:
+            with ResultsWriter(output_file, compact=False) as writer:
+                writer.write(result)
+
+        with open(output_file) as f:
+            assert f.read().splitlines() == [
+                '{"it": {"100": 0.5}}', '{"it": {"8000": 0.75}}']
+
+        compact_results(output_file, str(tmpdir.join('results.json')))
+        assert load_results(str(tmpdir.join('results.json'))) == {
+            'it': {'100': 0.5, '8000': 0.75}}
+
+    def test_interrupted_evaluation(self, tmpdir):
+        """Results of an interrupted evaluation are recovered."""
+        output_file = str(tmpdir.join('results.json'))
+        writer = ResultsWriter(output_file)
+        writer.write({'it': {'100': 0.5}})
+        writer._journal.write('{"it": {"80') # Truncated line
+        writer._journal.close()
+
+        with ResultsWriter(output_file) as writer:
+            writer.write({'it': {'8000': 0.75}})
+        assert load_results(output_file) == {'it': {'100': 0.5, '8000': 0.75}}
+
+    def test_json_lines_after_nested_json(self, tmpdir):
+        """A nested JSON output file is rewritten before lines are appended."""
+        output_file = str(tmpdir.join('results.json'))
+        with ResultsWriter(output_file) as writer:
+            writer.write({'it': {'100': 0.5}})
+            writer.write({'de': {'100': 0.25}})
+        with ResultsWriter(output_file, compact=False) as writer:
+            writer.write({'en': {'100': 1.0}})
+
+        with open(output_file) as f:
+            assert [json.loads(line) for line in f] == [
+                {'it': {'100': 0.5}}, {'de': {'100': 0.25}},
+                {'en': {'100': 1.0}}]
+
+        with ResultsWriter(output_file) as writer:
+            writer.write({'fr': {'100': 0.75}})
+        assert load_results(output_file) == {
+            'it': {'100': 0.5}, 'de': {'100': 0.25}, 'en': {'100': 1.0},
+            'fr': {'100': 0.75}}
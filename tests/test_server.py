@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for the detection server."""
+
+import json
+import threading
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from pylade import server
+from pylade.detection_service import DetectionService
+from pylade.implementations import CavnarTrenkleImpl, PredictionCache
+
+MODEL_FILE = 'pylade/data/model.json'
+
+
+@pytest.fixture
+def server_url():
+    service = DetectionService(
+        CavnarTrenkleImpl(prediction_cache=PredictionCache(100)), MODEL_FILE)
+    detection_server = server.make_server(service, port=0, max_request_size=1024)
+    thread = threading.Thread(target=detection_server.serve_forever)
+    thread.start()
+    yield 'http://127.0.0.1:{}'.format(detection_server.server_address[1])
+    detection_server.shutdown()
+    detection_server.server_close()
+    thread.join()
+
+def _post(url, content):
+    with urlopen(url, data=json.dumps(content).encode('utf-8')) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+class TestDetectionServer(object):
+    """Tests for the HTTP detection server."""
+
+    def test_detect_single_text(self, server_url):
+        """Test detection of a single text."""
+        response = _post(server_url + '/detect', {'text': 'This is an english text'})
+        assert response == {'language': 'en'}
+
+    def test_detect_batch(self, server_url):
+        """Test detection of several texts in one request."""
+        response = _post(server_url + '/detect', {
+            'texts': ['This is an english text', 'Questo è un testo italiano']})
+        assert response == {'languages': ['en', 'it']}
+
+    def test_bad_request(self, server_url):
+        """Test that malformed requests are rejected."""
+        with pytest.raises(HTTPError) as error:
+            _post(server_url + '/detect', {'something': 'else'})
+        assert error.value.code == 400
+
+    @pytest.mark.parametrize('content', [
+        {'text': None}, {'text': 42}, {'text': {'a': 'b'}},
+        {'texts': 'A text'}, {'texts': ['A text', None]}, {'texts': [1, 2]},
+        ['A text'], 'A text'])
+    def test_texts_must_be_strings(self, server_url, content):
+        """Test that texts which are not strings are rejected."""
+        with pytest.raises(HTTPError) as error:
+            _post(server_url + '/detect', content)
+        assert error.value.code == 400
+        assert 'error' in json.loads(error.value.read().decode('utf-8'))
+
+    def test_invalid_body(self, server_url):
+        """Test that bodies which are not UTF-8 JSON are rejected."""
+        for body in [b'{"text": ', b'\xff\xfe']:
+            with pytest.raises(HTTPError) as error:
+                urlopen(server_url + '/detect', data=body)
+            assert error.value.code == 400
+
+    def test_request_too_large(self, server_url):
+        """Test that bodies larger than the limit are rejected."""
+        with pytest.raises(HTTPError) as error:
+            _post(server_url + '/detect', {'text': 'x' * 2000})
+        assert error.value.code == 413
+        request = Request(server_url + '/detect', data=b'{}',
+                          headers={'Content-Length': '-1'})
+        with pytest.raises(HTTPError) as error:
+            urlopen(request)
+        assert error.value.code == 400
+
+    def test_health(self, server_url):
+        """Test the health check endpoint."""
+        with urlopen(server_url + '/health') as response:
+            assert json.loads(response.read().decode('utf-8')) == {'status': 'ok'}
+
+
+    def test_stats(self, server_url):
+        """Test that cache statistics are reported."""
+        for _ in range(2):
+            _post(server_url + '/detect', {'text': 'This is an english text'})
+        with urlopen(server_url + '/stats') as response:
+            stats = json.loads(response.read().decode('utf-8'))
+        assert stats['cache']['hits'] == 1
+        assert stats['cache']['misses'] == 1
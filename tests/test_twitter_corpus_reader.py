@@ -65,3 +65,100 @@ class TestCSVCorpusReader(object):
 
         # Test limit parameter
         assert len(list(csv_corpus.all_instances(limit=2))) == 2
+
+    def test_byte_ranges(self, csv_corpus, tmpdir):
+        expected = list(csv_corpus.all_instances())
+        for count in range(1, 8):
+            byte_ranges = csv_corpus.byte_ranges(count)
+            assert len(byte_ranges) <= count
+            assert [instance
+                    for byte_range in byte_ranges
+                    for instance in csv_corpus.instances_in_range(*byte_range)
+                    ] == expected
+
+        # Records with quoted fields spanning several lines are never split
+        corpus_path = str(tmpdir.join('multiline.csv'))
+        with open(corpus_path, 'w') as corpus_file:
+            corpus_file.write('language|text\nen|"first\nsecond"\nit|"a|b"\n')
+        corpus = CSVCorpusReader(corpus_path)
+        for count in range(1, 5):
+            assert [instance
+                    for byte_range in corpus.byte_ranges(count)
+                    for instance in corpus.instances_in_range(*byte_range)
+                    ] == list(corpus.all_instances())
+
+    def test_read_columns(self, csv_corpus, tmpdir):
+        expected = [(instance['text'], instance['language'])
+                    for instance in csv_corpus.all_instances()]
+
+        assert list(csv_corpus.read_columns(('text', 'language'))) == expected
+        assert list(csv_corpus.read_columns(('text', 'language'), limit=2)) == \
+            expected[:2]
+        assert [row
+                for byte_range in csv_corpus.byte_ranges(3)
+                for row in csv_corpus.read_columns(
+                    ('text', 'language'), byte_range=byte_range)] == expected
+        assert [row for chunk in csv_corpus.column_chunks(
+            ('text', 'language'), chunk_size=2) for row in chunk] == expected
+        assert next(csv_corpus.read_columns(('language',))) == (expected[0][1],)
+        with pytest.raises(ValueError):
+            next(csv_corpus.read_columns(('language', 'missing')))
+
+        # Same values as `all_instances` with blank lines and missing values
+        corpus_path = str(tmpdir.join('irregular.csv'))
+        with open(corpus_path, 'w') as corpus_file:
+            corpus_file.write('language|text\nen|"first\nsecond"\n\nit\n')
+        corpus = CSVCorpusReader(corpus_path)
+        assert list(corpus.read_columns(('language', 'text'))) == [
+            (instance['language'], instance['text'])
+            for instance in corpus.all_instances()]
+
+
+class TestIndexedTwitterCorpusReader(object):
+    def test_index(self, twitter_corpus, tmpdir):
+        corpus_path = str(tmpdir.join('corpus.csv'))
+        with open(twitter_corpus.corpus_path) as source_file:
+            content = source_file.read()
+        with open(corpus_path, 'w') as corpus_file:
+            corpus_file.write(content)
+        corpus = TwitterCorpusReader(corpus_path, use_index=True)
+
+        assert corpus.languages_tweets_stats() == \
+            twitter_corpus.languages_tweets_stats()
+        assert corpus.available_languages == twitter_corpus.available_languages
+        assert os.path.exists(corpus_path + '.index')
+        for languages, limit in [(['en'], 0), (['it', 'en'], 3), (['xx'], 0)]:
+            assert list(corpus.tweets_with_language(languages, limit)) == \
+                list(twitter_corpus.tweets_with_language(languages, limit))
+            assert list(corpus.language_columns(languages, ('text',))) == \
+                list(twitter_corpus.language_columns(languages, ('text',)))
+        sample = corpus.sample_tweets(['en'], 2, seed=1)
+        assert len(sample) == 2
+        assert all(tweet['language'] == 'en' for tweet in sample)
+
+        # The saved index is rebuilt when the corpus changes
+        with open(corpus_path, 'a') as corpus_file:
+            corpus_file.write('de|1|"Ein\nText"\n')
+        corpus = TwitterCorpusReader(corpus_path, use_index=True)
+        assert corpus.languages_tweets_stats()['de'] == 1
+        assert list(corpus.tweets_with_language(['de'])) == [
+            {'language': 'de', 'id_str': '1', 'text': 'Ein\nText'}]
+
+    def test_index_with_stray_quotes(self, tmpdir):
+        # Quotes inside unquoted fields are kept, like without an index
+        corpus_path = str(tmpdir.join('quotes.csv'))
+        with open(corpus_path, 'w') as corpus_file:
+            corpus_file.write('language|id_str|text\n'
+                              'en|1|a 5" screen\n'
+                              'it|2|"multi\nline"\n'
+                              'de|3|ein "Text\n'
+                              'en|4|"quoted ""word"""\n')
+        twitter_corpus = TwitterCorpusReader(corpus_path)
+        corpus = TwitterCorpusReader(corpus_path, use_index=True)
+
+        assert corpus.languages_tweets_stats() == \
+            twitter_corpus.languages_tweets_stats() == \
+            {'en': 2, 'it': 1, 'de': 1}
+        for languages in [['en'], ['it', 'de'], ['en', 'it', 'de']]:
+            assert list(corpus.tweets_with_language(languages)) == \
+                list(twitter_corpus.tweets_with_language(languages))
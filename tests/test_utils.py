@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 from collections import defaultdict
+import random
 
 from pylade import utils
 
@@ -46,3 +47,18 @@ class TestUtils(object):
 
         # assert all(x in (path.basename for path in tmpdir.visit()) for x in [filename_json, filename_pickle])
         assert filename_pickle in [path.basename for path in tmpdir.visit('*.pickle')]
+
+    def test_rank_by_frequency(self):
+        rng = random.Random(0)
+        frequencies = [
+            {str(i): rng.randint(1, 3) for i in range(200)}, # Many ties
+            {str(i): i * 7 % 1009 for i in range(1000)},     # Distinct values
+            {},
+        ]
+        for frequencies_dict in frequencies:
+            expected = sorted(
+                frequencies_dict,
+                key=lambda k: (frequencies_dict[k], k), reverse=True)
+            for limit in [None, 0, 1, 10, 100, 5000]:
+                assert (utils.rank_by_frequency(frequencies_dict, limit) ==
+                        expected[:limit])